@@ -12,11 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import errno
 import logging
+import threading
+import time
 
 from thrift.transport.TTransport import TTransportBase
 import socket
 
+from . import sendmmsg
+from .utils import register_after_fork
 
 logger = logging.getLogger('jaeger_tracing')
 
@@ -25,37 +30,167 @@ class TUDPTransport(TTransportBase, object):
     """
     TUDPTransport implements just enough of the tornado transport interface
     to work for blindly sending UDP packets.
+
+    The agent address is resolved once and the socket is connect()-ed to it,
+    so that writes are plain send() calls without any name resolution.
+    The address is resolved again in a background thread every
+    resolve_interval seconds, and after a failed write. Since the socket is
+    connected, ICMP port unreachable errors surface as ECONNREFUSED, after
+    which writes fail fast for RECONNECT_BACKOFF seconds instead of sending
+    packets to an agent that is down.
     """
 
     DEFAULT_SOCKET_FAMILY = socket.AF_INET
+    DEFAULT_RESOLVE_INTERVAL = 30
+    RECONNECT_BACKOFF = 1
 
-    def __init__(self, host, port, blocking=False):
+    def __init__(self, host, port, blocking=False, resolve_interval=DEFAULT_RESOLVE_INTERVAL):
+        """
+        :param host: jaeger-agent host name or address
+        :param port: jaeger-agent UDP port
+        :param blocking: whether the socket is in blocking mode
+        :param resolve_interval: how often to resolve host again (in
+            seconds), None disables periodic resolution
+        """
         self.transport_host = host
         self.transport_port = port
+        self.resolve_interval = resolve_interval
+        self._blocking = blocking
+        self._addrinfo = self._resolve()
+        self._resolved_at = time.monotonic()
+        self._resolving = False
+        self._next_addrinfo = None
+        self._backoff_until = 0.0
 
         self.transport_sock = self._create_socket()
         self.transport_sock.setblocking(blocking)
+        self._connected = self._connect()
+        register_after_fork(self)
 
-    def _create_socket(self) -> socket.socket:
-        family, type, proto = (self.DEFAULT_SOCKET_FAMILY, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-
+    def _resolve(self):
+        """Returns the first (family, type, proto, canonname, sockaddr) of host."""
         try:
             addrinfo = socket.getaddrinfo(
                 self.transport_host, self.transport_port, type=socket.SOCK_DGRAM
             )
             if addrinfo:
-                family, type, proto, *_ = addrinfo[0]
+                return addrinfo[0]
         except socket.gaierror:
             pass
+        return None
 
+    def _create_socket(self) -> socket.socket:
+        family, type, proto = (self.DEFAULT_SOCKET_FAMILY, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        if self._addrinfo:
+            family, type, proto, *_ = self._addrinfo
         return socket.socket(family, type, proto)
 
+    def _connect(self):
+        if not self._addrinfo:
+            return False
+        try:
+            self.transport_sock.connect(self._addrinfo[4])
+        except OSError as e:
+            logger.warning('Failed to connect UDP socket to %s:%s: %s',
+                           self.transport_host, self.transport_port, e)
+            return False
+        return True
+
+    def _resolve_in_background(self):
+        def resolve():
+            try:
+                addrinfo = self._resolve()
+                if addrinfo and addrinfo != self._addrinfo:
+                    # picked up by the next write()
+                    self._next_addrinfo = addrinfo
+            finally:
+                self._resolved_at = time.monotonic()
+                self._resolving = False
+
+        self._resolving = True
+        threading.Thread(target=resolve, name='jaeger-agent-resolver', daemon=True).start()
+
+    def _update_address(self, addrinfo):
+        if self._addrinfo is None or addrinfo[0] != self._addrinfo[0]:
+            # the address family has changed, a new socket is needed
+            self.transport_sock.close()
+            self._addrinfo = addrinfo
+            self.transport_sock = self._create_socket()
+            self.transport_sock.setblocking(self._blocking)
+        else:
+            self._addrinfo = addrinfo
+        logger.info('Jaeger agent %s:%s resolved to %s',
+                    self.transport_host, self.transport_port, addrinfo[4])
+        self._connected = self._connect()
+        self._backoff_until = 0.0
+
+    def _after_fork_in_child(self):
+        # a resolver thread running in the parent does not exist in the
+        # child. The socket itself can be shared, datagrams are not mixed up.
+        self._resolving = False
+
+    def _prepare_write(self):
+        if self._next_addrinfo is not None:
+            addrinfo, self._next_addrinfo = self._next_addrinfo, None
+            self._update_address(addrinfo)
+        elif self.resolve_interval and not self._resolving and \
+                time.monotonic() - self._resolved_at > self.resolve_interval:
+            self._resolve_in_background()
+
+        if self._backoff_until and time.monotonic() < self._backoff_until:
+            raise ConnectionRefusedError(
+                errno.ECONNREFUSED, 'jaeger-agent is not reachable, backing off')
+
+    def _write_failed(self, e):
+        if isinstance(e, ConnectionRefusedError):
+            # a previous packet was rejected with ICMP port unreachable
+            self._backoff_until = time.monotonic() + self.RECONNECT_BACKOFF
+        if not self._resolving and self.transport_sock is not None:
+            self._resolve_in_background()
+
     def write(self, buf):
         """Raw write to the UDP socket."""
-        return self.transport_sock.sendto(
-            buf,
-            (self.transport_host, self.transport_port)
-        )
+        self._prepare_write()
+        try:
+            if self._connected:
+                return self.transport_sock.send(buf)
+            return self.transport_sock.sendto(
+                buf,
+                (self.transport_host, self.transport_port)
+            )
+        except OSError as e:
+            self._write_failed(e)
+            raise
+
+    def write_many(self, bufs):
+        """
+        Sends each of bufs as a separate packet, with a single sendmmsg()
+        system call where supported.
+
+        :return: number of packets sent, less than len(bufs) if an error
+            occurred after some of them were sent
+        :raises OSError: if not even the first packet could be sent
+        """
+        if not self._connected:
+            sent = 0
+            for buf in bufs:
+                try:
+                    self.write(buf)
+                except OSError:
+                    if sent:
+                        return sent
+                    raise
+                sent += 1
+            return sent
+        self._prepare_write()
+        try:
+            sent, error = sendmmsg.send_many(self.transport_sock, bufs)
+        except OSError as e:
+            self._write_failed(e)
+            raise
+        if error is not None:
+            self._write_failed(error)
+        return sent
 
     def isOpen(self):
         """
@@ -0,0 +1,119 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+from thrift.transport.TTransport import TTransportBase
+import socket
+
+from . import sendmmsg
+
+logger = logging.getLogger('jaeger_tracing')
+
+
+class TUnixDatagramTransport(TTransportBase, object):
+    """
+    TUnixDatagramTransport sends packets to an agent co-located on the same
+    host, e.g. a sidecar, through a Unix domain datagram socket. Unlike
+    loopback UDP, the packets do not go through the IP stack and can be
+    larger than 64KiB.
+
+    Packets are still lost in some cases. When the receive buffer of the
+    agent is full, a non-blocking socket fails the write with EAGAIN and
+    the packet is not sent. Such writes are counted in backpressure_count
+    and raise BlockingIOError. When the agent is not running or has
+    re-created its socket, writes fail with ConnectionRefusedError or
+    FileNotFoundError. Either way the reporters count the spans as failed,
+    they are not retried. Packets already queued in the socket of an agent
+    that exits are lost without an error.
+    """
+
+    DEFAULT_SEND_BUFFER_SIZE = 1 << 20
+
+    def __init__(self, path, blocking=False, send_buffer_size=DEFAULT_SEND_BUFFER_SIZE):
+        """
+        :param path: file system path of the socket the agent listens on
+        :param blocking: whether the socket is in blocking mode
+        :param send_buffer_size: SO_SNDBUF of the socket, which also limits
+            the max size of a datagram
+        """
+        self.transport_path = path
+        self.backpressure_count = 0
+
+        self.transport_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.transport_sock.setblocking(blocking)
+        if send_buffer_size:
+            self.transport_sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer_size)
+        self._connected = self._connect()
+
+    def _connect(self):
+        try:
+            self.transport_sock.connect(self.transport_path)
+        except OSError as e:
+            # the agent may not be up yet, connect on the next write
+            logger.warning('Failed to connect to jaeger-agent socket %s: %s',
+                           self.transport_path, e)
+            return False
+        return True
+
+    def write(self, buf):
+        """Raw write to the Unix domain socket."""
+        if not self._connected:
+            self._connected = self._connect()
+        try:
+            if self._connected:
+                return self.transport_sock.send(buf)
+            return self.transport_sock.sendto(buf, self.transport_path)
+        except OSError as e:
+            self._write_failed(e)
+            raise
+
+    def _write_failed(self, e):
+        if isinstance(e, BlockingIOError):
+            self.backpressure_count += 1
+        elif isinstance(e, (ConnectionRefusedError, FileNotFoundError)):
+            # the agent went away, or re-created its socket
+            self._connected = False
+
+    def write_many(self, bufs):
+        """
+        Sends each of bufs as a separate datagram, with a single sendmmsg()
+        system call where supported.
+
+        :return: number of datagrams sent, less than len(bufs) if an error
+            occurred after some of them were sent
+        :raises OSError: if not even the first datagram could be sent
+        """
+        if not self._connected:
+            self._connected = self._connect()
+        if not self._connected:
+            # raises the same error write() would
+            self.write(bufs[0])
+            return 1
+        try:
+            sent, error = sendmmsg.send_many(self.transport_sock, bufs)
+        except OSError as e:
+            self._write_failed(e)
+            raise
+        if error is not None:
+            self._write_failed(error)
+        return sent
+
+    def isOpen(self):
+        return self.transport_sock is not None
+
+    def close(self):
+        self.transport_sock.close()
+        self.transport_sock = None
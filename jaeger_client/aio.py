@@ -0,0 +1,355 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Asyncio-native counterparts of LocalAgentSender, Reporter,
+RemoteControlledSampler and RemoteThrottler. They run on the
+application's own event loop instead of a tornado IOLoop in a
+separate thread.
+"""
+
+import asyncio
+import logging
+from collections import namedtuple
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+from . import thrift
+from .constants import DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_PACKET_SIZE
+from .metrics import Metrics, MetricsFactory
+from .reporter import BaseReporter, ReporterFuture, ReporterMetrics, SpanBatcher
+from .sampler import RemoteControlledSampler
+from .span import Span
+from .throttler import RemoteThrottler
+from .utils import ErrorReporter
+
+default_logger = logging.getLogger('jaeger_tracing')
+
+HTTPResponse = namedtuple('HTTPResponse', ['code', 'body'])
+
+
+class AsyncioLoopAdapter(object):
+    """
+    Exposes the subset of the tornado IOLoop interface used by
+    RemoteControlledSampler and RemoteThrottler on top of an asyncio loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+    def add_callback(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def spawn_callback(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_later(self, delay, callback, *args):
+        return self.loop.call_later(delay, callback, *args)
+
+    def time(self):
+        return self.loop.time()
+
+
+class AsyncioPeriodicCallback(object):
+    """Calls callback every interval seconds on an asyncio loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback, interval: float) -> None:
+        self.loop = loop
+        self.callback = callback
+        self.interval = interval
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def start(self) -> None:
+        self._handle = self.loop.call_later(self.interval, self._run)
+
+    def stop(self) -> None:
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+
+    def is_running(self) -> bool:
+        return self._handle is not None
+
+    def _run(self):
+        if self._handle is None:
+            return
+        try:
+            self.callback()
+        except Exception:
+            default_logger.exception('Exception in periodic callback')
+        if self._handle is not None:
+            self.start()
+
+
+class AsyncioLocalAgentSender(object):
+    """
+    AsyncioLocalAgentSender implements everything necessary to communicate
+    with local jaeger-agent from an asyncio event loop. Spans are submitted
+    through a datagram endpoint created with loop.create_datagram_endpoint,
+    sampling strategies and throttling credits are fetched with a minimal
+    HTTP/1.0 client on top of asyncio streams.
+
+    It must be created from a coroutine or callback running on the event
+    loop, or be given the loop explicitly.
+    """
+
+    DEFAULT_TIMEOUT = 15
+
+    def __init__(
+        self,
+        host: str,
+        sampling_port: int,
+        reporting_port: int,
+        throttling_port: Optional[int] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.host = host
+        self.sampling_port = int(sampling_port)
+        self.reporting_port = int(reporting_port)
+        self.throttling_port = int(throttling_port) if throttling_port else None
+        self.loop = loop or asyncio.get_running_loop()
+        self.io_loop = AsyncioLoopAdapter(self.loop)
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def _get_transport(self):
+        if self._transport is None or self._transport.is_closing():
+            transport, _ = await self.loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol,
+                remote_addr=(self.host, self.reporting_port))
+            self._transport = transport
+        return self._transport
+
+    async def emit_batch(self, data: bytes) -> None:
+        """Send one serialized Agent.emitBatch message as a UDP datagram."""
+        transport = await self._get_transport()
+        transport.sendto(data)
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def _http_get(self, port, path, args, timeout):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, port), timeout)
+        try:
+            request = 'GET /%s?%s HTTP/1.0\r\nHost: %s:%d\r\n\r\n' % (
+                path, urlencode(args), self.host, port)
+            writer.write(request.encode('utf-8'))
+            # HTTP/1.0 servers close the connection after the response
+            response = await asyncio.wait_for(reader.read(), timeout)
+        finally:
+            writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        try:
+            code = int(head.split(b' ', 2)[1])
+        except (IndexError, ValueError):
+            raise IOError('Malformed HTTP response from jaeger-agent')
+        if code != 200:
+            raise IOError('HTTP %d from jaeger-agent: %s' % (code, body))
+        return HTTPResponse(code=code, body=body)
+
+    def _request(self, port, path, args, timeout):
+        return asyncio.run_coroutine_threadsafe(
+            self._http_get(port, path, args, timeout), self.loop)
+
+    # Same contract as LocalAgentSender: returns a future whose result
+    # has the response body in the `body` attribute.
+    def request_sampling_strategy(self, service_name, timeout=DEFAULT_TIMEOUT):
+        return self._request(
+            self.sampling_port, 'sampling', [('service', service_name)], timeout)
+
+    def request_throttling_credits(self,
+                                   service_name,
+                                   client_id,
+                                   operations,
+                                   timeout=DEFAULT_TIMEOUT):
+        return self._request(self.throttling_port, 'credits', [
+            ('service', service_name),
+            ('uuid', client_id),
+        ] + [('operations', op) for op in operations], timeout)
+
+
+class AsyncioReporter(SpanBatcher, BaseReporter):
+    """
+    Receives completed spans from Tracer and submits them to jaeger-agent
+    from a task running on the application's asyncio event loop.
+    """
+
+    def __init__(
+        self,
+        channel: AsyncioLocalAgentSender,
+        queue_capacity: int = 100,
+        batch_size: int = 10,
+        flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
+        error_reporter: Optional[ErrorReporter] = None,
+        metrics_factory: Optional[MetricsFactory] = None,
+        max_packet_size: Optional[int] = DEFAULT_MAX_PACKET_SIZE,
+        **kwargs: Any
+    ) -> None:
+        """
+        :param channel: an AsyncioLocalAgentSender
+        :param queue_capacity: how many spans we can hold in memory before
+            starting to drop spans
+        :param batch_size: how many spans we can submit at once to Collector
+        :param flush_interval: how often the auto-flush is called (in seconds)
+        :param error_reporter:
+        :param metrics_factory: an instance of MetricsFactory class, or None.
+        :param max_packet_size: max size of a UDP packet sent to jaeger-agent,
+            larger batches are split, and spans that do not fit into a packet
+            on their own are dropped. None disables the check.
+        :param kwargs:
+            'logger'
+        :return:
+        """
+        if queue_capacity < batch_size:
+            raise ValueError('Queue capacity cannot be less than batch size')
+
+        self._channel = channel
+        self.loop = channel.loop
+        self.queue_capacity = queue_capacity
+        self.batch_size = batch_size
+        self.max_packet_size = max_packet_size
+        self.flush_interval = flush_interval or None
+        self.metrics_factory = metrics_factory or MetricsFactory()
+        self.metrics = ReporterMetrics(self.metrics_factory)
+        self.error_reporter = error_reporter or ErrorReporter(Metrics())
+        self.logger = kwargs.get('logger', default_logger)
+        self._log_encoder()
+
+        # created on the event loop by _get_queue(), the reporter may be
+        # created outside of it
+        self._queue: Optional[asyncio.Queue] = None
+        self.stop = object()
+        self.stopped = False
+        self._seqid = 0
+        self._process = None
+        self._frame: Optional[thrift.EmitBatchFrame] = None
+        self._consumer = asyncio.run_coroutine_threadsafe(self._consume_queue(), self.loop)
+
+    def set_process(self, service_name: str, tags: Dict, max_length: int) -> None:
+        process = thrift.make_process(
+            service_name=service_name, tags=tags, max_length=max_length,
+        )
+        self._frame = thrift.make_emit_batch_frame(process)
+        self._process = process
+
+    def _in_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def report_span(self, span: Span) -> None:
+        if self._in_loop_thread():
+            self._report_span_from_loop(span)
+        else:
+            self.loop.call_soon_threadsafe(self._report_span_from_loop, span)
+
+    def _get_queue(self) -> asyncio.Queue:
+        # only called on the event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_capacity)
+        return self._queue
+
+    def _report_span_from_loop(self, span):
+        if self.stopped:
+            self.metrics.reporter_dropped(1)
+            return
+        try:
+            self._get_queue().put_nowait(span)
+        except asyncio.QueueFull:
+            self.metrics.reporter_dropped(1)
+
+    async def _consume_queue(self):
+        queue = self._get_queue()
+        # spans are encoded as soon as they are taken off the queue
+        spans: List[bytes] = []
+        stopped = False
+        while not stopped:
+            while len(spans) < self.batch_size:
+                try:
+                    # using timeout allows periodic flush with smaller packet
+                    if self.flush_interval and spans:
+                        span = await asyncio.wait_for(queue.get(), self.flush_interval)
+                    else:
+                        span = await queue.get()
+                except asyncio.TimeoutError:
+                    break
+                if span is self.stop:
+                    stopped = True
+                    # don't return yet, submit accumulated spans first
+                    break
+                spans.extend(self._encode_spans([span]))
+            if spans:
+                await self._submit(spans)
+                spans = []
+            self.metrics.reporter_queue_length(queue.qsize())
+        self.logger.info('Span publisher exited')
+
+    async def _submit(self, spans):
+        """
+        :param spans: list of spans encoded with _encode()
+        """
+        frame = self._frame
+        if not frame:
+            return
+        for group in self._split_batch(spans, frame):
+            try:
+                self._seqid += 1
+                await self._channel.emit_batch(
+                    thrift.make_emit_batch_message_from_spans(frame, group, self._seqid))
+                self.metrics.reporter_success(len(group))
+            except Exception as e:
+                self._send_failed(len(group), e)
+
+    async def _flush(self):
+        self.stopped = True
+        await self._get_queue().put(self.stop)
+        await asyncio.wrap_future(self._consumer)
+
+    def close(self) -> ReporterFuture:
+        """
+        Ensure that all spans from the queue are submitted.
+        Returns a concurrent.futures.Future that will be completed once the
+        queue is empty; on the event loop thread wrap it with
+        asyncio.wrap_future() to await it.
+        """
+        return asyncio.run_coroutine_threadsafe(self._flush(), self.loop)
+
+
+class AsyncioRemoteControlledSampler(RemoteControlledSampler):
+    """
+    RemoteControlledSampler that polls the sampling strategy on the event
+    loop of an AsyncioLocalAgentSender.
+    """
+
+    def _create_periodic_callback(self):
+        return AsyncioPeriodicCallback(
+            loop=self._channel.loop,
+            callback=self._poll_sampling_manager,
+            interval=self.sampling_refresh_interval)
+
+
+class AsyncioRemoteThrottler(RemoteThrottler):
+    """
+    RemoteThrottler that polls throttling credits on the event loop of an
+    AsyncioLocalAgentSender.
+    """
+
+    def _create_periodic_callback(self):
+        return AsyncioPeriodicCallback(
+            loop=self.channel.loop,
+            callback=self._poll_credits,
+            interval=self.refresh_interval)
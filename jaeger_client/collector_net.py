@@ -0,0 +1,166 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import http.client
+import queue
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from thrift.protocol import TBinaryProtocol
+from thrift.transport import TTransport
+
+import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
+from . import thrift_compact
+
+DEFAULT_COLLECTOR_PATH = '/api/traces'
+
+# errors that show that the server closed a keep-alive connection before
+# it got the request, on which the request can be sent again
+_CONNECTION_CLOSED_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+if thrift_compact.ACCELERATED:
+    _batch_spec = thrift_compact.fastbinary_spec(ttypes.Batch)
+
+
+class HttpCollectorSender(object):
+    """
+    HttpCollectorSender submits span batches directly to jaeger-collector,
+    bypassing jaeger-agent. Each ttypes.Batch is POSTed to the collector's
+    /api/traces endpoint in Thrift binary protocol, the same payload as
+    in Collector.submitBatches, but without the RPC envelope.
+
+    Connections are kept alive and reused from a pool, so a sender can be
+    shared by several threads. Since HTTP has no datagram size limit,
+    batches can be much larger than what fits into a UDP packet.
+    """
+
+    DEFAULT_TIMEOUT = 15
+
+    def __init__(
+        self,
+        endpoint: str,
+        pool_size: int = 2,
+        timeout: float = DEFAULT_TIMEOUT,
+        gzip_payload: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        :param endpoint: collector URL, e.g. http://jaeger-collector:14268,
+            the path defaults to /api/traces
+        :param pool_size: max number of idle connections kept open
+        :param timeout: socket timeout in seconds
+        :param gzip_payload: compress request bodies with gzip. The
+            collector, or a proxy in front of it, must accept
+            Content-Encoding: gzip
+        :param headers: extra HTTP headers, e.g. for authentication
+        """
+        url = urlparse(endpoint)
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise ValueError('Unsupported collector endpoint %s' % endpoint)
+        self.scheme = url.scheme
+        self.host: str = url.hostname
+        self.port = url.port
+        self.path = url.path or DEFAULT_COLLECTOR_PATH
+        if url.query:
+            self.path += '?' + url.query
+        self.timeout = timeout
+        self.gzip_payload = gzip_payload
+        self.headers = {'Content-Type': 'application/x-thrift'}
+        if gzip_payload:
+            self.headers['Content-Encoding'] = 'gzip'
+        if headers:
+            self.headers.update(headers)
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _release_connection(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @staticmethod
+    def serialize(batch: Any) -> bytes:
+        if thrift_compact.ACCELERATED:
+            return thrift_compact.fastbinary.encode_binary(batch, _batch_spec)
+        buf = TTransport.TMemoryBuffer()
+        batch.write(TBinaryProtocol.TBinaryProtocol(buf))
+        return buf.getvalue()
+
+    def send(self, batch: Any) -> None:
+        """
+        Submit one ttypes.Batch to the collector.
+
+        :raises IOError: if the request fails or the collector does not
+            accept the batch
+        """
+        body = self.serialize(batch)
+        if self.gzip_payload:
+            body = gzip.compress(body)
+        self._post(body)
+
+    def _post(self, body: bytes) -> None:
+        conn = self._get_connection()
+        reused = conn.sock is not None
+        try:
+            try:
+                response = self._request(conn, body)
+            except _CONNECTION_CLOSED_ERRORS:
+                if not reused:
+                    raise
+                # the server closed an idle keep-alive connection, retry
+                # once on a fresh one. Other errors, e.g. a timeout, may
+                # happen after the collector has accepted the batch, which
+                # it would store twice if it was sent again.
+                conn.close()
+                conn = self._new_connection()
+                response = self._request(conn, body)
+            # drain the body so the connection can be reused, response
+            # bytes have arrived, so errors are not retried
+            response.read()
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release_connection(conn)
+        if response.status >= 300:
+            raise IOError('jaeger-collector returned HTTP %d' % response.status)
+
+    def _request(self, conn, body):
+        conn.request('POST', self.path, body=body, headers=self.headers)
+        return conn.getresponse()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
@@ -23,6 +23,7 @@ from opentracing.propagation import Format
 from opentracing.scope_manager import ScopeManager
 from . import Tracer
 from .local_agent_net import LocalAgentSender
+from .TUDPTransport import TUDPTransport
 from .throttler import RemoteThrottler, Throttler
 from .reporter import (
     BaseReporter,
@@ -36,9 +37,17 @@ from .sampler import (
     RateLimitingSampler,
     RemoteControlledSampler,
     Sampler)
+from .rate_limiter import RateLimiterTable
+from .strategy_cache import SamplingStrategyCache
 from .constants import (
     DEFAULT_SAMPLING_INTERVAL,
     DEFAULT_FLUSH_INTERVAL,
+    DEFAULT_MAX_PACKET_SIZE,
+    DEFAULT_MAX_UNIX_PACKET_SIZE,
+    DEFAULT_QUEUE_BLOCK_TIMEOUT,
+    DEFAULT_QUEUE_SAMPLE_DOWN_RATE,
+    DEFAULT_SPOOL_MAX_BYTES,
+    QUEUE_FULL_DROP_NEWEST,
     SAMPLER_TYPE_CONST,
     SAMPLER_TYPE_PROBABILISTIC,
     SAMPLER_TYPE_RATE_LIMITING,
@@ -130,11 +139,22 @@ class Config(object):
                         'enabled',
                         'reporter_batch_size',
                         'reporter_queue_size',
+                        'reporter_queue_max_bytes',
+                        'reporter_queue_full_policy',
+                        'reporter_queue_block_timeout',
+                        'reporter_queue_sample_down_rate',
+                        'reporter_priority_queue_size',
+                        'reporter_spool_dir',
+                        'reporter_spool_max_bytes',
+                        'reporter_max_packet_size',
                         'propagation',
                         'max_tag_value_length',
                         'max_traceback_length',
+                        'lazy_tag_encoding',
                         'reporter_flush_interval',
                         'sampling_refresh_interval',
+                        'sampling_strategy_cache_dir',
+                        'sampling_rate_limiter_file',
                         'trace_id_header',
                         'generate_128bit_trace_id',
                         'baggage_header_prefix',
@@ -171,6 +191,45 @@ class Config(object):
     def reporter_queue_size(self) -> int:
         return int(self.config.get('reporter_queue_size', 100))
 
+    @property
+    def reporter_queue_max_bytes(self) -> Optional[int]:
+        value = self.config.get('reporter_queue_max_bytes')
+        return int(value) if value is not None else None
+
+    @property
+    def reporter_queue_full_policy(self) -> str:
+        return self.config.get('reporter_queue_full_policy', QUEUE_FULL_DROP_NEWEST)
+
+    @property
+    def reporter_queue_block_timeout(self) -> float:
+        return float(self.config.get('reporter_queue_block_timeout',
+                                     DEFAULT_QUEUE_BLOCK_TIMEOUT))
+
+    @property
+    def reporter_queue_sample_down_rate(self) -> int:
+        return int(self.config.get('reporter_queue_sample_down_rate',
+                                   DEFAULT_QUEUE_SAMPLE_DOWN_RATE))
+
+    @property
+    def reporter_priority_queue_size(self) -> int:
+        return int(self.config.get('reporter_priority_queue_size', 0))
+
+    @property
+    def reporter_spool_dir(self) -> Optional[str]:
+        return self.config.get('reporter_spool_dir')
+
+    @property
+    def reporter_spool_max_bytes(self) -> int:
+        return int(self.config.get('reporter_spool_max_bytes', DEFAULT_SPOOL_MAX_BYTES))
+
+    @property
+    def reporter_max_packet_size(self) -> int:
+        if self.local_agent_reporting_socket:
+            default = DEFAULT_MAX_UNIX_PACKET_SIZE
+        else:
+            default = DEFAULT_MAX_PACKET_SIZE
+        return int(self.config.get('reporter_max_packet_size', default))
+
     @property
     def logging(self) -> bool:
         return get_boolean(self.config.get('logging', False), False)
@@ -227,6 +286,15 @@ class Config(object):
         """
         return self.config.get('max_traceback_length', MAX_TRACEBACK_LENGTH)
 
+    @property
+    def lazy_tag_encoding(self) -> bool:
+        """
+        :return: Returns True if span tags and logs should be stored as raw
+        values and converted to Thrift by the reporter, instead of being
+        converted on the thread that records them.
+        """
+        return get_boolean(self.config.get('lazy_tag_encoding', False), False)
+
     @property
     def sampler(self) -> Optional[Sampler]:
         sampler_config = self.config.get('sampler', {})
@@ -251,6 +319,22 @@ class Config(object):
         return self.config.get('sampling_refresh_interval',
                                DEFAULT_SAMPLING_INTERVAL)
 
+    @property
+    def sampling_strategy_cache_dir(self) -> Optional[str]:
+        """
+        Directory in which the processes of the service on this host share
+        the sampling strategy, so that only one of them polls jaeger-agent.
+        """
+        return self.config.get('sampling_strategy_cache_dir')
+
+    @property
+    def sampling_rate_limiter_file(self) -> Optional[str]:
+        """
+        File in which the processes on this host share the rate limits of
+        the sampling strategy, so that they apply to the host as a whole.
+        """
+        return self.config.get('sampling_rate_limiter_file')
+
     @property
     def reporter_flush_interval(self) -> int:
         return self.config.get('reporter_flush_interval',
@@ -303,6 +387,30 @@ class Config(object):
         else:
             return DEFAULT_REPORTING_HOST
 
+    @property
+    def local_agent_reporting_socket(self) -> Optional[str]:
+        """
+        Path of a Unix domain datagram socket of a co-located agent. When
+        set, spans are sent to it instead of reporting_host:reporting_port.
+        """
+        # noinspection PyBroadException
+        try:
+            return self.local_agent_group()['reporting_socket']  # type:ignore
+        except:  # noqa: E722
+            return None
+
+    @property
+    def local_agent_reporting_resolve_interval(self) -> Optional[float]:
+        """
+        How often the address of local_agent_reporting_host is resolved
+        again, in seconds. 0 disables periodic resolution.
+        """
+        # noinspection PyBroadException
+        try:
+            return float(self.local_agent_group()['reporting_resolve_interval'])  # type:ignore
+        except:  # noqa: E722
+            return TUDPTransport.DEFAULT_RESOLVE_INTERVAL
+
     @property
     def max_operations(self) -> Optional[Any]:
         return self.config.get('max_operations', None)
@@ -387,6 +495,15 @@ class Config(object):
         channel = self._create_local_agent_channel(io_loop=io_loop)
         sampler = self.sampler
         if not sampler:
+            strategy_cache = None
+            if self.sampling_strategy_cache_dir:
+                strategy_cache = SamplingStrategyCache(
+                    self.sampling_strategy_cache_dir, self.service_name)
+            rate_limiter_table = None
+            if self.sampling_rate_limiter_file:
+                rate_limiter_table = RateLimiterTable(
+                    self.sampling_rate_limiter_file, self.service_name,
+                    metrics_factory=self._metrics_factory)
             sampler = RemoteControlledSampler(
                 channel=channel,
                 service_name=self.service_name,
@@ -394,14 +511,24 @@ class Config(object):
                 metrics_factory=self._metrics_factory,
                 error_reporter=self.error_reporter,
                 sampling_refresh_interval=self.sampling_refresh_interval,
-                max_operations=self.max_operations)
+                max_operations=self.max_operations,
+                strategy_cache=strategy_cache,
+                rate_limiter_table=rate_limiter_table)
         logger.info('Using sampler %s', sampler)
 
         reporter: BaseReporter = Reporter(
             channel=channel,
             queue_capacity=self.reporter_queue_size,
+            queue_max_bytes=self.reporter_queue_max_bytes,
+            queue_full_policy=self.reporter_queue_full_policy,
+            queue_block_timeout=self.reporter_queue_block_timeout,
+            queue_sample_down_rate=self.reporter_queue_sample_down_rate,
+            priority_queue_capacity=self.reporter_priority_queue_size,
+            spool_dir=self.reporter_spool_dir,
+            spool_max_bytes=self.reporter_spool_max_bytes,
             batch_size=self.reporter_batch_size,
             flush_interval=self.reporter_flush_interval,
+            max_packet_size=self.reporter_max_packet_size,
             logger=logger,
             metrics_factory=self._metrics_factory,
             error_reporter=self.error_reporter)
@@ -445,6 +572,7 @@ class Config(object):
             extra_codecs=self.propagation,
             throttler=throttler,
             scope_manager=self.scope_manager,
+            lazy_tag_encoding=self.lazy_tag_encoding,
         )
 
     def _initialize_global_tracer(self, tracer):
@@ -460,11 +588,17 @@ class Config(object):
 
         :param self: instance of Config
         """
-        logger.info('Initializing Jaeger Tracer with UDP reporter')
+        if self.local_agent_reporting_socket:
+            logger.info('Initializing Jaeger Tracer with Unix socket reporter %s',
+                        self.local_agent_reporting_socket)
+        else:
+            logger.info('Initializing Jaeger Tracer with UDP reporter')
         return LocalAgentSender(
             host=self.local_agent_reporting_host,
             sampling_port=self.local_agent_sampling_port,
             reporting_port=self.local_agent_reporting_port,
             throttling_port=self.throttler_port,
-            io_loop=io_loop
+            io_loop=io_loop,
+            resolve_interval=self.local_agent_reporting_resolve_interval,
+            reporting_socket=self.local_agent_reporting_socket,
         )
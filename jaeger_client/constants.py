@@ -31,6 +31,37 @@ DEFAULT_SAMPLING_INTERVAL = 60
 # How often remote reporter does a preemptive flush of its buffers
 DEFAULT_FLUSH_INTERVAL = 1
 
+# Max size of a UDP packet with spans sent to jaeger-agent, which by default
+# reads packets of up to 65000 bytes
+DEFAULT_MAX_PACKET_SIZE = 65000
+
+# Max size of a packet with spans sent to jaeger-agent over a Unix domain
+# datagram socket, which is limited by the socket buffer size only
+DEFAULT_MAX_UNIX_PACKET_SIZE = 256 * 1024
+
+# what the reporter does with a new span when its queue is full:
+# drop the new span,
+QUEUE_FULL_DROP_NEWEST = 'drop_newest'
+
+# drop the oldest spans in the queue to make room for it,
+QUEUE_FULL_DROP_OLDEST = 'drop_oldest'
+
+# block the reporting thread until there is room, for up to a timeout,
+QUEUE_FULL_BLOCK = 'block'
+
+# or drop the new span, and keep only every Nth span while the queue is
+# above QUEUE_HIGH_WATER_MARK to avoid getting full in the first place
+QUEUE_FULL_SAMPLE_DOWN = 'sample_down'
+
+# How long the block policy waits for room in the queue (in seconds)
+DEFAULT_QUEUE_BLOCK_TIMEOUT = 1
+
+# Every how many spans the sample_down policy keeps one
+DEFAULT_QUEUE_SAMPLE_DOWN_RATE = 10
+
+# Fraction of the queue capacity above which sample_down kicks in
+QUEUE_HIGH_WATER_MARK = 0.8
+
 # Name of the HTTP header used to encode trace ID
 TRACE_ID_HEADER = 'uber-trace-id'
 
@@ -96,3 +127,32 @@ DEBUG_FLAG = 0x02
 
 # How often throttler polls for credits
 DEFAULT_THROTTLER_REFRESH_INTERVAL = 5
+
+# Max size of the on-disk spool of the reporter, see SpanSpool
+DEFAULT_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+# Number of files the spool is rotated across, the oldest file is
+# deleted when the spool grows past its max size
+SPOOL_SEGMENTS = 4
+
+# How many consecutive failed batches make the reporter spool new batches
+# instead of sending them, until a send succeeds again
+SPOOL_SEND_FAILURE_THRESHOLD = 3
+
+# Size of the data area of the ring file written by RingReporter
+DEFAULT_RING_CAPACITY = 16 * 1024 * 1024
+
+# How often the ring shipper checks the ring for new spans (in seconds)
+DEFAULT_RING_POLL_INTERVAL = 0.1
+
+# Number of token buckets in a file shared by RateLimiterTable, e.g. one
+# for the service and one per operation of an adaptive sampling strategy
+DEFAULT_RATE_LIMITER_SLOTS = 4096
+
+# How long a token bucket of RateLimiterTable may go unused before its slot
+# can be taken by another key (in seconds)
+DEFAULT_RATE_LIMITER_SLOT_TTL = 10 * 60
+
+# Fraction of the max balance of a token bucket of RateLimiterTable that a
+# process takes at once, and spends without accessing the bucket again
+DEFAULT_RATE_LIMITER_LEASE_FRACTION = 0.1
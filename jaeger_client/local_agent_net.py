@@ -13,13 +13,18 @@
 # limitations under the License.
 
 
+import os
+import threading
+
 from threadloop import ThreadLoop
 import tornado
 import tornado.httpclient
 from tornado.concurrent import Future
 from tornado.httputil import url_concat
 from .TUDPTransport import TUDPTransport
+from .TUnixDatagramTransport import TUnixDatagramTransport
 from thrift.transport.TTransport import TBufferedTransport
+from .utils import register_after_fork
 
 
 class LocalAgentHTTP(object):
@@ -64,10 +69,13 @@ class LocalAgentSender(TBufferedTransport):
     end of the batch span submission call.
     """
 
-    def __init__(self, host, sampling_port, reporting_port, io_loop=None, throttling_port=None):
+    def __init__(self, host, sampling_port, reporting_port, io_loop=None, throttling_port=None,
+                 resolve_interval=TUDPTransport.DEFAULT_RESOLVE_INTERVAL, reporting_socket=None):
         # IOLoop
         self._thread_loop = None
-        self.io_loop = io_loop or self._create_new_thread_loop()
+        self._io_loop = io_loop or self._create_new_thread_loop()
+        self._pid = os.getpid()
+        self._restart_lock = threading.Lock()
 
         # HTTP sampling
         self.local_agent_http = LocalAgentHTTP(host, sampling_port)
@@ -78,8 +86,15 @@ class LocalAgentSender(TBufferedTransport):
 
         # UDP reporting - this will only get written to after our flush() call.
         # We are buffering things up because we are a TBufferedTransport.
-        udp = TUDPTransport(host, reporting_port)
-        TBufferedTransport.__init__(self, udp)
+        # If reporting_socket is given, spans are sent to a co-located agent
+        # through a Unix domain datagram socket instead.
+        if reporting_socket:
+            transport = TUnixDatagramTransport(reporting_socket)
+        else:
+            transport = TUDPTransport(host, reporting_port, resolve_interval=resolve_interval)
+        self.transport = transport
+        TBufferedTransport.__init__(self, transport)
+        register_after_fork(self)
 
     def _create_new_thread_loop(self):
         """
@@ -91,6 +106,39 @@ class LocalAgentSender(TBufferedTransport):
             self._thread_loop.start()
         return self._thread_loop._io_loop
 
+    @property
+    def io_loop(self):
+        if self._pid != os.getpid():
+            self._restart_after_fork()
+        return self._io_loop
+
+    @io_loop.setter
+    def io_loop(self, io_loop):
+        self._io_loop = io_loop
+
+    def _restart_after_fork(self):
+        # The thread running our IOLoop does not exist in a forked child, a
+        # new one is started when the IOLoop is first asked for. Reporters
+        # and samplers ask for it on their first use in the child.
+        with self._restart_lock:
+            if self._pid == os.getpid():
+                return
+            if self._thread_loop is not None:
+                self._io_loop = self._create_new_thread_loop()
+            self._pid = os.getpid()
+
+    def _after_fork_in_child(self):
+        self._restart_lock = threading.Lock()
+        # anything written but not flushed yet is the parent's to send
+        TBufferedTransport.__init__(self, self.transport)
+
+    def write_many(self, bufs):
+        """
+        Send each of bufs as a separate packet, bypassing the write buffer.
+        See TUDPTransport.write_many().
+        """
+        return self.transport.write_many(bufs)
+
     def readFrame(self):
         """Empty read frame that is never ready"""
         return Future()
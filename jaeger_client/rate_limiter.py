@@ -12,8 +12,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+import mmap
+import os
 import random
+import struct
+import threading
 import time
+from typing import Dict, Optional, Tuple
+
+from .constants import (
+    DEFAULT_RATE_LIMITER_LEASE_FRACTION,
+    DEFAULT_RATE_LIMITER_SLOTS,
+    DEFAULT_RATE_LIMITER_SLOT_TTL,
+)
+from .metrics import MetricsFactory
+from .utils import register_after_fork
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
 
 
 class RateLimiter(object):
@@ -68,3 +87,263 @@ class RateLimiter(object):
         self.balance += elapsed_time * self.credits_per_second
         if self.balance > self.max_balance:
             self.balance = self.max_balance
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter with a balance shared by all processes that use the same
+    key of a RateLimiterTable, e.g. all workers of a service on a host,
+    so that credits_per_second is the rate of the host rather than the rate
+    of each process. Falls back to a balance of its own if there is no
+    free slot in the table, which the table counts in the
+    jaeger:rate_limiter_fallbacks metric.
+    """
+
+    def __init__(self, credits_per_second, max_balance, table, key):
+        self.table = table
+        self.key = key
+        super(SharedRateLimiter, self).__init__(credits_per_second, max_balance)
+
+    def check_credit(self, item_cost):
+        # the shared balance is capped at max_balance of the process
+        # checking it, the processes converge once they all have the
+        # same strategy
+        allowed = self.table.check_credit(
+            self.key, item_cost, self.credits_per_second, self.max_balance, self.timestamp())
+        if allowed is None:
+            return super(SharedRateLimiter, self).check_credit(item_cost)
+        return allowed
+
+
+# magic, version and number of slots
+_TABLE_HEADER = struct.Struct('<4sII')
+_TABLE_MAGIC = b'JRLT'
+_TABLE_VERSION = 1
+_TABLE_HEADER_SIZE = 64
+
+# hash of the key, balance and last tick of a token bucket, an empty slot
+# has a zero hash
+_SLOT = struct.Struct('<Qdd')
+_SLOT_SIZE = 32
+
+# how long a key that found the table full waits before looking for a slot
+# again (in seconds)
+_FULL_TABLE_RETRY_INTERVAL = 1.0
+
+
+class _Lease(object):
+    """
+    Credits a process took from a bucket of RateLimiterTable, and when the
+    bucket may have credits for it again after it ran out.
+    """
+    __slots__ = ('credits', 'retry_at', 'denied_cost', 'credits_per_second')
+
+    def __init__(self):
+        self.credits = 0.0
+        self.retry_at = 0.0
+        self.denied_cost = 0.0
+        self.credits_per_second = 0.0
+
+
+class RateLimiterTable(object):
+    """
+    Token buckets in a memory-mapped file shared by the processes on a host.
+    A bucket is updated under an fcntl() lock on its slot, and a thread lock,
+    since fcntl() locks do not exclude the threads of a process. Keys are
+    prefixed with the service name, so services can share the file.
+
+    To keep the fcntl() calls off most checks, a process takes up to
+    lease_fraction of the max balance from a bucket at once and spends it
+    locally, and once a bucket runs out it does not look at it again
+    until enough time has passed for it to have the credits.
+
+    Slots are never freed, but the slot of a bucket that has not been used
+    for slot_ttl seconds is taken over by the next key that needs one.
+    The process that used the bucket notices the slot has another key on
+    its next check and looks for another slot.
+
+    N.B. closing any file descriptor of the file releases all fcntl() locks
+    the process holds on it, so use one RateLimiterTable per file and process.
+    """
+
+    def __init__(self, path: str, service_name: str,
+                 slots: int = DEFAULT_RATE_LIMITER_SLOTS,
+                 slot_ttl: float = DEFAULT_RATE_LIMITER_SLOT_TTL,
+                 lease_fraction: float = DEFAULT_RATE_LIMITER_LEASE_FRACTION,
+                 metrics_factory: Optional[MetricsFactory] = None) -> None:
+        """
+        :param path: path of the table file, e.g. on /dev/shm
+        :param service_name: name of this application
+        :param slots: number of buckets in a new table file. An existing
+            table file keeps its number of slots and the buckets in it.
+        :param slot_ttl: how long a bucket may go unused before its slot
+            can be taken by another key (in seconds)
+        :param lease_fraction: fraction of the max balance of a bucket the
+            process takes at once
+        :param metrics_factory: an instance of MetricsFactory class, or None.
+        :raises ValueError: if path exists but is not a table file
+        """
+        if fcntl is None:  # pragma: no cover
+            raise RuntimeError('RateLimiterTable requires fcntl')
+        self.path = path
+        self.service_name = service_name
+        self.slot_ttl = slot_ttl
+        self.lease_fraction = lease_fraction
+        metrics_factory = metrics_factory or MetricsFactory()
+        self._fallbacks = \
+            metrics_factory.create_counter(name='jaeger:rate_limiter_fallbacks')
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                self.slots = self._init_file(slots)
+                self._mmap = mmap.mmap(self._fd, _TABLE_HEADER_SIZE + self.slots * _SLOT_SIZE)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(self._fd)
+            raise
+        self._lock = threading.Lock()
+        # (index, hash) of the slot of each key
+        self._slots: Dict[str, Tuple[int, int]] = {}
+        # when keys that found the table full look for a slot again
+        self._no_slot_until: Dict[str, float] = {}
+        self._leases: Dict[str, _Lease] = {}
+        register_after_fork(self)
+
+    def _init_file(self, slots):
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.ftruncate(self._fd, _TABLE_HEADER_SIZE + slots * _SLOT_SIZE)
+            os.pwrite(self._fd, _TABLE_HEADER.pack(_TABLE_MAGIC, _TABLE_VERSION, slots), 0)
+            return slots
+        if size < _TABLE_HEADER_SIZE:
+            raise ValueError('%s is not a rate limiter table' % self.path)
+        magic, version, slots = _TABLE_HEADER.unpack(os.pread(self._fd, _TABLE_HEADER.size, 0))
+        if magic != _TABLE_MAGIC or version != _TABLE_VERSION or \
+                size != _TABLE_HEADER_SIZE + slots * _SLOT_SIZE:
+            raise ValueError('%s is not a rate limiter table' % self.path)
+        return slots
+
+    def _after_fork_in_child(self):
+        # fcntl() locks are not inherited, but the thread lock may be held.
+        # Credits leased by the parent are the parent's to spend.
+        self._lock = threading.Lock()
+        self._leases = {}
+
+    def _get_slot(self, key, max_balance, now):
+        slot = self._slots.get(key)
+        if slot is None and now >= self._no_slot_until.get(key, 0.0):
+            slot = self._find_slot(key, max_balance, now)
+            if slot is None:
+                self._no_slot_until[key] = now + _FULL_TABLE_RETRY_INTERVAL
+            else:
+                self._slots[key] = slot
+                self._no_slot_until.pop(key, None)
+        return slot
+
+    def _find_slot(self, key, max_balance, now):
+        """
+        Returns (index, hash) of the slot of key, claiming an empty or a
+        stale one if needed, or None if the table is full.
+        """
+        digest = hashlib.blake2b(
+            ('%s\0%s' % (self.service_name, key)).encode('utf-8'), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, 'little') or 1
+        stale_before = now - self.slot_ttl
+        # the header is locked while slots are being claimed
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _TABLE_HEADER_SIZE, 0)
+        try:
+            stale = None
+            for i in range(self.slots):
+                index = (key_hash + i) % self.slots
+                offset = _TABLE_HEADER_SIZE + index * _SLOT_SIZE
+                slot_hash, _, last_tick = _SLOT.unpack_from(self._mmap, offset)
+                if slot_hash == key_hash:
+                    return index, key_hash
+                if slot_hash == 0:
+                    # slots are never emptied, key is not further down
+                    if stale is not None:
+                        break
+                    # a random initial balance, like RateLimiter
+                    _SLOT.pack_into(self._mmap, offset, key_hash,
+                                    max_balance * random.random(), now)
+                    return index, key_hash
+                if stale is None and last_tick < stale_before:
+                    stale = index
+            if stale is None:
+                return None
+            offset = _TABLE_HEADER_SIZE + stale * _SLOT_SIZE
+            # its key may be checked right now by another process
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _SLOT_SIZE, offset)
+            try:
+                _, _, last_tick = _SLOT.unpack_from(self._mmap, offset)
+                if last_tick >= stale_before:
+                    return None
+                _SLOT.pack_into(self._mmap, offset, key_hash,
+                                max_balance * random.random(), now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _SLOT_SIZE, offset)
+            return stale, key_hash
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, _TABLE_HEADER_SIZE, 0)
+
+    def check_credit(self, key: str, item_cost: float, credits_per_second: float,
+                     max_balance: float, now: float) -> Optional[bool]:
+        """
+        Take item_cost from the credits leased from the bucket of key,
+        replenishing the bucket and leasing more from it if needed, see
+        RateLimiter.
+
+        :return: whether the item was purchased, or None if the table is full
+        """
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None:
+                lease = self._leases[key] = _Lease()
+            if lease.credits >= item_cost:
+                lease.credits -= item_cost
+                return True
+            if now < lease.retry_at and item_cost >= lease.denied_cost and \
+                    credits_per_second == lease.credits_per_second:
+                # the bucket cannot have the credits yet
+                return False
+            while True:
+                slot = self._get_slot(key, max_balance, now)
+                if slot is None:
+                    self._fallbacks(1)
+                    return None
+                index, key_hash = slot
+                offset = _TABLE_HEADER_SIZE + index * _SLOT_SIZE
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, _SLOT_SIZE, offset)
+                try:
+                    slot_hash, balance, last_tick = _SLOT.unpack_from(self._mmap, offset)
+                    if slot_hash != key_hash:
+                        # taken over by another key while it was stale
+                        del self._slots[key]
+                        continue
+                    # another process may have ticked after now was taken
+                    balance += max(0.0, now - last_tick) * credits_per_second
+                    balance = min(balance, max_balance)
+                    needed = item_cost - lease.credits
+                    allowed = balance >= needed
+                    if allowed:
+                        taken = min(balance, max(needed, max_balance * self.lease_fraction))
+                        balance -= taken
+                        lease.credits += taken - item_cost
+                    _SLOT.pack_into(self._mmap, offset, key_hash, balance, max(now, last_tick))
+                finally:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, _SLOT_SIZE, offset)
+                if not allowed:
+                    lease.denied_cost = item_cost
+                    lease.credits_per_second = credits_per_second
+                    if credits_per_second > 0:
+                        lease.retry_at = now + (needed - balance) / credits_per_second
+                    else:
+                        lease.retry_at = now + _FULL_TABLE_RETRY_INTERVAL
+                return allowed
+
+    def close(self) -> None:
+        with self._lock:
+            self._mmap.close()
+            os.close(self._fd)
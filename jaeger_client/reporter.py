@@ -13,27 +13,50 @@
 # limitations under the License.
 
 
+import collections
+import concurrent.futures
 import logging
+import os
 import threading
-from typing import List, Dict, Optional, Any
+import time
+from typing import Callable, Deque, List, Dict, Optional, Any, Union
 
 import tornado.gen
 import tornado.ioloop
-import tornado.queues
+import tornado.locks
 import socket
 from tornado.concurrent import Future
-from .constants import DEFAULT_FLUSH_INTERVAL
+from .constants import (
+    DEFAULT_FLUSH_INTERVAL,
+    DEFAULT_MAX_PACKET_SIZE,
+    DEFAULT_QUEUE_BLOCK_TIMEOUT,
+    DEFAULT_QUEUE_SAMPLE_DOWN_RATE,
+    DEFAULT_SPOOL_MAX_BYTES,
+    QUEUE_FULL_BLOCK,
+    QUEUE_FULL_DROP_NEWEST,
+    QUEUE_FULL_DROP_OLDEST,
+    QUEUE_FULL_SAMPLE_DOWN,
+    QUEUE_HIGH_WATER_MARK,
+    SPOOL_SEND_FAILURE_THRESHOLD,
+)
 from . import thrift
+from . import thrift_compact
 from . import ioloop_util
 from .metrics import Metrics, LegacyMetricsFactory, MetricsFactory
-from .utils import ErrorReporter
+from .utils import ErrorReporter, register_after_fork
 from .span import Span
+from .spool import SpanSpool, process_spool_dir
 
 from thrift.protocol import TCompactProtocol
 from jaeger_client.thrift_gen.agent import Agent
+import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
 
 default_logger = logging.getLogger('jaeger_tracing')
 
+# close() of reporters that run on a tornado IOLoop returns a tornado
+# Future, the others complete a concurrent.futures.Future from a thread
+ReporterFuture = Union[Future, concurrent.futures.Future]
+
 
 class BaseReporter(object):
     """Abstract class."""
@@ -43,7 +66,7 @@ class BaseReporter(object):
     def set_process(self, service_name: str, tags: Any, max_length: int) -> None:
         pass
 
-    def close(self) -> Future:
+    def close(self) -> ReporterFuture:
         fut: Future = Future()
         fut.set_result(True)
         return fut
@@ -80,111 +103,634 @@ class LoggingReporter(BaseReporter):
         self.logger.info('Reporting span %s', span)
 
 
-class Reporter(BaseReporter):
-    """Receives completed spans from Tracer and submits them out of process."""
+class SpanBatcher(object):
+    """
+    Mixin for reporters that encode spans and send them to jaeger-agent in
+    emitBatch messages. Expects metrics, error_reporter, logger and
+    max_packet_size attributes.
+    """
+    metrics: 'ReporterMetrics'
+    error_reporter: ErrorReporter
+    logger: logging.Logger
+    max_packet_size: Optional[int]
+
+    def _log_encoder(self):
+        if thrift_compact.ACCELERATED:
+            self.logger.info('Jaeger reporter encodes spans with thrift fastbinary')
+        else:
+            self.logger.info('Jaeger reporter encodes spans in pure Python, '
+                             'thrift fastbinary extension is not available')
+
+    def _encode(self, span):
+        return thrift.encode_span(span)
+
+    def _encode_spans(self, spans):
+        """
+        Returns _encode(span) for each of spans. Spans that cannot be
+        encoded are accounted as failed and left out.
+        """
+        encoded = []
+        for span in spans:
+            try:
+                encoded.append(self._encode(span))
+            except Exception as e:
+                self.metrics.reporter_failure(1)
+                self.error_reporter.error('Failed to encode span: %s', e)
+        return encoded
+
+    def _split_batch(self, encoded, frame):
+        """
+        Split spans encoded with _encode() into groups that fit into an
+        emitBatch message of at most max_packet_size bytes. Spans too large
+        to be sent at all are dropped.
+
+        :return: list of groups of encoded spans
+        """
+        if not self.max_packet_size:
+            return [encoded]
+        groups, oversized = thrift.split_by_size(
+            items=encoded,
+            sizes=[len(data) for data in encoded],
+            max_size=self.max_packet_size - thrift.emit_batch_overhead(frame),
+        )
+        if oversized:
+            self._drop_too_large(len(oversized))
+        return groups
+
+    def _drop(self, reason_counter):
+        self.metrics.reporter_dropped(1)
+        reason_counter(1)
+
+    def _drop_too_large(self, count):
+        self.metrics.reporter_dropped(count)
+        self.metrics.reporter_dropped_too_large(count)
+        self.error_reporter.error(
+            'Dropped %d spans larger than max packet size %d bytes',
+            count, self.max_packet_size)
+
+    def _send_failed(self, count, e):
+        self.metrics.reporter_failure(count)
+        if isinstance(e, socket.error):
+            self.error_reporter.error(
+                'Failed to submit traces to jaeger-agent socket: %s', e)
+        else:
+            self.error_reporter.error(
+                'Failed to submit traces to jaeger-agent: %s', e)
+
+    def _send_many(self, write_many, messages, on_failure=None):
+        """
+        Send (span count, message) pairs through write_many(), which returns
+        how many messages it has sent. A message that cannot be sent at all
+        is passed to on_failure(span count, exception), _send_failed() by
+        default, and the rest are retried after it.
+
+        :return: a list of whether each of messages was sent
+        """
+        on_failure = on_failure or self._send_failed
+        results: List[bool] = []
+        while messages:
+            try:
+                sent = write_many([message for _, message in messages])
+            except Exception as e:
+                on_failure(messages[0][0], e)
+                sent = 1
+                results.append(False)
+            else:
+                self.metrics.reporter_success(sum(count for count, _ in messages[:sent]))
+                results.extend([True] * sent)
+            messages = messages[sent:]
+        return results
+
+
+class BufferedReporter(SpanBatcher, BaseReporter):
+    """
+    Base class of reporters that hold completed spans in memory and submit
+    them in batches from a consumer, which subclasses run on a tornado
+    IOLoop or on a thread of their own.
+
+    Spans are handed off to the consumer through a deque, which application
+    threads append to without any locks or syscalls. The consumer is woken
+    up at most once per batch_size spans, or by the flush_interval timeout.
+    With queue_max_bytes or a queue_full_policy other than drop_newest, the
+    deque is only accessed under _queue_lock, and with queue_max_bytes it
+    holds (span, estimated size) pairs.
+    """
     def __init__(
         self,
-        channel: Any,
         queue_capacity: int = 100,
         batch_size: int = 10,
         flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
-        io_loop: Any = None,
         error_reporter: Optional[ErrorReporter] = None,
-        metrics: Optional[Metrics] = None,
         metrics_factory: Optional[MetricsFactory] = None,
+        max_packet_size: Optional[int] = DEFAULT_MAX_PACKET_SIZE,
+        queue_max_bytes: Optional[int] = None,
+        queue_full_policy: str = QUEUE_FULL_DROP_NEWEST,
+        queue_block_timeout: float = DEFAULT_QUEUE_BLOCK_TIMEOUT,
+        queue_sample_down_rate: int = DEFAULT_QUEUE_SAMPLE_DOWN_RATE,
+        priority_queue_capacity: int = 0,
+        priority_span_predicate: Optional[Callable[[Span], bool]] = None,
         **kwargs: Any
     ) -> None:
         """
-        :param channel: a communication channel to jaeger-agent
         :param queue_capacity: how many spans we can hold in memory before
             starting to drop spans
         :param batch_size: how many spans we can submit at once to Collector
         :param flush_interval: how often the auto-flush is called (in seconds)
-        :param io_loop: which IOLoop to use. If None, try to get it from
-            channel (only works if channel is tchannel.sync)
         :param error_reporter:
-        :param metrics: an instance of Metrics class, or None. This parameter
-            has been deprecated, please use metrics_factory instead.
         :param metrics_factory: an instance of MetricsFactory class, or None.
+        :param max_packet_size: max size of a UDP packet sent to jaeger-agent,
+            larger batches are split, and spans that do not fit into a packet
+            on their own are dropped. None disables the check.
+        :param queue_max_bytes: if set, the queue is bounded by the estimated
+            serialized size of the spans in it instead of queue_capacity, and
+            spans are dropped only when they would exceed this many bytes
+        :param queue_full_policy: what to do with a span when the queue is
+            full, one of the QUEUE_FULL_* constants
+        :param queue_block_timeout: how long the 'block' policy waits for
+            room in the queue (in seconds)
+        :param queue_sample_down_rate: the 'sample_down' policy keeps only
+            one of every queue_sample_down_rate spans once the queue is
+            above its high-water mark
+        :param priority_queue_capacity: if set, up to this many priority
+            spans are held in a separate queue, which is not affected by the
+            regular queue being full and is submitted first. Priority spans
+            are spans with the debug flag or the error tag set, and those
+            priority_span_predicate returns true for.
+        :param priority_span_predicate: a function that takes a finished
+            Span and returns whether it is a priority span
         :param kwargs:
             'logger'
-        :return:
         """
-        from threading import Lock
+        if queue_capacity < batch_size:
+            raise ValueError('Queue capacity cannot be less than batch size')
+        if queue_full_policy not in _QUEUE_FULL_POLICIES:
+            raise ValueError('Unknown queue full policy: %s' % queue_full_policy)
 
-        self._channel = channel
         self.queue_capacity = queue_capacity
+        self.queue_max_bytes = queue_max_bytes
+        self.queue_bytes = 0
+        self.queue_full_policy = queue_full_policy
+        self.queue_block_timeout = queue_block_timeout
+        self.queue_sample_down_rate = queue_sample_down_rate
+        self._queue_lock = threading.Lock()
+        self._queue_not_full = threading.Condition(self._queue_lock)
+        self._sample_down_count = 0
+        self.priority_queue_capacity = priority_queue_capacity
+        self.priority_span_predicate = priority_span_predicate
         self.batch_size = batch_size
-        self.metrics_factory = metrics_factory or LegacyMetricsFactory(metrics or Metrics())
+        self.max_packet_size = max_packet_size
+        self.flush_interval = flush_interval or None
+        self.metrics_factory = metrics_factory or MetricsFactory()
         self.metrics = ReporterMetrics(self.metrics_factory)
         self.error_reporter = error_reporter or ErrorReporter(Metrics())
         self.logger = kwargs.get('logger', default_logger)
-        self.agent = Agent.Client(self._channel, self)
+        self._log_encoder()
 
-        if queue_capacity < batch_size:
-            raise ValueError('Queue capacity cannot be less than batch size')
+        self.queue: Deque[Any] = collections.deque()
+        self.priority_queue: Deque[Span] = collections.deque()
+        self.stopped = False
+        # set once the consumer has exited, see _drop_unsent()
+        self._consumer_stopped = False
+        self._wakeup_pending = False
 
-        self.io_loop = io_loop or channel.io_loop
-        if self.io_loop is None:
-            self.logger.error('Jaeger Reporter has no IOLoop')
-        else:
-            self.queue: tornado.queues.Queue = tornado.queues.Queue(maxsize=queue_capacity)
-            self.stop = object()
-            self.stopped = False
-            self.stop_lock = Lock()
-            self.flush_interval = flush_interval or None
-            self.io_loop.spawn_callback(self._consume_queue)
-
-        self._process_lock = Lock()
+        self._process_lock = threading.Lock()
         self._process = None
+        self._frame: Optional[thrift.EmitBatchFrame] = None
+        self._seqid = 0
+        self._pid = os.getpid()
+        self._restart_lock = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork_in_child(self):
+        # Locks may have been held by threads that do not exist in the
+        # child, and spans queued before the fork are sent by the parent.
+        # The consumer is restarted by _restart_after_fork().
+        self._queue_lock = threading.Lock()
+        self._queue_not_full = threading.Condition(self._queue_lock)
+        self._process_lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self.queue = collections.deque()
+        self.priority_queue = collections.deque()
+        self.queue_bytes = 0
+        self._wakeup_pending = False
+
+    def _restart_after_fork(self):
+        # called on the first use of the reporter in a forked child
+        with self._restart_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._restart_consumer()
+
+    def _start_consumer(self):
+        raise NotImplementedError()
+
+    def _restart_consumer(self):
+        raise NotImplementedError()
+
+    def _wake_consumer(self):
+        raise NotImplementedError()
+
+    def _in_consumer_thread(self) -> bool:
+        raise NotImplementedError()
+
+    def _stop_consumer(self) -> ReporterFuture:
+        """
+        Returns a Future that is completed once the consumer has submitted
+        the spans left in the queue and exited.
+        """
+        raise NotImplementedError()
 
     def set_process(self, service_name: str, tags: Dict, max_length: int) -> None:
+        process = thrift.make_process(
+            service_name=service_name, tags=tags, max_length=max_length,
+        )
+        # the Process is the same in every batch, encode it only once
+        frame = thrift.make_emit_batch_frame(process)
         with self._process_lock:
-            self._process = thrift.make_process(
-                service_name=service_name, tags=tags, max_length=max_length,
-            )
+            self._process = process
+            self._frame = frame
 
     def report_span(self, span: Span) -> None:
-        self.io_loop.add_callback(self._report_span_from_ioloop, span)
-
-    def _report_span_from_ioloop(self, span):
-        try:
-            with self.stop_lock:
-                stopped = self.stopped
-            if stopped:
+        if self._pid != os.getpid():
+            self._restart_after_fork()
+        queue = self.queue
+        if self.priority_queue_capacity and self._enqueue_priority(span):
+            queue = self.priority_queue
+        elif self._queue_is_locked():
+            if not self._enqueue(span):
+                return
+        else:
+            # N.B. with concurrent producers the capacity check is approximate
+            if self.stopped:
                 self.metrics.reporter_dropped(1)
+                return
+            if len(queue) >= self.queue_capacity:
+                self._drop(self.metrics.reporter_dropped_queue_full)
+                return
+            queue.append(span)
+        if self._consumer_stopped:
+            # close() was called after the stopped check above, and the
+            # consumer may have exited without seeing span
+            self._drop_unsent()
+            return
+        if (len(queue) >= self.batch_size or self._needs_drain()) and \
+                not self._wakeup_pending:
+            self._wakeup_pending = True
+            self._wake_consumer()
+
+    def close(self) -> ReporterFuture:
+        """
+        Ensure that all spans from the queue are submitted.
+        Returns Future that will be completed once the queue is empty.
+        """
+        if self._pid != os.getpid():
+            self._restart_after_fork()
+        return self._stop_consumer()
+
+    def _stop(self):
+        # once stopped, report_span() drops new spans and the consumer
+        # submits everything left in the queue before exiting
+        self.stopped = True
+        with self._queue_lock:
+            self._queue_not_full.notify_all()
+
+    def _finish_consuming(self):
+        # the consumer cannot see spans appended after its last drain
+        self._consumer_stopped = True
+        self._drop_unsent()
+
+    def _drop_unsent(self):
+        """
+        Drop and count the spans left in the queues once the consumer has
+        exited, which report_span() appended after its last drain.
+        """
+        count = 0
+        with self._queue_lock:
+            for queue in (self.queue, self.priority_queue):
+                while True:
+                    try:
+                        queue.popleft()
+                    except IndexError:
+                        break
+                    count += 1
+            self.queue_bytes = 0
+        if count:
+            self.metrics.reporter_dropped(count)
+
+    def _is_idle(self):
+        """Whether the consumer has to wait for more spans."""
+        return len(self.queue) < self.batch_size and not self.stopped and \
+            len(self.priority_queue) < self.batch_size and not self._needs_drain()
+
+    def _clear_wakeup(self):
+        # reset the wakeup before draining the queue, so that spans
+        # appended while the consumer is draining schedule another wakeup
+        self._wakeup.clear()
+        self._wakeup_pending = False
+
+    def _take_batches(self, flush, stopped):
+        """
+        Take all priority spans, full batches, and the remainder on flush
+        or stop off the queues.
+
+        :return: a list of batches of priority spans and a list of batches
+            of other spans, each encoded with _encode()
+        """
+        priority = self._dequeue_priority()
+        batches = []
+        while len(self.queue) >= self.batch_size or \
+                (self.queue and (flush or stopped or self._needs_drain())):
+            batches.append(self._dequeue(min(self.batch_size, len(self.queue))))
+        return priority, batches
+
+    def _report_queue_metrics(self):
+        self.metrics.reporter_queue_length(len(self.queue))
+        if self.queue_max_bytes:
+            self.metrics.reporter_queue_bytes(self.queue_bytes)
+
+    def _make_messages(self, frame, groups):
+        """Returns (span count, emitBatch message) for each of groups."""
+        messages = []
+        for group in groups:
+            self._seqid += 1
+            messages.append((len(group), thrift.make_emit_batch_message_from_spans(
+                frame, group, self._seqid)))
+        return messages
+
+    def _queue_is_locked(self):
+        """
+        The default drop_newest policy appends to queue without any locks,
+        the others need _queue_lock to keep the size accounting right.
+        """
+        return self.queue_max_bytes or self.queue_full_policy != QUEUE_FULL_DROP_NEWEST
+
+    def _is_full(self, size):
+        if self.queue_max_bytes:
+            return self.queue_bytes + size > self.queue_max_bytes
+        return len(self.queue) >= self.queue_capacity
+
+    def _above_high_water_mark(self):
+        if self.queue_max_bytes:
+            return self.queue_bytes >= self.queue_max_bytes * QUEUE_HIGH_WATER_MARK
+        return len(self.queue) >= self.queue_capacity * QUEUE_HIGH_WATER_MARK
+
+    def _needs_drain(self):
+        """
+        Whether a byte-bounded queue is filling up with fewer than batch_size
+        large spans, and should be drained without waiting for a full batch.
+        """
+        return bool(self.queue_max_bytes) and self.queue_bytes * 2 >= self.queue_max_bytes
+
+    def _enqueue(self, span):
+        """
+        Append span to queue, along with its estimated size if the queue is
+        bounded by queue_max_bytes, applying queue_full_policy when there is
+        no room for it.
+
+        :return: whether span was queued
+        """
+        metrics = self.metrics
+        policy = self.queue_full_policy
+        size = 0
+        if self.queue_max_bytes:
+            size = thrift.estimate_span_size(span)
+            if size > self.queue_max_bytes:
+                # would not fit even into an empty queue
+                self._drop(metrics.reporter_dropped_queue_full)
+                return False
+        deadline = None
+        with self._queue_lock:
+            if policy == QUEUE_FULL_SAMPLE_DOWN and self._above_high_water_mark():
+                self._sample_down_count += 1
+                if self._sample_down_count % self.queue_sample_down_rate:
+                    self._drop(metrics.reporter_dropped_sampled_down)
+                    return False
+            while not self.stopped and self._is_full(size):
+                if policy == QUEUE_FULL_DROP_OLDEST:
+                    evicted = self.queue.popleft()
+                    if self.queue_max_bytes:
+                        self.queue_bytes -= evicted[1]
+                    self._drop(metrics.reporter_dropped_evicted)
+                    continue
+                # the consumer must not wait for itself, e.g. when spans are
+                # reported from the IOLoop thread of Reporter
+                if policy == QUEUE_FULL_BLOCK and not self._in_consumer_thread():
+                    if deadline is None:
+                        deadline = time.monotonic() + self.queue_block_timeout
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        self._queue_not_full.wait(remaining)
+                        continue
+                    self._drop(metrics.reporter_dropped_block_timeout)
+                    return False
+                self._drop(metrics.reporter_dropped_queue_full)
+                return False
+            if self.stopped:
+                metrics.reporter_dropped(1)
+                return False
+            if self.queue_max_bytes:
+                self.queue_bytes += size
+                self.queue.append((span, size))
             else:
-                self.queue.put_nowait(span)
-        except tornado.queues.QueueFull:
-            self.metrics.reporter_dropped(1)
+                self.queue.append(span)
+        return True
+
+    def _is_priority_span(self, span):
+        if span.is_debug() or span.is_error():
+            return True
+        predicate = self.priority_span_predicate
+        return predicate is not None and predicate(span)
+
+    def _enqueue_priority(self, span):
+        """
+        Append span to priority_queue if it is a priority span, and the
+        priority queue has room for it.
+
+        :return: whether span was queued
+        """
+        queue = self.priority_queue
+        # N.B. with concurrent producers the capacity check is approximate
+        if self.stopped or len(queue) >= self.priority_queue_capacity or \
+                not self._is_priority_span(span):
+            return False
+        queue.append(span)
+        return True
+
+    def _dequeue_priority(self):
+        """
+        Pop all spans off priority_queue, and encode them in batches of at
+        most batch_size spans.
+        """
+        queue = self.priority_queue
+        ready = []
+        while queue:
+            count = min(self.batch_size, len(queue))
+            ready.append(self._encode_spans(queue.popleft() for _ in range(count)))
+        return ready
+
+    def _dequeue(self, count):
+        """
+        Pop up to count spans off queue and encode each one as soon as it is
+        popped, so that only the encoded form is kept until it is sent.
+        """
+        queue = self.queue
+        if not self._queue_is_locked():
+            return self._encode_spans(queue.popleft() for _ in range(count))
+        with self._queue_lock:
+            # the drop_oldest policy may have evicted spans in the meantime
+            items = [queue.popleft() for _ in range(min(count, len(queue)))]
+            if self.queue_max_bytes:
+                self.queue_bytes -= sum(size for _, size in items)
+                items = [span for span, _ in items]
+            if self.queue_full_policy == QUEUE_FULL_BLOCK:
+                self._queue_not_full.notify_all()
+        return self._encode_spans(items)
+
+
+class Reporter(BufferedReporter):
+    """
+    Receives completed spans from Tracer and submits them out of process,
+    from a tornado IOLoop.
+    """
+    def __init__(
+        self,
+        channel: Any,
+        queue_capacity: int = 100,
+        batch_size: int = 10,
+        flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
+        io_loop: Any = None,
+        error_reporter: Optional[ErrorReporter] = None,
+        metrics: Optional[Metrics] = None,
+        metrics_factory: Optional[MetricsFactory] = None,
+        spool_dir: Optional[str] = None,
+        spool_max_bytes: int = DEFAULT_SPOOL_MAX_BYTES,
+        **kwargs: Any
+    ) -> None:
+        """
+        :param channel: a communication channel to jaeger-agent
+        :param io_loop: which IOLoop to use. If None, try to get it from
+            channel (only works if channel is tchannel.sync)
+        :param metrics: an instance of Metrics class, or None. This parameter
+            has been deprecated, please use metrics_factory instead.
+        :param spool_dir: if set, batches are written to a spool of files
+            in this directory instead of being sent while the queue is
+            above its high-water mark or sends keep failing, and are sent
+            from there once the agent catches up
+        :param spool_max_bytes: max size of the spool, the oldest spans in
+            it are dropped when it is full
+        :param kwargs: 'logger', and the other BufferedReporter parameters,
+            which also describes the parameters above without a description
+        """
+        super(Reporter, self).__init__(
+            queue_capacity=queue_capacity,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            error_reporter=error_reporter,
+            metrics_factory=metrics_factory or LegacyMetricsFactory(metrics or Metrics()),
+            **kwargs)
+        self._channel = channel
+        self.agent = Agent.Client(self._channel, self)
+        self._spool_dir = spool_dir
+        self.spool = SpanSpool(spool_dir, spool_max_bytes, shared_dir=spool_dir) \
+            if spool_dir else None
+        # number of batches that failed to send since the last success
+        self._send_failures = 0
+
+        self._io_loop_from_channel = io_loop is None
+        self.io_loop = io_loop or channel.io_loop
+        if self.io_loop is None:
+            self.logger.error('Jaeger Reporter has no IOLoop')
+        else:
+            self._start_consumer()
+
+    def _after_fork_in_child(self):
+        super(Reporter, self)._after_fork_in_child()
+        self._send_failures = 0
+
+    def _start_consumer(self):
+        self._wakeup = tornado.locks.Event()
+        self._consumer_exited = tornado.locks.Event()
+        self.io_loop.spawn_callback(self._consume_queue)
+
+    def _restart_consumer(self):
+        if self.spool is not None:
+            # segments cannot be shared with the parent, the spool of this
+            # process is taken over by another one once it has exited
+            self.spool = SpanSpool(
+                process_spool_dir(self._spool_dir, self._pid),
+                self.spool.max_bytes, shared_dir=self._spool_dir)
+        if self.io_loop is None or not self._io_loop_from_channel:
+            # the consumer is still scheduled on an IOLoop that the
+            # application passed in, which must be started in the child
+            return
+        # starts the IOLoop thread of the channel in the child
+        io_loop = self._channel.io_loop
+        if io_loop is self.io_loop:
+            return
+        self.io_loop = io_loop
+        if not self.stopped:
+            self._start_consumer()
+
+    def _wake_consumer(self):
+        self.io_loop.add_callback(self._wakeup.set)
+
+    def _in_consumer_thread(self) -> bool:
+        return tornado.ioloop.IOLoop.current(instance=False) is self.io_loop
+
+    def _stop_consumer(self) -> ReporterFuture:
+        return ioloop_util.submit(self._flush, io_loop=self.io_loop)
+
+    @tornado.gen.coroutine
+    def _flush(self):
+        self._stop()
+        self._wakeup.set()
+        yield self._consumer_exited.wait()
 
     @tornado.gen.coroutine
     def _consume_queue(self):
-        spans = []
         stopped = False
         while not stopped:
-            while len(spans) < self.batch_size:
-                try:
-                    # using timeout allows periodic flush with smaller packet
-                    timeout = self.flush_interval + self.io_loop.time() \
-                        if self.flush_interval and spans else None
-                    span = yield self.queue.get(timeout=timeout)
-                except tornado.gen.TimeoutError:
-                    break
+            flush = False
+            if self._is_idle():
+                if self._can_unspool():
+                    # let other callbacks run between reads from the spool
+                    yield tornado.gen.moment
                 else:
-                    if span == self.stop:
-                        stopped = True
-                        self.queue.task_done()
-                        # don't return yet, submit accumulated spans first
-                        break
-                    else:
-                        spans.append(span)
-            if spans:
-                yield self._submit(spans)
-                for _ in spans:
-                    self.queue.task_done()
-                spans = spans[:0]
-            self.metrics.reporter_queue_length(self.queue.qsize())
+                    try:
+                        # using timeout allows periodic flush with smaller packet
+                        timeout = self.flush_interval + self.io_loop.time() \
+                            if self.flush_interval else None
+                        yield self._wakeup.wait(timeout=timeout)
+                    except tornado.gen.TimeoutError:
+                        flush = True
+            self._clear_wakeup()
+            stopped = self.stopped
+            spill = self.spool is not None and \
+                (self._agent_down() or self._above_high_water_mark())
+            ready, batches = self._take_batches(flush, stopped)
+            if spill:
+                self._spool(batches)
+            else:
+                ready.extend(batches)
+            if self._can_unspool():
+                if not stopped:
+                    ready.extend(self._unspool(self.queue_capacity))
+            elif flush and self.spool is not None and self._agent_down():
+                # probe whether the agent is back with a single batch
+                ready.extend(self._unspool(self.batch_size))
+            if ready:
+                yield self._submit_all(ready)
+            if self.spool is not None:
+                # spans read from the spool have been sent, or spooled
+                # again if sending them failed
+                self.spool.commit()
+            self._report_queue_metrics()
+        self._finish_consuming()
+        if self.spool is not None:
+            # spans left in the spool are sent by the next reporter using it
+            self.spool.close()
+        self._consumer_exited.set()
         self.logger.info('Span publisher exited')
 
     # method for protocol factory
@@ -192,53 +738,236 @@ class Reporter(BaseReporter):
         """
         Implements Thrift ProtocolFactory interface
         :param: transport:
-        :return: Thrift compact protocol
+        :return: Thrift compact protocol, C-accelerated if available
         """
-        return TCompactProtocol.TCompactProtocol(transport)
+        return TCompactProtocol.TCompactProtocolAccelerated(transport)
 
-    @tornado.gen.coroutine
     def _submit(self, spans):
-        if not spans:
-            return
+        return self._submit_all([self._encode_spans(spans)])
+
+    @tornado.gen.coroutine
+    def _submit_all(self, encoded_lists):
+        """
+        Submit each of encoded_lists, lists of spans encoded with _encode(),
+        as one or more batches. When the channel supports write_many(), e.g.
+        LocalAgentSender, a backlog of several batches is sent with a single
+        call instead of one flush() per batch. Batches that fail are spooled
+        if the reporter has a spool.
+        """
         with self._process_lock:
-            process = self._process
-            if not process:
+            frame = self._frame
+            if not frame:
                 return
+        groups = []
+        for encoded in encoded_lists:
+            if encoded:
+                groups.extend(self._split_batch(encoded, frame))
+        if len(groups) > 1 and hasattr(type(self._channel), 'write_many'):
+            on_failure = self._send_failed if self.spool is None else self._send_failed_spooling
+            sent = self._send_many(
+                self._channel.write_many, self._make_messages(frame, groups), on_failure)
+            failed = []
+            for group, ok in zip(groups, sent):
+                if ok:
+                    self._send_failures = 0
+                else:
+                    self._send_failures += 1
+                    failed.append(group)
+            if failed and self.spool is not None:
+                self._spool(failed)
+            return
+        for group in groups:
+            try:
+                yield self._send(group)
+                self.metrics.reporter_success(len(group))
+                self._send_failures = 0
+            except Exception as e:
+                self._send_failures += 1
+                if self.spool is None:
+                    self._send_failed(len(group), e)
+                    continue
+                self._send_failed_spooling(len(group), e)
+                self._spool([group])
+
+    @tornado.gen.coroutine
+    def _send(self, serialized_spans):
+        """
+        Send spans serialized with thrift.serialize_span() out via thrift
+        transport, in one emitBatch message. Any exceptions thrown will be
+        caught above in the exception handler of _submit_all().
+        """
+        self._seqid += 1
+        self._channel.write(thrift.make_emit_batch_message_from_spans(
+            self._frame, serialized_spans, self._seqid))
+        self._channel.flush()
+
+    def _send_failed_spooling(self, count, e):
+        # the spans are accounted for once they are in the spool
+        self.error_reporter.error(
+            'Failed to submit traces to jaeger-agent, spooling them: %s', e)
+
+    def _agent_down(self):
+        return self._send_failures >= SPOOL_SEND_FAILURE_THRESHOLD
+
+    def _can_unspool(self):
+        return self.spool is not None and len(self.spool) > 0 and \
+            not self._agent_down() and not self._above_high_water_mark()
+
+    def _spool(self, encoded_lists):
+        """
+        Append lists of spans encoded with _encode() to the spool instead of
+        sending them.
+        """
+        spans = [data for encoded in encoded_lists for data in encoded]
+        if not spans:
+            return
         try:
-            batch = thrift.make_jaeger_batch(spans=spans, process=process)
-            yield self._send(batch)
-            self.metrics.reporter_success(len(spans))
-        except socket.error as e:
-            self.metrics.reporter_failure(len(spans))
-            self.error_reporter.error(
-                'Failed to submit traces to jaeger-agent socket: %s', e)
+            deleted = self.spool.append(spans)
         except Exception as e:
             self.metrics.reporter_failure(len(spans))
-            self.error_reporter.error(
-                'Failed to submit traces to jaeger-agent: %s', e)
+            self.error_reporter.error('Failed to write spans to spool: %s', e)
+            return
+        self.metrics.reporter_spooled(len(spans))
+        if deleted:
+            self.metrics.reporter_dropped(deleted)
+            self.metrics.reporter_dropped_spool_full(deleted)
+        self.metrics.reporter_spool_bytes(self.spool.size)
 
-    @tornado.gen.coroutine
-    def _send(self, batch):
+    def _unspool(self, count):
         """
-        Send batch of spans out via thrift transport. Any exceptions thrown
-        will be caught above in the exception handler of _submit().
+        Read up to count spans from the spool, in lists of at most
+        batch_size spans encoded like _encode() does. The spool holds the
+        encoded spans, so they are sent as they are read.
         """
-        return self.agent.emitBatch(batch)
+        try:
+            spans = self.spool.read(count)
+        except Exception as e:
+            self.error_reporter.error('Failed to read spans from spool: %s', e)
+            return []
+        self.metrics.reporter_spool_bytes(self.spool.size)
+        return [spans[i:i + self.batch_size]
+                for i in range(0, len(spans), self.batch_size)]
 
-    def close(self) -> Future:
+
+class ThreadedReporter(BufferedReporter):
+    """
+    Receives completed spans from Tracer and submits them to jaeger-agent
+    from a dedicated thread. Unlike Reporter, it does not need a tornado
+    IOLoop, and writes batches directly to a UDP transport.
+    """
+    def __init__(
+        self,
+        transport: Any = None,
+        sender: Any = None,
+        **kwargs: Any
+    ) -> None:
         """
-        Ensure that all spans from the queue are submitted.
-        Returns Future that will be completed once the queue is empty.
+        :param transport: a TUDPTransport connected to jaeger-agent,
+            each batch is sent with a single write() call
+        :param sender: alternative to transport, an object with a
+            send(batch) method that receives ttypes.Batch objects,
+            e.g. HttpCollectorSender. max_packet_size does not apply.
+        :param kwargs: 'logger', and the other BufferedReporter parameters
         """
-        return ioloop_util.submit(self._flush, io_loop=self.io_loop)
+        if (transport is None) == (sender is None):
+            raise ValueError('Exactly one of transport or sender is required')
+        super(ThreadedReporter, self).__init__(**kwargs)
+        self.transport = transport
+        self.sender = sender
+        self._closed: concurrent.futures.Future = concurrent.futures.Future()
+        self._start_consumer()
 
-    @tornado.gen.coroutine
-    def _flush(self):
-        # stopping here ensures we don't lose spans from pending _report_span_from_ioloop callbacks
-        with self.stop_lock:
-            self.stopped = True
-        yield self.queue.put(self.stop)
-        yield self.queue.join()
+    def _after_fork_in_child(self):
+        super(ThreadedReporter, self)._after_fork_in_child()
+        self._wakeup = threading.Event()
+        self._closed = concurrent.futures.Future()
+        if self.stopped:
+            self._closed.set_result(True)
+
+    def _start_consumer(self):
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(
+            target=self._consume_queue, name='jaeger-reporter', daemon=True)
+        self._thread.start()
+
+    def _restart_consumer(self):
+        if not self.stopped:
+            self._start_consumer()
+
+    def _wake_consumer(self):
+        self._wakeup.set()
+
+    def _in_consumer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def _stop_consumer(self) -> ReporterFuture:
+        self._stop()
+        self._wakeup.set()
+        return self._closed
+
+    def _consume_queue(self):
+        stopped = False
+        while not stopped:
+            flush = False
+            if self._is_idle():
+                flush = not self._wakeup.wait(self.flush_interval)
+            self._clear_wakeup()
+            stopped = self.stopped
+            ready, batches = self._take_batches(flush, stopped)
+            ready.extend(batches)
+            if ready:
+                self._submit_all(ready)
+            self._report_queue_metrics()
+        self._finish_consuming()
+        self.logger.info('Span publisher exited')
+        self._closed.set_result(True)
+
+    def _encode(self, span):
+        if self.sender is not None:
+            return thrift.make_jaeger_span(span)
+        return thrift.encode_span(span)
+
+    def _submit_all(self, encoded_lists):
+        """
+        Submit each of encoded_lists, lists of spans encoded with _encode(),
+        as one or more emitBatch messages. When the transport supports
+        write_many(), all messages of a backlog are sent with a single call,
+        i.e. one sendmmsg() system call on Linux.
+        """
+        with self._process_lock:
+            frame = self._frame
+            if not frame:
+                return
+        groups = []
+        for encoded in encoded_lists:
+            if not encoded:
+                continue
+            if self.sender is not None:
+                batch = ttypes.Batch(process=frame.process, spans=encoded)
+                self._send(len(encoded), self.sender.send, batch)
+                continue
+            groups.extend(self._split_batch(encoded, frame))
+        messages = self._make_messages(frame, groups)
+        if len(messages) > 1 and hasattr(type(self.transport), 'write_many'):
+            self._send_many(self.transport.write_many, messages)
+            return
+        for count, message in messages:
+            self._send(count, self.transport.write, message)
+
+    def _send(self, count, send, payload):
+        try:
+            send(payload)
+            self.metrics.reporter_success(count)
+        except Exception as e:
+            self._send_failed(count, e)
+
+
+_QUEUE_FULL_POLICIES = (
+    QUEUE_FULL_DROP_NEWEST,
+    QUEUE_FULL_DROP_OLDEST,
+    QUEUE_FULL_BLOCK,
+    QUEUE_FULL_SAMPLE_DOWN,
+)
 
 
 class ReporterMetrics(object):
@@ -251,8 +980,32 @@ class ReporterMetrics(object):
             metrics_factory.create_counter(name='jaeger:reporter_spans', tags={'result': 'err'})
         self.reporter_dropped = \
             metrics_factory.create_counter(name='jaeger:reporter_spans', tags={'result': 'dropped'})
+        self.reporter_dropped_too_large = \
+            metrics_factory.create_counter(name='jaeger:reporter_dropped_spans',
+                                           tags={'reason': 'too_large'})
+        self.reporter_dropped_queue_full = \
+            metrics_factory.create_counter(name='jaeger:reporter_dropped_spans',
+                                           tags={'reason': 'queue_full'})
+        self.reporter_dropped_evicted = \
+            metrics_factory.create_counter(name='jaeger:reporter_dropped_spans',
+                                           tags={'reason': 'evicted'})
+        self.reporter_dropped_block_timeout = \
+            metrics_factory.create_counter(name='jaeger:reporter_dropped_spans',
+                                           tags={'reason': 'block_timeout'})
+        self.reporter_dropped_sampled_down = \
+            metrics_factory.create_counter(name='jaeger:reporter_dropped_spans',
+                                           tags={'reason': 'sampled_down'})
+        self.reporter_dropped_spool_full = \
+            metrics_factory.create_counter(name='jaeger:reporter_dropped_spans',
+                                           tags={'reason': 'spool_full'})
+        self.reporter_spooled = \
+            metrics_factory.create_counter(name='jaeger:reporter_spooled_spans')
         self.reporter_queue_length = \
             metrics_factory.create_gauge(name='jaeger:reporter_queue_length')
+        self.reporter_queue_bytes = \
+            metrics_factory.create_gauge(name='jaeger:reporter_queue_bytes')
+        self.reporter_spool_bytes = \
+            metrics_factory.create_gauge(name='jaeger:reporter_spool_bytes')
 
 
 class CompositeReporter(BaseReporter):
@@ -268,7 +1021,7 @@ class CompositeReporter(BaseReporter):
         for reporter in self.reporters:
             reporter.report_span(span)
 
-    def close(self) -> Future:
+    def close(self) -> ReporterFuture:
         from threading import Lock
         lock = Lock()
         count = [0]
@@ -0,0 +1,305 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A ring buffer of serialized spans in a memory-mapped file, shared by
+RingReporter in the traced process, which appends spans to it, and the
+jaeger-ring-shipper process (see shipper.py), which forwards them to
+jaeger-agent or jaeger-collector. The file is mapped shared, so a span is
+in the page cache as soon as it is copied into the ring, and survives the
+traced process crashing or being killed.
+"""
+
+import concurrent.futures
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Any, List, Optional, Tuple
+
+from . import thrift
+from .constants import DEFAULT_RING_CAPACITY
+from .metrics import Metrics, MetricsFactory
+from .reporter import BaseReporter, ReporterFuture, ReporterMetrics, SpanBatcher
+from .span import Span
+from .utils import ErrorReporter, register_after_fork
+
+default_logger = logging.getLogger('jaeger_tracing')
+
+_MAGIC = b'JRNG'
+_VERSION = 1
+
+# magic, version and capacity of the data area, followed by the cursors
+# and the length of the serialized Process. Cursors are byte offsets that
+# only grow, the position of a cursor in the data area is cursor % capacity.
+_HEADER = struct.Struct('<4sIQ')
+_CURSOR = struct.Struct('<Q')
+_WRITE_CURSOR_OFFSET = 16
+_READ_CURSOR_OFFSET = 24
+_PROCESS_LENGTH = struct.Struct('<I')
+_PROCESS_LENGTH_OFFSET = 32
+HEADER_SIZE = 64
+
+# the serialized Process is stored between the header and the data area
+PROCESS_AREA_SIZE = 16 * 1024
+
+_DATA_OFFSET = HEADER_SIZE + PROCESS_AREA_SIZE
+
+# each span is stored as a record of its length followed by its bytes
+_RECORD_HEADER = struct.Struct('<I')
+
+
+class SpanRing(object):
+    """
+    A single-producer, single-consumer ring of records in a file, with the
+    write and read cursors in the file header. The producer publishes a
+    record by moving the write cursor only after the record is copied in,
+    so a crash in the middle of append() leaves no partial record behind.
+    The consumer moves the read cursor once it is done with the records.
+
+    N.B. the cursors are read and written as aligned 8-byte words, which
+    are not torn on the 64-bit platforms supported.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_RING_CAPACITY,
+                 create: bool = True) -> None:
+        """
+        :param path: path of the ring file, e.g. on /dev/shm
+        :param capacity: size of the data area of a new ring file. An
+            existing ring file keeps its capacity and the spans in it.
+        :param create: whether to create the ring file if it does not
+            exist, or re-create it if it is not a valid ring file
+        """
+        flags = os.O_RDWR | os.O_CREAT if create else os.O_RDWR
+        fd = os.open(path, flags, 0o600)
+        try:
+            existing = _read_capacity(fd)
+            if existing is None:
+                if not create:
+                    raise ValueError('%s is not a ring file' % path)
+                # discard whatever was in the file, the new header and
+                # cursors are zero-filled
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, _DATA_OFFSET + capacity)
+            else:
+                capacity = existing
+            self._mmap = mmap.mmap(fd, _DATA_OFFSET + capacity)
+        finally:
+            os.close(fd)
+        if existing is None:
+            _HEADER.pack_into(self._mmap, 0, _MAGIC, _VERSION, capacity)
+        self.path = path
+        self.capacity = capacity
+
+    @property
+    def write_cursor(self) -> int:
+        return _CURSOR.unpack_from(self._mmap, _WRITE_CURSOR_OFFSET)[0]
+
+    @property
+    def read_cursor(self) -> int:
+        return _CURSOR.unpack_from(self._mmap, _READ_CURSOR_OFFSET)[0]
+
+    def __len__(self) -> int:
+        """Number of bytes of records not consumed yet."""
+        return self.write_cursor - self.read_cursor
+
+    def append(self, data: bytes) -> bool:
+        """
+        Copy data into the ring as a single record.
+
+        :return: False if there is no room for data in the ring
+        """
+        size = _RECORD_HEADER.size + len(data)
+        write = self.write_cursor
+        if size > self.capacity - (write - self.read_cursor):
+            return False
+        self._copy_in(write, _RECORD_HEADER.pack(len(data)))
+        self._copy_in(write + _RECORD_HEADER.size, data)
+        _CURSOR.pack_into(self._mmap, _WRITE_CURSOR_OFFSET, write + size)
+        return True
+
+    def read(self, max_count: int) -> List[Tuple[int, int, bytes]]:
+        """
+        Read up to max_count records after the read cursor, without
+        consuming them.
+
+        :return: list of (start, end, data) tuples, where start and end
+            are the cursors before and after the record
+        :raises ValueError: if the records are inconsistent with the cursors
+        """
+        cursor = self.read_cursor
+        write = self.write_cursor
+        records: List[Tuple[int, int, bytes]] = []
+        while len(records) < max_count and cursor < write:
+            length, = _RECORD_HEADER.unpack(self._copy_out(cursor, _RECORD_HEADER.size))
+            end = cursor + _RECORD_HEADER.size + length
+            if end > write:
+                raise ValueError('Record at %d ends past write cursor %d' % (cursor, write))
+            records.append((cursor, end, self._copy_out(cursor + _RECORD_HEADER.size, length)))
+            cursor = end
+        return records
+
+    def consume(self, cursor: int) -> None:
+        """Move the read cursor to cursor, freeing the records before it."""
+        _CURSOR.pack_into(self._mmap, _READ_CURSOR_OFFSET, cursor)
+
+    def set_process(self, data: bytes) -> None:
+        """
+        Store the serialized Process the spans in the ring belong to.
+
+        :raises ValueError: if data does not fit into PROCESS_AREA_SIZE
+        """
+        if len(data) > PROCESS_AREA_SIZE:
+            raise ValueError('Process of %d bytes is larger than %d bytes' % (
+                len(data), PROCESS_AREA_SIZE))
+        # readers ignore the process while it is being replaced
+        _PROCESS_LENGTH.pack_into(self._mmap, _PROCESS_LENGTH_OFFSET, 0)
+        self._mmap[HEADER_SIZE:HEADER_SIZE + len(data)] = data
+        _PROCESS_LENGTH.pack_into(self._mmap, _PROCESS_LENGTH_OFFSET, len(data))
+
+    def get_process(self) -> Optional[bytes]:
+        """Returns the serialized Process, or None if it is not set."""
+        length, = _PROCESS_LENGTH.unpack_from(self._mmap, _PROCESS_LENGTH_OFFSET)
+        if not length:
+            return None
+        data = self._mmap[HEADER_SIZE:HEADER_SIZE + length]
+        if _PROCESS_LENGTH.unpack_from(self._mmap, _PROCESS_LENGTH_OFFSET)[0] != length:
+            return None
+        return data
+
+    def _copy_in(self, cursor, data):
+        pos = cursor % self.capacity
+        first = min(len(data), self.capacity - pos)
+        view = memoryview(data)
+        self._mmap[_DATA_OFFSET + pos:_DATA_OFFSET + pos + first] = view[:first]
+        if first < len(data):
+            # wrap around to the start of the data area
+            self._mmap[_DATA_OFFSET:_DATA_OFFSET + len(data) - first] = view[first:]
+
+    def _copy_out(self, cursor, length):
+        pos = cursor % self.capacity
+        first = min(length, self.capacity - pos)
+        data = self._mmap[_DATA_OFFSET + pos:_DATA_OFFSET + pos + first]
+        if first < length:
+            data += self._mmap[_DATA_OFFSET:_DATA_OFFSET + length - first]
+        return data
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def _read_capacity(fd):
+    """Returns the capacity of the ring file fd, or None if it is not one."""
+    size = os.fstat(fd).st_size
+    if size < _DATA_OFFSET:
+        return None
+    magic, version, capacity = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+    if magic != _MAGIC or version != _VERSION or size != _DATA_OFFSET + capacity:
+        return None
+    return capacity
+
+
+class RingReporter(SpanBatcher, BaseReporter):
+    """
+    Writes spans into a SpanRing, which a separate jaeger-ring-shipper
+    process forwards to jaeger-agent or jaeger-collector. Each span is
+    serialized and copied into the ring in report_span(), there is no
+    queue or background thread in the traced process. Spans are dropped
+    when the ring is full.
+
+    The cost of converting and serializing a span, which other reporters
+    pay on their consumer thread, is paid by the thread that finishes the
+    span. Only the copy into the ring is done under a lock, and with the
+    thrift fastbinary extension the serialization runs in C.
+
+    N.B. the ring has a single producer, a forked child process must create
+    its own RingReporter with a ring file of its own. Spans reported to the
+    parent's RingReporter in a child are dropped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = DEFAULT_RING_CAPACITY,
+        error_reporter: Optional[ErrorReporter] = None,
+        metrics_factory: Optional[MetricsFactory] = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        :param path: path of the ring file, e.g. on /dev/shm
+        :param capacity: size of the data area of the ring file, if it is
+            created
+        :param error_reporter:
+        :param metrics_factory: an instance of MetricsFactory class, or None.
+        :param kwargs:
+            'logger'
+        """
+        self.ring = SpanRing(path, capacity)
+        self.metrics_factory = metrics_factory or MetricsFactory()
+        self.metrics = ReporterMetrics(self.metrics_factory)
+        self.error_reporter = error_reporter or ErrorReporter(Metrics())
+        self.logger = kwargs.get('logger', default_logger)
+        self._log_encoder()
+        self.stopped = False
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        register_after_fork(self)
+
+    def _after_fork_in_child(self):
+        self._lock = threading.Lock()
+
+    def set_process(self, service_name: str, tags: Any, max_length: int) -> None:
+        if self._pid != os.getpid():
+            # the process in the ring is the parent's
+            return
+        process = thrift.make_process(
+            service_name=service_name, tags=tags, max_length=max_length,
+        )
+        try:
+            with self._lock:
+                self.ring.set_process(thrift.serialize_process(process))
+        except ValueError as e:
+            self.error_reporter.error('Failed to write process to ring: %s', e)
+
+    def report_span(self, span: Span) -> None:
+        if self._pid != os.getpid():
+            self.metrics.reporter_dropped(1)
+            self.error_reporter.error(
+                'Dropped span, the ring of process %d cannot be written by process %d',
+                self._pid, os.getpid())
+            return
+        encoded = self._encode_spans([span])
+        if not encoded:
+            return
+        with self._lock:
+            if self.stopped:
+                self.metrics.reporter_dropped(1)
+                return
+            appended = self.ring.append(encoded[0])
+        if not appended:
+            self._drop(self.metrics.reporter_dropped_queue_full)
+
+    def close(self) -> ReporterFuture:
+        """
+        Unmap the ring file, spans written to it are left for the shipper.
+        Returns a Future that is already completed.
+        """
+        with self._lock:
+            if not self.stopped:
+                self.stopped = True
+                self.ring.close()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        future.set_result(True)
+        return future
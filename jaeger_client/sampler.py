@@ -13,8 +13,10 @@
 # limitations under the License.
 
 
+import copy
 import json
 import logging
+import os
 import random
 
 from threading import Lock
@@ -28,8 +30,8 @@ from .constants import (
     SAMPLER_TYPE_LOWER_BOUND,
 )
 from .metrics import Metrics, LegacyMetricsFactory, MetricsFactory
-from .utils import ErrorReporter
-from .rate_limiter import RateLimiter
+from .utils import ErrorReporter, register_after_fork
+from .rate_limiter import RateLimiter, RateLimiterTable, SharedRateLimiter
 from typing import Any, Dict, Optional, Tuple
 
 default_logger = logging.getLogger('jaeger_tracing')
@@ -144,11 +146,29 @@ class RateLimitingSampler(Sampler):
     distributed requests will have those requests sampled uniformly as well,
     but if requests are bursty, especially sub-second, then a number of
     sequential requests can be sampled each second.
+
+    Decisions take no lock. Updates replace the rate limiter with a new one
+    instead of changing the one in use. Concurrent decisions may both spend
+    the last credit of the balance, so the rate may be exceeded slightly.
     """
 
-    def __init__(self, max_traces_per_second: float = 10) -> None:
+    def __init__(
+        self,
+        max_traces_per_second: float = 10,
+        rate_limiter_table: Optional[RateLimiterTable] = None,
+        rate_limiter_key: str = '',
+    ) -> None:
+        """
+        :param max_traces_per_second: max number of sampled traces
+        :param rate_limiter_table: RateLimiterTable to share the rate with
+            the other processes of the service on this host, in which case
+            max_traces_per_second is the rate of the host
+        :param rate_limiter_key: key of the rate in rate_limiter_table
+        """
         super(RateLimitingSampler, self).__init__()
         self.rate_limiter: RateLimiter = None  # type:ignore  # value is set below
+        self.rate_limiter_table = rate_limiter_table
+        self.rate_limiter_key = rate_limiter_key
         self._init(max_traces_per_second)
 
     def _init(self, max_traces_per_second):
@@ -160,13 +180,23 @@ class RateLimitingSampler(Sampler):
         }
         self.traces_per_second = max_traces_per_second
         max_balance = max(self.traces_per_second, 1.0)
-        if not self.rate_limiter:
+        if not self.rate_limiter and self.rate_limiter_table:
+            self.rate_limiter = SharedRateLimiter(
+                credits_per_second=self.traces_per_second,
+                max_balance=max_balance,
+                table=self.rate_limiter_table,
+                key=self.rate_limiter_key,
+            )
+        elif not self.rate_limiter:
             self.rate_limiter = RateLimiter(
                 credits_per_second=self.traces_per_second,
                 max_balance=max_balance
             )
         else:
-            self.rate_limiter.update(max_traces_per_second, max_balance)
+            # the rate limiter may be in use by is_sampled()
+            rate_limiter = copy.copy(self.rate_limiter)
+            rate_limiter.update(max_traces_per_second, max_balance)
+            self.rate_limiter = rate_limiter
 
     def is_sampled(self, trace_id: int, operation: str = '') -> _IsSampledType:
         return self.rate_limiter.check_credit(1.0), self._tags
@@ -190,6 +220,18 @@ class RateLimitingSampler(Sampler):
         self._init(max_traces_per_second)
         return True
 
+    def updated(self, max_traces_per_second: float) -> 'RateLimitingSampler':
+        """
+        Returns a new sampler with max_traces_per_second, or this one if the
+        rate is the same. The new sampler starts with the balance of this
+        one, scaled to the new rate.
+        """
+        if self.traces_per_second == max_traces_per_second:
+            return self
+        sampler = copy.copy(self)
+        sampler._init(max_traces_per_second)
+        return sampler
+
     def __str__(self) -> str:
         return 'RateLimitingSampler(%s)' % self.traces_per_second
 
@@ -206,7 +248,8 @@ class GuaranteedThroughputProbabilisticSampler(Sampler):
     ie. if is_sampled() for both samplers return true, the tags for
     ProbabilisticSampler will be used.
     """
-    def __init__(self, operation: str, lower_bound: float, rate: float) -> None:
+    def __init__(self, operation: str, lower_bound: float, rate: float,
+                 rate_limiter_table: Optional[RateLimiterTable] = None) -> None:
         super(GuaranteedThroughputProbabilisticSampler, self).__init__(
             tags={
                 SAMPLER_TYPE_TAG_KEY: SAMPLER_TYPE_LOWER_BOUND,
@@ -214,10 +257,13 @@ class GuaranteedThroughputProbabilisticSampler(Sampler):
             }
         )
         self.probabilistic_sampler = ProbabilisticSampler(rate)
-        self.lower_bound_sampler = RateLimitingSampler(lower_bound)
+        self.lower_bound_sampler = RateLimitingSampler(
+            lower_bound, rate_limiter_table, rate_limiter_key='lower_bound:' + operation)
         self.operation = operation
         self.rate = rate
         self.lower_bound = lower_bound
+        # when the operation was last sampled, in AdaptiveSampler ticks
+        self.last_used = 0
 
     def is_sampled(self, trace_id: int, operation: str = '') -> _IsSampledType:
         sampled, tags = \
@@ -245,6 +291,26 @@ class GuaranteedThroughputProbabilisticSampler(Sampler):
             self.lower_bound_sampler.update(lower_bound)
             self.lower_bound = lower_bound
 
+    def updated(self, lower_bound: float,
+                rate: float) -> 'GuaranteedThroughputProbabilisticSampler':
+        """
+        Returns a new sampler with lower_bound and rate, or this one if
+        they are the same. The new sampler keeps the lower bound balance.
+        """
+        if self.lower_bound == lower_bound and self.rate == rate:
+            return self
+        sampler = copy.copy(self)
+        if self.rate != rate:
+            sampler.probabilistic_sampler = ProbabilisticSampler(rate)
+            sampler.rate = rate
+            sampler._tags = {
+                SAMPLER_TYPE_TAG_KEY: SAMPLER_TYPE_LOWER_BOUND,
+                SAMPLER_PARAM_TAG_KEY: rate,
+            }
+        sampler.lower_bound_sampler = self.lower_bound_sampler.updated(lower_bound)
+        sampler.lower_bound = lower_bound
+        return sampler
+
     def __str__(self) -> str:
         return 'GuaranteedThroughputProbabilisticSampler(%s, %f, %f)' \
                % (self.operation, self.rate, self.lower_bound)
@@ -254,11 +320,24 @@ class AdaptiveSampler(Sampler):
     """
     A sampler that leverages both ProbabilisticSampler and RateLimitingSampler
     via the GuaranteedThroughputProbabilisticSampler. This sampler keeps track
-    of all operations and delegates calls the the respective
-    GuaranteedThroughputProbabilisticSampler.
+    of up to max_operations operations and delegates calls the the respective
+    GuaranteedThroughputProbabilisticSampler. Once max_operations is reached,
+    the least recently used operations are evicted to make room for new ones.
+    With max_operations below 1, operations that are not in strategies are
+    sampled by default_sampler instead.
+
+    Recency is approximate: an operation is stamped with the number of
+    operations added so far when it is sampled, not with the time, so
+    operations used between two additions are equally recent, and a stamp
+    written concurrently with an addition may be lost.
+
+    Operations already in the table are looked up without a lock, only
+    adding an operation takes one.
     """
-    def __init__(self, strategies: Dict[str, Any], max_operations: int) -> None:
+    def __init__(self, strategies: Dict[str, Any], max_operations: int,
+                 rate_limiter_table: Optional[RateLimiterTable] = None) -> None:
         super(AdaptiveSampler, self).__init__()
+        self.rate_limiter_table = rate_limiter_table
 
         samplers = {}
         for strategy in strategies.get(STRATEGIES_STR, []):
@@ -266,11 +345,19 @@ class AdaptiveSampler(Sampler):
             sampler = GuaranteedThroughputProbabilisticSampler(
                 operation,
                 strategies.get(DEFAULT_LOWER_BOUND_STR, DEFAULT_LOWER_BOUND),
-                get_sampling_probability(strategy)
+                get_sampling_probability(strategy),
+                rate_limiter_table,
             )
             samplers[operation] = sampler
 
         self.samplers = samplers
+        # sampling rates of the operations in strategies, which evicted
+        # operations get back when they are added again
+        self._operation_rates = _operation_rates(strategies)
+        # incremented every time an operation is added
+        self._tick = 0
+        self._lock = Lock()
+        register_after_fork(self)
         self.default_sampler = \
             ProbabilisticSampler(strategies.get(DEFAULT_SAMPLING_PROBABILITY_STR,
                                                 DEFAULT_SAMPLING_PROBABILITY))
@@ -279,22 +366,47 @@ class AdaptiveSampler(Sampler):
         self.lower_bound = strategies.get(DEFAULT_LOWER_BOUND_STR, DEFAULT_LOWER_BOUND)
         self.max_operations = max_operations
 
+    def _after_fork_in_child(self):
+        self._lock = Lock()
+
     def is_sampled(self, trace_id: int, operation: str = '') -> _IsSampledType:
         sampler = self.samplers.get(operation)
         if not sampler:
-            if len(self.samplers) >= self.max_operations:
+            if self.max_operations < 1:
                 return self.default_sampler.is_sampled(trace_id, operation)
+            sampler = self._add_sampler(operation)
+        sampler.last_used = self._tick
+        return sampler.is_sampled(trace_id, operation)
+
+    def _add_sampler(self, operation):
+        with self._lock:
+            sampler = self.samplers.get(operation)
+            if sampler:
+                return sampler
+            if len(self.samplers) >= self.max_operations:
+                self._evict()
+            self._tick += 1
             sampler = GuaranteedThroughputProbabilisticSampler(
                 operation,
                 self.lower_bound,
-                self.default_sampling_probability
+                self._operation_rates.get(operation, self.default_sampling_probability),
+                self.rate_limiter_table,
             )
             self.samplers[operation] = sampler
-            return sampler.is_sampled(trace_id, operation)
-        return sampler.is_sampled(trace_id, operation)
+            return sampler
+
+    def _evict(self):
+        # Evicting a tenth of the table at a time keeps the cost of sorting
+        # it low with high operation churn. Readers may still hold evicted
+        # samplers, they are only removed from the table.
+        count = max(1, len(self.samplers) - self.max_operations + self.max_operations // 10)
+        coldest = sorted(self.samplers.copy().items(), key=lambda item: item[1].last_used)
+        for operation, _ in coldest[:count]:
+            del self.samplers[operation]
 
     def update(self, strategies: Dict[str, Any]) -> None:
         # (NB) This function should only be called while holding a Write lock.
+        self._operation_rates.update(_operation_rates(strategies))
         for strategy in strategies.get(STRATEGIES_STR, []):
             operation = strategy.get(OPERATION_STR)
             lower_bound = strategies.get(DEFAULT_LOWER_BOUND_STR, DEFAULT_LOWER_BOUND)
@@ -304,7 +416,8 @@ class AdaptiveSampler(Sampler):
                 sampler = GuaranteedThroughputProbabilisticSampler(
                     operation,
                     lower_bound,
-                    sampling_rate
+                    sampling_rate,
+                    self.rate_limiter_table,
                 )
                 self.samplers[operation] = sampler
             else:
@@ -317,6 +430,49 @@ class AdaptiveSampler(Sampler):
             self.default_sampler = \
                 ProbabilisticSampler(self.default_sampling_probability)
 
+    def updated(self, strategies: Dict[str, Any]) -> 'AdaptiveSampler':
+        """
+        Returns a new AdaptiveSampler with strategies applied, leaving this
+        one unchanged. Samplers of operations that have the same strategy
+        are shared by both.
+        """
+        # a copy made in C, is_sampled() may be adding operations
+        samplers = self.samplers.copy()
+        changed = False
+        lower_bound = strategies.get(DEFAULT_LOWER_BOUND_STR, DEFAULT_LOWER_BOUND)
+        for strategy in strategies.get(STRATEGIES_STR, []):
+            operation = strategy.get(OPERATION_STR)
+            sampling_rate = get_sampling_probability(strategy)
+            operation_sampler = samplers.get(operation)
+            if not operation_sampler:
+                new_sampler = GuaranteedThroughputProbabilisticSampler(
+                    operation,
+                    lower_bound,
+                    sampling_rate,
+                    self.rate_limiter_table,
+                )
+            else:
+                new_sampler = operation_sampler.updated(lower_bound, sampling_rate)
+            if new_sampler is not operation_sampler:
+                samplers[operation] = new_sampler
+                changed = True
+        default_sampling_probability = strategies.get(DEFAULT_SAMPLING_PROBABILITY_STR,
+                                                      DEFAULT_SAMPLING_PROBABILITY)
+        if not changed and self.lower_bound == lower_bound and \
+                self.default_sampling_probability == default_sampling_probability:
+            return self
+        sampler = copy.copy(self)
+        sampler.samplers = samplers
+        sampler.lower_bound = lower_bound
+        sampler._operation_rates = dict(self._operation_rates)
+        sampler._operation_rates.update(_operation_rates(strategies))
+        sampler._lock = Lock()
+        register_after_fork(sampler)
+        if self.default_sampling_probability != default_sampling_probability:
+            sampler.default_sampling_probability = default_sampling_probability
+            sampler.default_sampler = ProbabilisticSampler(default_sampling_probability)
+        return sampler
+
     def close(self) -> None:
         for _, sampler in self.samplers.items():
             sampler.close()
@@ -327,6 +483,11 @@ class AdaptiveSampler(Sampler):
                   self.max_operations)
 
 
+def _operation_rates(strategies):
+    return {strategy.get(OPERATION_STR): get_sampling_probability(strategy)
+            for strategy in strategies.get(STRATEGIES_STR, [])}
+
+
 class RemoteControlledSampler(Sampler):
     """Periodically loads the sampling strategy from a remote server."""
     def __init__(self, channel: Any, service_name: str, **kwargs: Any) -> None:
@@ -346,6 +507,12 @@ class RemoteControlledSampler(Sampler):
             - error_reporter: ErrorReporter instance
             - max_operations: maximum number of unique operations the
               AdaptiveSampler will keep track of
+            - strategy_cache: SamplingStrategyCache shared with the other
+              processes of the service on this host. Only one of them
+              polls jaeger-agent, the others load the strategy it writes.
+            - rate_limiter_table: RateLimiterTable to share the rate limits
+              of the strategy with the other processes of the service on
+              this host
         :param init:
         :return:
         """
@@ -353,7 +520,7 @@ class RemoteControlledSampler(Sampler):
         self._channel = channel
         self.service_name = service_name
         self.logger = kwargs.get('logger', default_logger)
-        self.sampler = kwargs.get('init_sampler')
+        self.sampler: Sampler = kwargs.get('init_sampler')  # type:ignore  # set below if None
         self.sampling_refresh_interval = \
             kwargs.get('sampling_refresh_interval') or DEFAULT_SAMPLING_INTERVAL
         self.metrics_factory = kwargs.get('metrics_factory') \
@@ -363,6 +530,8 @@ class RemoteControlledSampler(Sampler):
             ErrorReporter(Metrics())
         self.max_operations = kwargs.get('max_operations') or \
             DEFAULT_MAX_OPERATIONS
+        self.strategy_cache = kwargs.get('strategy_cache')
+        self.rate_limiter_table = kwargs.get('rate_limiter_table')
 
         if not self.sampler:
             self.sampler = ProbabilisticSampler(DEFAULT_SAMPLING_PROBABILITY)
@@ -370,6 +539,9 @@ class RemoteControlledSampler(Sampler):
             self.sampler.is_sampled(0)  # assert we got valid sampler API
 
         self.lock = Lock()
+        if self.strategy_cache:
+            # start with the strategy other processes already have
+            self._load_cached_strategy()
         self.running = True
         self.periodic = None
 
@@ -381,11 +553,35 @@ class RemoteControlledSampler(Sampler):
             # according to IOLoop docs, it's not safe to use timeout methods
             # unless already running in the loop, so we use `add_callback`
             self.io_loop.add_callback(self._init_polling)
+        self._pid = os.getpid()
+        register_after_fork(self)
 
-    def is_sampled(self, trace_id: int, operation: str = '') -> _IsSampledType:
+    def _after_fork_in_child(self):
+        # polling is restarted by _restart_after_fork()
+        self.lock = Lock()
+
+    def _restart_after_fork(self):
+        # called on the first sampling decision in a forked child
         with self.lock:
-            assert self.sampler  # needed for mypy
-            return self.sampler.is_sampled(trace_id, operation)
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # starts the IOLoop thread of the channel in the child
+            io_loop = self._channel.io_loop
+            if io_loop is self.io_loop:
+                return
+            # the periodic callback is still scheduled on the parent's IOLoop
+            self.periodic = None
+            self.io_loop = io_loop
+            if self.running and self.io_loop:
+                self.io_loop.add_callback(self._init_polling)
+
+    def is_sampled(self, trace_id: int, operation: str = '') -> _IsSampledType:
+        if self._pid != os.getpid():
+            self._restart_after_fork()
+        # Updates never change a sampler that may be in use, they replace
+        # self.sampler with a new one, so reading it needs no lock.
+        return self.sampler.is_sampled(trace_id, operation)
 
     def _init_polling(self):
         """
@@ -452,6 +648,28 @@ class RemoteControlledSampler(Sampler):
 
         self._update_sampler(sampling_strategies_response)
         self.logger.debug('Tracing sampler set to %s', self.sampler)
+        if self.strategy_cache:
+            try:
+                self.strategy_cache.write(response_body)
+            except OSError as e:
+                self.error_reporter.error(
+                    'Fail to write sampling strategy to %s: %s',
+                    self.strategy_cache.path, e)
+
+    def _load_cached_strategy(self):
+        assert self.strategy_cache  # needed for mypy
+        try:
+            response_body = self.strategy_cache.read()
+            if response_body is None:
+                return
+            sampling_strategies_response = json.loads(response_body)
+        except Exception as e:
+            self.error_reporter.error(
+                'Fail to load sampling strategy from %s: %s',
+                self.strategy_cache.path, e)
+            return
+        self._update_sampler(sampling_strategies_response)
+        self.logger.debug('Tracing sampler set to %s', self.sampler)
 
     def _update_sampler(self, response):
         with self.lock:
@@ -468,9 +686,10 @@ class RemoteControlledSampler(Sampler):
 
     def _update_adaptive_sampler(self, per_operation_strategies):
         if isinstance(self.sampler, AdaptiveSampler):
-            self.sampler.update(per_operation_strategies)
+            self.sampler = self.sampler.updated(per_operation_strategies)
         else:
-            self.sampler = AdaptiveSampler(per_operation_strategies, self.max_operations)
+            self.sampler = AdaptiveSampler(per_operation_strategies, self.max_operations,
+                                           self.rate_limiter_table)
         self.metrics.sampler_updated(1)
 
     def _update_rate_limiting_or_probabilistic_sampler(self, response):
@@ -485,10 +704,10 @@ class RemoteControlledSampler(Sampler):
                 raise ValueError(
                     'Rate limiting parameter not in [0, 500) range: %s' % mtps)
             if isinstance(self.sampler, RateLimitingSampler):
-                if self.sampler.update(max_traces_per_second=mtps):
-                    self.metrics.sampler_updated(1)
+                new_sampler = self.sampler.updated(max_traces_per_second=mtps)
             else:
-                new_sampler = RateLimitingSampler(max_traces_per_second=mtps)
+                new_sampler = RateLimitingSampler(max_traces_per_second=mtps,
+                                                  rate_limiter_table=self.rate_limiter_table)
         else:
             raise ValueError('Unsupported sampling strategy type: %s' % s_type)
 
@@ -497,6 +716,10 @@ class RemoteControlledSampler(Sampler):
             self.metrics.sampler_updated(1)
 
     def _poll_sampling_manager(self):
+        if self.strategy_cache and not self.strategy_cache.acquire():
+            # another process on this host polls jaeger-agent
+            self._load_cached_strategy()
+            return
         self.logger.debug('Requesting tracing sampler refresh')
         fut = self._channel.request_sampling_strategy(self.service_name)
         fut.add_done_callback(self._sampling_request_callback)
@@ -506,6 +729,8 @@ class RemoteControlledSampler(Sampler):
             self.running = False
             if self.periodic:
                 self.periodic.stop()
+        if self.strategy_cache:
+            self.strategy_cache.close()
 
 
 def get_sampling_probability(strategy: Optional[Dict[str, Any]] = None) -> float:
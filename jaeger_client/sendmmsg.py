@@ -0,0 +1,124 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sends several datagrams over a connected socket with a single sendmmsg(2)
+system call. The socket module does not expose sendmmsg, so on Linux it is
+called through ctypes. Elsewhere, or if libc does not provide it, send_many()
+falls back to calling send() in a loop.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import sys
+import socket
+from typing import List, Optional, Tuple
+
+# max number of messages the kernel accepts in one call
+UIO_MAXIOV = 1024
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_hdr', _MsgHdr),
+        ('msg_len', ctypes.c_uint),
+    ]
+
+
+def _load_sendmmsg():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        func = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_sendmmsg()
+
+SUPPORTED = _sendmmsg is not None
+
+
+def _send_mmsg(sock, buffers: List[bytes]) -> Tuple[int, Optional[OSError]]:
+    count = min(len(buffers), UIO_MAXIOV)
+    iovecs = (_IOVec * count)()
+    msgs = (_MMsgHdr * count)()
+    # c_char_p points into the bytes objects, which must stay alive
+    # until the call returns
+    pointers = [ctypes.c_char_p(buf) for buf in buffers[:count]]
+    for i in range(count):
+        iovecs[i].iov_base = ctypes.cast(pointers[i], ctypes.c_void_p)
+        iovecs[i].iov_len = len(buffers[i])
+        msgs[i].msg_hdr.msg_iov = ctypes.pointer(iovecs[i])
+        msgs[i].msg_hdr.msg_iovlen = 1
+    sent = _sendmmsg(sock.fileno(), msgs, count, 0)
+    if sent < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    if sent < count:
+        # an error after the first message is not returned by sendmmsg(),
+        # depending on the kernel it is kept as the pending socket error
+        err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            return sent, OSError(err, os.strerror(err))
+    return sent, None
+
+
+def send_many(sock, buffers: List[bytes]) -> Tuple[int, Optional[OSError]]:
+    """
+    Send each of buffers as a separate datagram over the connected sock.
+
+    :return: number of datagrams sent, which can be less than
+        len(buffers), and the error that stopped the rest from being
+        sent, if any
+    :raises OSError: if not even the first datagram could be sent
+    """
+    if not buffers:
+        return 0, None
+    if SUPPORTED:
+        return _send_mmsg(sock, buffers)
+    sent = 0
+    for buf in buffers:
+        try:
+            sock.send(buf)
+        except OSError as e:
+            if sent:
+                return sent, e
+            raise
+        sent += 1
+    return sent, None
@@ -0,0 +1,214 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+jaeger-ring-shipper tails a ring file written by RingReporter and forwards
+the spans in it to jaeger-agent or jaeger-collector, e.g.
+
+    jaeger-ring-shipper --ring /dev/shm/myservice.ring --agent-host localhost
+
+Run one shipper per ring file. Spans are consumed from the ring only once
+they are sent, so they survive restarts of both the traced process and
+the shipper.
+"""
+
+import argparse
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
+from . import thrift
+from .collector_net import HttpCollectorSender
+from .constants import DEFAULT_MAX_PACKET_SIZE, DEFAULT_RING_POLL_INTERVAL
+from .metrics import Metrics, MetricsFactory
+from .reporter import ReporterMetrics, SpanBatcher
+from .ring import SpanRing
+from .TUDPTransport import TUDPTransport
+from .utils import ErrorReporter
+
+default_logger = logging.getLogger('jaeger_tracing')
+
+
+class RingShipper(SpanBatcher):
+    """Forwards spans from a SpanRing to jaeger-agent or jaeger-collector."""
+
+    def __init__(
+        self,
+        ring: SpanRing,
+        transport: Any = None,
+        sender: Any = None,
+        batch_size: int = 100,
+        max_packet_size: Optional[int] = DEFAULT_MAX_PACKET_SIZE,
+        error_reporter: Optional[ErrorReporter] = None,
+        metrics_factory: Optional[MetricsFactory] = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        :param ring: the SpanRing to read spans from
+        :param transport: a TUDPTransport connected to jaeger-agent
+        :param sender: alternative to transport, an object with a
+            send(batch) method that receives ttypes.Batch objects,
+            e.g. HttpCollectorSender
+        :param batch_size: max number of spans read from the ring at once
+        :param max_packet_size: max size of a UDP packet written to
+            transport, larger batches are split, and spans that do not fit
+            into a packet on their own are dropped. Not used with sender.
+        :param error_reporter:
+        :param metrics_factory: an instance of MetricsFactory class, or None.
+        :param kwargs:
+            'logger'
+        """
+        if (transport is None) == (sender is None):
+            raise ValueError('Exactly one of transport or sender is required')
+        self.ring = ring
+        self.transport = transport
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_packet_size = max_packet_size
+        self.metrics_factory = metrics_factory or MetricsFactory()
+        self.metrics = ReporterMetrics(self.metrics_factory)
+        self.error_reporter = error_reporter or ErrorReporter(Metrics())
+        self.logger = kwargs.get('logger', default_logger)
+        self._process_data: Optional[bytes] = None
+        self._frame: Optional[thrift.EmitBatchFrame] = None
+        self._seqid = 0
+
+    def _get_frame(self):
+        data = self.ring.get_process()
+        if data is not None and data != self._process_data:
+            self._frame = thrift.make_emit_batch_frame(thrift.deserialize_process(data))
+            self._process_data = data
+        return self._frame
+
+    def ship(self) -> int:
+        """
+        Send up to batch_size spans from the ring. If a batch cannot be
+        sent, it and the spans after it are left in the ring. The ring is
+        consumed up to the end of the last batch sent.
+
+        :return: number of spans consumed from the ring
+        """
+        # spans are not shipped until the reporter has set the process
+        frame = self._get_frame()
+        if frame is None:
+            return 0
+        try:
+            records = self.ring.read(self.batch_size)
+        except ValueError as e:
+            self.error_reporter.error('Skipping corrupted spans in ring: %s', e)
+            self.ring.consume(self.ring.write_cursor)
+            return 0
+        if not records:
+            return 0
+        oversized = []
+        if self.sender is None and self.max_packet_size:
+            groups, oversized = thrift.split_by_size(
+                items=records,
+                sizes=[len(data) for _, _, data in records],
+                max_size=self.max_packet_size - thrift.emit_batch_overhead(frame),
+            )
+        else:
+            groups = [records]
+        consumed = records[-1][1]
+        for group in groups:
+            try:
+                self._send(frame, [data for _, _, data in group])
+            except Exception as e:
+                self.error_reporter.error('Failed to ship spans, will retry: %s', e)
+                consumed = group[0][0]
+                break
+            self.metrics.reporter_success(len(group))
+        self.ring.consume(consumed)
+        # spans too large to be sent are dropped once they are consumed,
+        # the ones after a failed batch are read again by the next ship()
+        dropped = sum(1 for _, end, _ in oversized if end <= consumed)
+        if dropped:
+            self._drop_too_large(dropped)
+        return sum(1 for _, end, _ in records if end <= consumed)
+
+    def _send(self, frame, serialized_spans):
+        if self.sender is not None:
+            self.sender.send(ttypes.Batch(
+                process=frame.process,
+                spans=[thrift.deserialize_span(data) for data in serialized_spans]))
+            return
+        self._seqid += 1
+        self.transport.write(thrift.make_emit_batch_message_from_spans(
+            frame, serialized_spans, self._seqid))
+
+    def run(self, poll_interval: float = DEFAULT_RING_POLL_INTERVAL,
+            stop: Optional[threading.Event] = None) -> None:
+        """
+        Ship spans until stop is set, checking the ring for new spans
+        every poll_interval seconds once it is drained.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if self.ship() < self.batch_size:
+                stop.wait(poll_interval)
+
+
+def _open_ring(path, poll_interval):
+    # the traced process may not have created the ring yet
+    while True:
+        try:
+            return SpanRing(path, create=False)
+        except (OSError, ValueError):
+            time.sleep(poll_interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='jaeger-ring-shipper',
+        description='Forward spans from a RingReporter ring file to '
+                    'jaeger-agent or jaeger-collector.')
+    parser.add_argument('--ring', required=True, help='path of the ring file')
+    parser.add_argument('--agent-host', default='localhost')
+    parser.add_argument('--agent-port', type=int, default=6831,
+                        help='jaeger-agent UDP port for spans in compact thrift')
+    parser.add_argument('--collector-endpoint',
+                        help='send spans to this jaeger-collector URL instead '
+                             'of jaeger-agent, e.g. http://jaeger-collector:14268')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--max-packet-size', type=int, default=DEFAULT_MAX_PACKET_SIZE)
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_RING_POLL_INTERVAL)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.collector_endpoint:
+        transport = None
+        sender = HttpCollectorSender(args.collector_endpoint)
+    else:
+        transport = TUDPTransport(args.agent_host, args.agent_port, blocking=True)
+        sender = None
+    shipper = RingShipper(
+        ring=_open_ring(args.ring, args.poll_interval),
+        transport=transport,
+        sender=sender,
+        batch_size=args.batch_size,
+        max_packet_size=args.max_packet_size,
+        error_reporter=ErrorReporter(Metrics(), logger=default_logger, log_interval_minutes=1),
+    )
+    default_logger.info('Shipping spans from %s', args.ring)
+    try:
+        shipper.run(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
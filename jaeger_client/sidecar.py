@@ -0,0 +1,342 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+SubprocessReporter hands spans over to a child Python process, which
+converts them to Thrift, encodes them and sends them to jaeger-agent, so
+that none of that competes for the GIL with the application threads.
+
+Spans travel over the child's stdin as pickled records, tuples of plain
+values that pickle encodes in C. The child runs jaeger_client.sidecar.main()
+through `python -c`, so it does not import the application's main module
+the way multiprocessing does. The directory this jaeger_client is imported
+from goes at the end of the child's sys.path, so that it cannot shadow the
+standard library or the child's own packages.
+"""
+
+import argparse
+import concurrent.futures
+import logging
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import threading
+from typing import Any, Optional
+
+from opentracing import ReferenceType
+
+import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
+from . import thrift
+from .constants import DEFAULT_MAX_PACKET_SIZE, MAX_TRACEBACK_LENGTH
+from .metrics import Metrics, MetricsFactory
+from .reporter import ReporterFuture, ReporterMetrics, SpanBatcher, ThreadedReporter
+from .span import Span
+from .TUDPTransport import TUDPTransport
+from .utils import ErrorReporter
+
+default_logger = logging.getLogger('jaeger_tracing')
+
+# tag values of these types are passed to the child as is, anything else
+# is converted to a ttypes.Tag in the application process
+_PLAIN_TYPES = (str, int, float, bool)
+
+_MESSAGE_PROCESS = 'process'
+_MESSAGE_SPANS = 'spans'
+
+# run by the child with the directory to look for jaeger_client in last
+_BOOTSTRAP = ('import sys; sys.path.append(sys.argv.pop(1)); '
+              'from jaeger_client.sidecar import main; sys.exit(main())')
+
+
+def _make_tag_record(span, key, value):
+    if type(value) in _PLAIN_TYPES:
+        return key, value
+    return thrift.make_tag(key=key, value=value,
+                           max_length=span.tracer.max_tag_value_length,
+                           max_traceback_length=span.tracer.max_traceback_length)
+
+
+def make_span_record(span: Span) -> tuple:
+    """
+    Returns the fields of a finished Span as a tuple of plain values,
+    which is cheaper to build and to pickle than a ttypes.Span. Tags and
+    logs of spans with lazy_tag_encoding stay raw unless their values
+    cannot be pickled.
+    """
+    with span.update_lock:
+        operation_name = span.operation_name
+        tags = span.tags
+        logs = span.logs
+    if span.lazy_tag_encoding:
+        tags = [_make_tag_record(span, key, value) for key, value in tags]
+        logs = [(timestamp, [_make_tag_record(span, key, value)
+                             for key, value in fields.items()])
+                for timestamp, fields in logs]
+    references = None
+    if span.references:
+        references = [(ref.type == ReferenceType.FOLLOWS_FROM,
+                       ref.referenced_context.trace_id,
+                       ref.referenced_context.span_id)
+                      for ref in span.references]
+    return (span.trace_id, span.span_id, span.parent_id, span.context.flags,
+            operation_name, span.start_time, span.end_time, references, tags, logs)
+
+
+def _make_tag(item, max_length):
+    if isinstance(item, ttypes.Tag):
+        return item
+    key, value = item
+    return thrift.make_tag(key=key, value=value, max_length=max_length,
+                           max_traceback_length=MAX_TRACEBACK_LENGTH)
+
+
+def _make_log(item, max_length):
+    if isinstance(item, ttypes.Log):
+        return item
+    timestamp, fields = item
+    return ttypes.Log(timestamp=thrift.timestamp_micros(timestamp),
+                      fields=[_make_tag(field, max_length) for field in fields])
+
+
+def make_jaeger_span_from_record(record: tuple, max_length: int) -> ttypes.Span:
+    """Convert a record built by make_span_record() to ttypes.Span."""
+    trace_id, span_id, parent_id, flags, operation_name, start_time, end_time, \
+        references, tags, logs = record
+    return ttypes.Span(
+        traceIdLow=thrift.id_to_int(thrift._id_to_low(trace_id)),
+        traceIdHigh=thrift.id_to_int(thrift._id_to_high(trace_id)),
+        spanId=thrift.id_to_int(span_id),
+        parentSpanId=thrift.id_to_int(parent_id) or 0,
+        operationName=operation_name,
+        references=[ttypes.SpanRef(
+            refType=ttypes.SpanRefType.FOLLOWS_FROM if follows_from
+            else ttypes.SpanRefType.CHILD_OF,
+            traceIdLow=thrift.id_to_int(thrift._id_to_low(ref_trace_id)),
+            traceIdHigh=thrift.id_to_int(thrift._id_to_high(ref_trace_id)),
+            spanId=thrift.id_to_int(ref_span_id),
+        ) for follows_from, ref_trace_id, ref_span_id in references] if references else None,
+        flags=flags,
+        startTime=thrift.timestamp_micros(start_time),
+        duration=thrift.timestamp_micros(end_time - start_time),
+        tags=[_make_tag(tag, max_length) for tag in tags],
+        logs=[_make_log(log, max_length) for log in logs],
+    )
+
+
+class SubprocessReporter(ThreadedReporter):
+    """
+    A ThreadedReporter that writes batches of span records to a child
+    process instead of jaeger-agent. The child is started when the
+    reporter is created, and again if it exits. After a fork, the new
+    process starts a child of its own when it first writes spans to it.
+    Spans are accounted as reported once they are written to the child,
+    failures in the child are logged by the child.
+    """
+
+    def __init__(
+        self,
+        agent_host: str = 'localhost',
+        agent_port: int = 6831,
+        max_packet_size: Optional[int] = DEFAULT_MAX_PACKET_SIZE,
+        python: str = sys.executable,
+        **kwargs: Any
+    ) -> None:
+        """
+        :param agent_host: jaeger-agent host the child sends spans to
+        :param agent_port: jaeger-agent UDP port for spans in compact thrift
+        :param max_packet_size: max size of a UDP packet sent by the child
+        :param python: the Python interpreter to run the child with
+        :param kwargs: any other ThreadedReporter parameters, except
+            transport and sender
+        """
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._args = [python, '-c', _BOOTSTRAP, package_dir,
+                      '--agent-host', agent_host, '--agent-port', str(agent_port),
+                      '--max-packet-size', str(max_packet_size or 0)]
+        self._pipe_lock = threading.Lock()
+        self._process_message: Optional[tuple] = None
+        self._child = self._spawn()
+        try:
+            super(SubprocessReporter, self).__init__(
+                transport=self._child.stdin, max_packet_size=max_packet_size, **kwargs)
+        except BaseException:
+            # e.g. invalid queue parameters, the child is of no use
+            self._child.kill()
+            self._child.wait()
+            raise
+
+    def _spawn(self):
+        # unbuffered, so that a forked child holds no partial message that
+        # it would write to the parent's subprocess
+        return subprocess.Popen(self._args, stdin=subprocess.PIPE, bufsize=0)
+
+    def _after_fork_in_child(self):
+        # the subprocess belongs to the parent, _write() starts one of our
+        # own when the consumer thread first writes to it
+        self._pipe_lock = threading.Lock()
+        self._child = None
+        self.transport = None
+        super(SubprocessReporter, self)._after_fork_in_child()
+
+    def set_process(self, service_name: str, tags: Any, max_length: int) -> None:
+        message = (_MESSAGE_PROCESS, service_name, tags, max_length)
+        try:
+            self._write(message)
+        except Exception as e:
+            self.error_reporter.error('Failed to send process to reporter subprocess: %s', e)
+
+    def _write(self, message):
+        with self._pipe_lock:
+            if message[0] == _MESSAGE_PROCESS:
+                self._process_message = message
+                if self._child is None:
+                    # written to the child once it is started
+                    return
+            if self._child is None or self._child.poll() is not None:
+                if self._child is not None:
+                    self.logger.warning('Reporter subprocess exited with %s, restarting it',
+                                        self._child.returncode)
+                self._child = self._spawn()
+                self.transport = self._child.stdin
+                if self._process_message is not None and message is not self._process_message:
+                    self._write_all(pickle.dumps(self._process_message, pickle.HIGHEST_PROTOCOL))
+            self._write_all(pickle.dumps(message, pickle.HIGHEST_PROTOCOL))
+
+    def _write_all(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[self.transport.write(view):]
+
+    def _encode(self, span):
+        return make_span_record(span)
+
+    def _submit_all(self, encoded_lists):
+        """
+        Write all records in encoded_lists to the child at once, it splits
+        them into batches that fit into a packet.
+        """
+        records = [record for encoded in encoded_lists for record in encoded]
+        if records:
+            self._send(len(records), self._write, (_MESSAGE_SPANS, records))
+
+    def close(self) -> ReporterFuture:
+        """
+        Ensure that all spans from the queue are submitted, and wait for
+        the child to send them and exit.
+        Returns Future that will be completed once the child has exited.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def on_closed(_):
+            with self._pipe_lock:
+                if self._child is not None:
+                    try:
+                        self._child.stdin.close()
+                    except OSError:
+                        pass
+                    self._child.wait()
+            future.set_result(True)
+
+        super(SubprocessReporter, self).close().add_done_callback(on_closed)
+        return future
+
+
+class Sidecar(SpanBatcher):
+    """
+    Runs in the child process, converts span records written by
+    SubprocessReporter and sends them to jaeger-agent.
+    """
+
+    def __init__(
+        self,
+        transport: Any,
+        max_packet_size: Optional[int] = DEFAULT_MAX_PACKET_SIZE,
+        error_reporter: Optional[ErrorReporter] = None,
+        metrics_factory: Optional[MetricsFactory] = None,
+    ) -> None:
+        self.transport = transport
+        self.max_packet_size = max_packet_size
+        self.metrics_factory = metrics_factory or MetricsFactory()
+        self.metrics = ReporterMetrics(self.metrics_factory)
+        self.error_reporter = error_reporter or ErrorReporter(Metrics())
+        self._frame: Optional[thrift.EmitBatchFrame] = None
+        self._max_length = 0
+        self._seqid = 0
+
+    def handle(self, message: tuple) -> None:
+        if message[0] == _MESSAGE_PROCESS:
+            _, service_name, tags, max_length = message
+            self._frame = thrift.make_emit_batch_frame(thrift.make_process(
+                service_name=service_name, tags=tags, max_length=max_length))
+            self._max_length = max_length
+        elif message[0] == _MESSAGE_SPANS:
+            self._send_spans(message[1])
+
+    def _send_spans(self, records):
+        frame = self._frame
+        if frame is None:
+            self.metrics.reporter_dropped(len(records))
+            self.error_reporter.error('Dropped %d spans received before the process',
+                                      len(records))
+            return
+        encoded = self._encode_spans(records)
+        for group in self._split_batch(encoded, frame):
+            self._seqid += 1
+            try:
+                self.transport.write(
+                    thrift.make_emit_batch_message_from_spans(frame, group, self._seqid))
+                self.metrics.reporter_success(len(group))
+            except Exception as e:
+                self._send_failed(len(group), e)
+
+    def _encode(self, record):
+        return thrift.serialize_span(make_jaeger_span_from_record(record, self._max_length))
+
+    def run(self, stream) -> None:
+        """Handle messages pickled into stream until it is closed."""
+        while True:
+            try:
+                message = pickle.load(stream)
+            except EOFError:
+                return
+            self.handle(message)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='jaeger_client.sidecar',
+        description='Send spans written to stdin by SubprocessReporter to jaeger-agent.')
+    parser.add_argument('--agent-host', default='localhost')
+    parser.add_argument('--agent-port', type=int, default=6831)
+    parser.add_argument('--max-packet-size', type=int, default=DEFAULT_MAX_PACKET_SIZE,
+                        help='0 disables splitting batches')
+    args = parser.parse_args(argv)
+
+    # Ctrl-C in a terminal interrupts the whole process group, the child
+    # exits once the application closes its stdin, or exits itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO)
+    sidecar = Sidecar(
+        transport=TUDPTransport(args.agent_host, args.agent_port, blocking=True),
+        max_packet_size=args.max_packet_size or None,
+        error_reporter=ErrorReporter(Metrics(), logger=default_logger, log_interval_minutes=1),
+    )
+    sidecar.run(sys.stdin.buffer)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -24,20 +24,22 @@ from .tracer import Reference
 from . import codecs, thrift
 from .constants import SAMPLED_FLAG, DEBUG_FLAG
 from .span_context import SpanContext
-import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
 
 if TYPE_CHECKING:
     from .tracer import Tracer
 
 logger = logging.getLogger('jaeger_tracing')
 
+_promote_lock = threading.Lock()
+
 
 class Span(opentracing.Span):
     """Implements opentracing.Span."""
 
     __slots__ = ['_tracer', '_context',
                  'operation_name', 'start_time', 'end_time',
-                 'logs', 'tags', 'finished', 'update_lock']
+                 'logs', 'tags', 'finished', 'update_lock',
+                 'lazy_tag_encoding']
 
     def __init__(
         self,
@@ -46,7 +48,8 @@ class Span(opentracing.Span):
         operation_name: str,
         tags: Optional[Dict[str, Any]] = None,
         start_time: Optional[float] = None,
-        references: Optional[List[Reference]] = None
+        references: Optional[List[Reference]] = None,
+        lazy_tag_encoding: bool = False,
     ) -> None:
         super(Span, self).__init__(context=context, tracer=tracer)
         self.operation_name = operation_name
@@ -55,9 +58,13 @@ class Span(opentracing.Span):
         self.finished = False
         self.update_lock = threading.Lock()
         self.references = references
-        # we store tags and logs as Thrift objects to avoid extra allocations
-        self.tags: List[ttypes.Tag] = []
-        self.logs: List[ttypes.Log] = []
+        # we store tags and logs as Thrift objects to avoid extra allocations,
+        # unless lazy_tag_encoding is set, in which case they are stored as
+        # raw (key, value) and (timestamp, fields) tuples and converted to
+        # Thrift objects by the reporter, off the request thread.
+        self.lazy_tag_encoding = lazy_tag_encoding
+        self.tags: List[Any] = []
+        self.logs: List[Any] = []
         if tags:
             for k, v in tags.items():
                 self.set_tag(k, v)
@@ -100,10 +107,17 @@ class Span(opentracing.Span):
         :param key:
         :param value:
         """
+        if key != ext_tags.SAMPLING_PRIORITY and not self.is_sampled():
+            return self
         with self.update_lock:
             if key == ext_tags.SAMPLING_PRIORITY and not self._set_sampling_priority(value):
                 return self
             if self.is_sampled():
+                if self.lazy_tag_encoding:
+                    # the caller may change a mutable value before the
+                    # reporter converts it
+                    self.tags.append((key, thrift.snapshot_tag_value(value)))
+                    return self
                 tag = thrift.make_tag(
                     key=key,
                     value=value,
@@ -137,6 +151,12 @@ class Span(opentracing.Span):
     def log_kv(self, key_values: Dict[str, Any], timestamp: Optional[float] = None) -> 'Span':
         if self.is_sampled():
             timestamp = timestamp if timestamp else time.time()
+            if self.lazy_tag_encoding:
+                # a copy, the caller may reuse the dict or the values in it
+                fields = {k: thrift.snapshot_tag_value(v) for k, v in key_values.items()}
+                with self.update_lock:
+                    self.logs.append((timestamp, fields))
+                return self
             # TODO handle exception logging, 'python.exception.type' etc.
             log = thrift.make_log(
                 timestamp=timestamp if timestamp else time.time(),
@@ -174,18 +194,35 @@ class Span(opentracing.Span):
     def is_debug(self) -> bool:
         return self.context.flags & DEBUG_FLAG == DEBUG_FLAG
 
-    def is_rpc(self) -> bool:
+    def is_error(self) -> bool:
+        """Whether the error tag of the span is set to true."""
+        error = False
         for tag in self.tags:
-            if tag.key == ext_tags.SPAN_KIND:
-                return tag.vStr == ext_tags.SPAN_KIND_RPC_CLIENT or \
-                    tag.vStr == ext_tags.SPAN_KIND_RPC_SERVER
-        return False
+            if self.lazy_tag_encoding:
+                key, value = tag
+                if key == ext_tags.ERROR:
+                    error = value is True or value == 'true'
+            elif tag.key == ext_tags.ERROR:
+                error = tag.vBool is True or tag.vStr == 'true'
+        return error
+
+    def is_rpc(self) -> bool:
+        span_kind = self._get_span_kind()
+        return span_kind == ext_tags.SPAN_KIND_RPC_CLIENT or \
+            span_kind == ext_tags.SPAN_KIND_RPC_SERVER
 
     def is_rpc_client(self) -> bool:
+        return self._get_span_kind() == ext_tags.SPAN_KIND_RPC_CLIENT
+
+    def _get_span_kind(self):
         for tag in self.tags:
-            if tag.key == ext_tags.SPAN_KIND:
-                return tag.vStr == ext_tags.SPAN_KIND_RPC_CLIENT
-        return False
+            if self.lazy_tag_encoding:
+                key, value = tag
+                if key == ext_tags.SPAN_KIND:
+                    return value
+            elif tag.key == ext_tags.SPAN_KIND:
+                return tag.vStr
+        return None
 
     @property
     def trace_id(self) -> int:
@@ -225,3 +262,60 @@ class Span(opentracing.Span):
         else:
             self.log(event=message)
         return self
+
+
+class UnsampledSpan(Span):
+    """
+    A lightweight Span used by the Tracer for spans that are not sampled
+    when they are started. It keeps the SpanContext for propagation, but
+    does not allocate a lock or storage for tags and logs, which makes
+    set_tag(), log_kv() and finish() no-ops that do not take any locks.
+
+    If the span is upgraded to sampled via the sampling.priority tag, it
+    allocates the lock and storage and behaves like a regular Span.
+    """
+
+    __slots__: List[str] = []
+
+    def __init__(
+        self,
+        context: SpanContext,
+        tracer: 'Tracer',
+        operation_name: str,
+        start_time: Optional[float] = None,
+        references: Optional[List[Reference]] = None,
+        lazy_tag_encoding: bool = False,
+    ) -> None:
+        super(Span, self).__init__(context=context, tracer=tracer)
+        self.operation_name = operation_name
+        self.start_time = start_time or time.time()
+        self.end_time = None
+        self.finished = False
+        self.update_lock = None  # type: ignore  # allocated by _promote()
+        self.references = references  # type: ignore
+        self.lazy_tag_encoding = lazy_tag_encoding
+        self.tags = self.logs = ()  # type: ignore  # allocated by _promote()
+
+    def _promote(self):
+        with _promote_lock:
+            if self.update_lock is None:
+                self.tags = []
+                self.logs = []
+                self.update_lock = threading.Lock()
+
+    def set_operation_name(self, operation_name: str) -> 'Span':
+        if self.update_lock is None:
+            self.operation_name = operation_name
+            return self
+        return super(UnsampledSpan, self).set_operation_name(operation_name)
+
+    def set_tag(self, key: str, value: Any) -> 'Span':
+        if key == ext_tags.SAMPLING_PRIORITY:
+            self._promote()
+        return super(UnsampledSpan, self).set_tag(key, value)
+
+    def set_baggage_item(self, key: str, value: Optional[str]) -> 'Span':
+        if self.update_lock is None:
+            self._context = self.context.with_baggage_item(key=key, value=value)
+            return self
+        return super(UnsampledSpan, self).set_baggage_item(key, value)
@@ -0,0 +1,257 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A size-capped spool of serialized spans on local disk, which the reporter
+writes batches to while jaeger-agent is unreachable or its queue is close
+to full, and reads them back from once the agent has recovered.
+"""
+
+import collections
+import os
+import struct
+from typing import Any, Deque, List, Optional
+
+from .constants import SPOOL_SEGMENTS
+from .utils import process_exists
+
+# each span is stored as a record of its length followed by its bytes
+_RECORD_HEADER = struct.Struct('>I')
+
+_SUFFIX = '.spool'
+
+# prefix of the spool directories of forked processes
+_PROCESS_PREFIX = 'pid-'
+
+
+def process_spool_dir(shared_dir: str, pid: int) -> str:
+    """Returns the spool directory of process pid in shared_dir."""
+    return os.path.join(shared_dir, '%s%d' % (_PROCESS_PREFIX, pid))
+
+
+def _is_segment(name):
+    return name.endswith(_SUFFIX) and name[:-len(_SUFFIX)].isdigit()
+
+
+class _Segment(object):
+    __slots__ = ('path', 'size', 'spans')
+
+    def __init__(self, path: str, size: int = 0, spans: int = 0) -> None:
+        self.path = path
+        self.size = size
+        # number of spans not read yet
+        self.spans = spans
+
+
+class SpanSpool(object):
+    """
+    Stores spans serialized with thrift.serialize_span() in a directory of
+    segment files, oldest first. New spans are appended to the newest
+    segment with buffered sequential writes, and a new segment is started
+    once it reaches max_bytes / segments. When the spool grows past
+    max_bytes, its oldest segment is deleted along with the spans in it.
+
+    Segments left behind by a previous process are picked up and read
+    first, so the directory must not be shared by several reporters.
+    Segments are deleted by commit() once all spans in them have been
+    read, so delivery is at least once: spans read but not committed, and
+    spans read from a segment that is not fully read yet, are read again
+    after a restart.
+
+    The processes forked from a reporter each have a spool of their own in
+    a subdirectory of shared_dir, see process_spool_dir(). When a spool is
+    opened, it takes over the segments of the processes that have exited,
+    so that their spans are sent, and their directories do not pile up.
+
+    Not thread-safe, it is meant to be used by the reporter consumer only.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, segments: int = SPOOL_SEGMENTS,
+                 shared_dir: Optional[str] = None) -> None:
+        """
+        :param directory: directory of the segment files
+        :param max_bytes: max size of the spool
+        :param segments: number of segments max_bytes is divided into
+        :param shared_dir: directory with the spools of forked processes,
+            the segments of those that have exited are moved into this one
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_max_bytes = max(1, max_bytes // segments)
+        # total size of all segments, including the spans read already
+        self.size = 0
+        self._segments: Deque[_Segment] = collections.deque()
+        self._writer: Any = None
+        self._reader: Any = None
+        # index of the segment being read, the ones before it have been
+        # read and are deleted by commit()
+        self._read_index = 0
+        self._next_id = 0
+        for name in sorted(os.listdir(directory)):
+            if _is_segment(name):
+                self._load(os.path.join(directory, name))
+                self._next_id = int(name[:-len(_SUFFIX)]) + 1
+        if shared_dir is not None:
+            self._adopt_orphans(shared_dir)
+
+    def __len__(self) -> int:
+        """Number of spans not read yet."""
+        return sum(segment.spans for segment in self._segments)
+
+    def _load(self, path):
+        segment = _Segment(path, size=os.path.getsize(path))
+        with open(path, 'rb') as f:
+            while self._read_record(f) is not None:
+                segment.spans += 1
+        self._segments.append(segment)
+        self.size += segment.size
+
+    def _adopt_orphans(self, shared_dir):
+        """
+        Move the segments of the spools of processes that have exited from
+        shared_dir into this spool, after its own segments.
+        """
+        for name in sorted(os.listdir(shared_dir)):
+            pid = name[len(_PROCESS_PREFIX):]
+            if not name.startswith(_PROCESS_PREFIX) or not pid.isdigit():
+                continue
+            directory = os.path.join(shared_dir, name)
+            if os.path.abspath(directory) == os.path.abspath(self.directory) or \
+                    process_exists(int(pid)):
+                continue
+            for segment in sorted(os.listdir(directory)):
+                if not _is_segment(segment):
+                    continue
+                path = self._new_segment_path()
+                try:
+                    os.rename(os.path.join(directory, segment), path)
+                except OSError:
+                    # taken over by another process in the meantime
+                    continue
+                self._load(path)
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+    def _new_segment_path(self):
+        path = os.path.join(self.directory, '%020d%s' % (self._next_id, _SUFFIX))
+        self._next_id += 1
+        return path
+
+    @staticmethod
+    def _read_record(f):
+        header = f.read(_RECORD_HEADER.size)
+        if len(header) < _RECORD_HEADER.size:
+            return None
+        length, = _RECORD_HEADER.unpack(header)
+        data = f.read(length)
+        # the last record is incomplete if the process died while writing it
+        return data if len(data) == length else None
+
+    def append(self, spans: List[bytes]) -> int:
+        """
+        Append spans to the newest segment.
+
+        :return: number of unread spans deleted to keep the spool within
+            max_bytes
+        """
+        if not spans:
+            return 0
+        if self._writer is None or self._segments[-1].size >= self.segment_max_bytes or \
+                self._read_index == len(self._segments):
+            # a segment that has been read is deleted by commit()
+            self._rotate()
+        buf = bytearray()
+        for data in spans:
+            buf += _RECORD_HEADER.pack(len(data))
+            buf += data
+        self._writer.write(buf)
+        segment = self._segments[-1]
+        segment.size += len(buf)
+        segment.spans += len(spans)
+        self.size += len(buf)
+        deleted = 0
+        while self.size > self.max_bytes and len(self._segments) > 1:
+            deleted += self._segments[0].spans
+            self._delete_oldest()
+        return deleted
+
+    def _rotate(self):
+        if self._writer is not None:
+            self._writer.close()
+        path = self._new_segment_path()
+        # unbuffered, a forked child would otherwise write the parent's
+        # pending spans again when its copy of the file is closed
+        self._writer = open(path, 'ab', buffering=0)
+        self._segments.append(_Segment(path))
+
+    def read(self, max_spans: int) -> List[bytes]:
+        """
+        Read up to max_spans spans, oldest first. The spans stay on disk
+        until commit() is called.
+        """
+        spans: List[bytes] = []
+        while len(spans) < max_spans and self._read_index < len(self._segments):
+            segment = self._segments[self._read_index]
+            if segment.spans:
+                if self._reader is None:
+                    self._reader = open(segment.path, 'rb')
+                while len(spans) < max_spans and segment.spans:
+                    data = self._read_record(self._reader)
+                    if data is None:
+                        segment.spans = 0
+                        break
+                    spans.append(data)
+                    segment.spans -= 1
+            if not segment.spans:
+                if self._reader is not None:
+                    self._reader.close()
+                    self._reader = None
+                self._read_index += 1
+        return spans
+
+    def commit(self) -> None:
+        """
+        Delete the segments of which all spans have been read, once the
+        spans read have been delivered.
+        """
+        while self._read_index:
+            self._delete_oldest()
+
+    def _delete_oldest(self):
+        segment = self._segments.popleft()
+        if self._read_index:
+            self._read_index -= 1
+        elif self._reader is not None:
+            # the segment being read
+            self._reader.close()
+            self._reader = None
+        if not self._segments and self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.size -= segment.size
+        try:
+            os.remove(segment.path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """Close all files of the spool."""
+        for f in (self._reader, self._writer):
+            if f is not None:
+                f.close()
+        self._reader = None
+        self._writer = None
@@ -0,0 +1,115 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A sampling strategy shared by the processes of a service on the same host,
+e.g. the workers of a pre-forking server, through a file in a directory
+they all have access to. One of the processes polls jaeger-agent and
+replaces the file whenever the strategy changes, the others reload it
+when it has been replaced.
+"""
+
+import os
+from typing import Optional
+from urllib.parse import quote
+
+from .utils import register_after_fork
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+
+class SamplingStrategyCache(object):
+    """
+    The process that holds an exclusive flock() on the lock file of the
+    service is the one that polls jaeger-agent. The lock is released by
+    the kernel when that process exits, and taken over by whichever
+    process asks for it next. Without flock(), every process polls.
+    """
+
+    def __init__(self, directory: str, service_name: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        name = quote(service_name, safe='')
+        self.path = os.path.join(directory, name + '.json')
+        self.lock_path = os.path.join(directory, name + '.lock')
+        self._lock_fd: Optional[int] = None
+        # (inode, mtime, size) of the file when it was last read
+        self._version = None
+        self._written: Optional[str] = None
+        register_after_fork(self)
+
+    def _after_fork_in_child(self):
+        # the lock is held by the parent, through the open file description
+        # the child shares with it
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def acquire(self) -> bool:
+        """
+        Try to become the process that polls jaeger-agent.
+
+        :return: True if this process should poll jaeger-agent
+        """
+        if fcntl is None or self._lock_fd is not None:
+            return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def write(self, strategy: str) -> None:
+        """Replace the file with strategy, unless it is unchanged."""
+        if strategy == self._written:
+            return
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(strategy)
+        # readers see either the old or the new file, never a partial one
+        os.replace(tmp_path, self.path)
+        self._written = strategy
+        self._version = _version(os.stat(self.path))
+
+    def read(self) -> Optional[str]:
+        """
+        :return: the strategy if the file was replaced since the last
+            read() or write(), else None
+        """
+        try:
+            f = open(self.path)
+        except FileNotFoundError:
+            return None
+        with f:
+            version = _version(os.fstat(f.fileno()))
+            if version == self._version:
+                return None
+            strategy = f.read()
+        self._version = version
+        return strategy
+
+    def close(self) -> None:
+        """Release the lock, if held."""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+def _version(stat):
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
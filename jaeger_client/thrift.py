@@ -13,12 +13,20 @@
 # limitations under the License.
 
 import traceback
+from collections import namedtuple
 from opentracing.tracer import ReferenceType
+from thrift.Thrift import TMessageType
+from thrift.protocol import TCompactProtocol
+from thrift.transport import TTransport
 from .constants import MAX_TRACEBACK_LENGTH
+from . import thrift_compact
 
 import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
 import jaeger_client.thrift_gen.sampling.SamplingManager as sampling_manager
 
+_EMIT_BATCH_ARGS_BATCH_FIELD = bytes([1 << 4 | TCompactProtocol.CompactType.STRUCT])
+_STOP_FIELD = b'\x00'
+
 _max_signed_port = (1 << 15) - 1
 _max_unsigned_port = (1 << 16)
 _max_signed_id = (1 << 63) - 1
@@ -60,6 +68,17 @@ def _to_string(s):
         return str(e)
 
 
+def snapshot_tag_value(value):
+    """
+    Returns value as make_tag() would see it now, for a tag or log field
+    that is converted later: scalars and tracebacks as they are, anything
+    else, which may be mutable, in its string form.
+    """
+    if isinstance(value, (str, int, float)) or type(value).__name__ == 'traceback':
+        return value
+    return _to_string(value)
+
+
 def make_tag(key, value, max_length, max_traceback_length):
     if type(value).__name__ == 'bool':  # isinstance doesnt work on booleans
         return _make_bool_tag(
@@ -196,28 +215,290 @@ def make_references(references):
     return list_of_span_refs
 
 
+def make_span_tags(span, tags):
+    """
+    Returns Thrift tags of a span. If the span was created with
+    lazy_tag_encoding, its tags are stored as raw (key, value) pairs and are
+    converted here, otherwise they are already Thrift objects.
+    """
+    if not span.lazy_tag_encoding:
+        return tags
+    return [
+        make_tag(key=k, value=v, max_length=span.tracer.max_tag_value_length,
+                 max_traceback_length=span.tracer.max_traceback_length)
+        for k, v in tags
+    ]
+
+
+def make_span_logs(span, logs):
+    """
+    Returns Thrift logs of a span. If the span was created with
+    lazy_tag_encoding, its logs are stored as raw (timestamp, fields) pairs
+    and are converted here, otherwise they are already Thrift objects.
+    """
+    if not span.lazy_tag_encoding:
+        return logs
+    return [
+        make_log(timestamp=timestamp, fields=fields,
+                 max_length=span.tracer.max_tag_value_length,
+                 max_traceback_length=span.tracer.max_traceback_length)
+        for timestamp, fields in logs
+    ]
+
+
+def make_jaeger_span(span):
+    """
+    Convert a finished Span to ttypes.Span.
+    """
+    with span.update_lock:
+        operation_name = span.operation_name
+        tags = span.tags
+        logs = span.logs
+    return ttypes.Span(
+        traceIdLow=id_to_int(_id_to_low(span.trace_id)),
+        traceIdHigh=id_to_int(_id_to_high(span.trace_id)),
+        spanId=id_to_int(span.span_id),
+        parentSpanId=id_to_int(span.parent_id) or 0,
+        operationName=operation_name,
+        references=make_references(span.references),
+        flags=span.context.flags,
+        startTime=timestamp_micros(span.start_time),
+        duration=timestamp_micros(span.end_time - span.start_time),
+        tags=make_span_tags(span, tags),
+        logs=make_span_logs(span, logs),
+    )
+
+
+# rough serialized sizes of a span, tag, log and reference apart from
+# their strings, see estimate_span_size()
+_SPAN_SIZE = 64
+_TAG_SIZE = 12
+_LOG_SIZE = 12
+_SPAN_REF_SIZE = 36
+_NON_STRING_TAG_VALUE_SIZE = 10
+
+
+def _estimate_tag_size(key, value, max_length):
+    if isinstance(value, (str, bytes)):
+        size = len(value) if max_length is None else min(len(value), max_length)
+    else:
+        size = _NON_STRING_TAG_VALUE_SIZE
+    return _TAG_SIZE + len(key) + size
+
+
+def estimate_span_size(span):
+    """
+    Estimate the serialized size of a finished Span from the lengths of its
+    strings, which is much cheaper than encoding it.
+    """
+    with span.update_lock:
+        tags = span.tags
+        logs = span.logs
+    # raw tags of lazy_tag_encoding spans are truncated when encoded,
+    # Thrift tags have already been
+    max_length = span.tracer.max_tag_value_length if span.lazy_tag_encoding else None
+    size = _SPAN_SIZE + len(span.operation_name) + \
+        _SPAN_REF_SIZE * len(span.references or ())
+    for tag in tags:
+        if isinstance(tag, ttypes.Tag):
+            size += _estimate_tag_size(tag.key, tag.vStr or tag.vBinary, None)
+        else:
+            size += _estimate_tag_size(tag[0], tag[1], max_length)
+    for log in logs:
+        size += _LOG_SIZE
+        if isinstance(log, ttypes.Log):
+            for tag in log.fields:
+                size += _estimate_tag_size(tag.key, tag.vStr or tag.vBinary, None)
+        else:
+            for key, value in log[1].items():
+                size += _estimate_tag_size(key, value, max_length)
+    return size
+
+
 def make_jaeger_batch(spans, process):
-    batch = ttypes.Batch(
-        spans=[],
+    return ttypes.Batch(
+        spans=[make_jaeger_span(span) for span in spans],
         process=process,
     )
-    for span in spans:
-        with span.update_lock:
-            jaeger_span = ttypes.Span(
-                traceIdLow=id_to_int(_id_to_low(span.trace_id)),
-                traceIdHigh=id_to_int(_id_to_high(span.trace_id)),
-                spanId=id_to_int(span.span_id),
-                parentSpanId=id_to_int(span.parent_id) or 0,
-                operationName=span.operation_name,
-                references=make_references(span.references),
-                flags=span.context.flags,
-                startTime=timestamp_micros(span.start_time),
-                duration=timestamp_micros(span.end_time - span.start_time),
-                tags=span.tags,  # TODO
-                logs=span.logs,  # TODO
-            )
-        batch.spans.append(jaeger_span)
-    return batch
+
+
+def make_emit_batch_message(batch, seqid=0):
+    """
+    Serialize a one-way Agent.emitBatch call, the payload of a single UDP
+    packet sent to jaeger-agent.
+
+    :param batch: ttypes.Batch to submit
+    :param seqid: Thrift message sequence ID
+    :return: bytes of the message in Thrift compact protocol
+    """
+    # emitBatch_args is a struct with the batch as its only field
+    return b''.join([
+        _make_message_header(seqid),
+        _EMIT_BATCH_ARGS_BATCH_FIELD,
+        thrift_compact.encode_batch(batch),
+        _STOP_FIELD,
+    ])
+
+
+def serialize_span(span):
+    """
+    Serialize a single ttypes.Span in Thrift compact protocol. The result
+    is byte-for-byte what the span occupies inside an emitBatch message.
+    """
+    return thrift_compact.encode_span(span)
+
+
+def _deserialize(obj, data):
+    obj.read(TCompactProtocol.TCompactProtocol(TTransport.TMemoryBuffer(data)))
+    return obj
+
+
+def deserialize_span(data):
+    """Parse a ttypes.Span serialized with serialize_span()."""
+    return _deserialize(ttypes.Span(), data)
+
+
+def serialize_process(process):
+    """Serialize a ttypes.Process in Thrift compact protocol."""
+    buf = bytearray()
+    thrift_compact.write_process(buf, process)
+    return bytes(buf)
+
+
+def deserialize_process(data):
+    """Parse a ttypes.Process serialized with serialize_process()."""
+    return _deserialize(ttypes.Process(), data)
+
+
+def encode_span(span):
+    """
+    Convert a finished Span and serialize it with serialize_span(), so
+    that it can be put into emitBatch messages without keeping the Span
+    or an intermediate ttypes.Span around.
+    """
+    return serialize_span(make_jaeger_span(span))
+
+
+def _varint(n):
+    buf = bytearray()
+    while n > 0x7f:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+    return bytes(buf)
+
+
+# list headers of up to 14 elements fit into a single byte,
+# see TCompactProtocol.writeListBegin
+_SHORT_LIST_HEADERS = [
+    bytes([size << 4 | TCompactProtocol.CompactType.STRUCT]) for size in range(15)
+]
+_LONG_LIST_HEADER = bytes([0xf0 | TCompactProtocol.CompactType.STRUCT])
+
+
+def _compact_list_header(size):
+    if size < 15:
+        return _SHORT_LIST_HEADERS[size]
+    return _LONG_LIST_HEADER + _varint(size)
+
+
+def _encode_message_header(seqid):
+    buf = TTransport.TMemoryBuffer()
+    TCompactProtocol.TCompactProtocol(buf).writeMessageBegin(
+        'emitBatch', TMessageType.ONEWAY, seqid)
+    return buf.getvalue()
+
+
+# the seqid varint is the only part of the message header that changes,
+# it is preceded by the protocol id and version, and followed by the name
+_MESSAGE_HEADER_START = _encode_message_header(0)[:2]
+_MESSAGE_HEADER_END = _encode_message_header(0)[3:]
+
+
+def _make_message_header(seqid):
+    return _MESSAGE_HEADER_START + _varint(seqid) + _MESSAGE_HEADER_END
+
+
+EmitBatchFrame = namedtuple('EmitBatchFrame', ['process', 'prefix', 'suffix'])
+EmitBatchFrame.__doc__ = """
+Pre-encoded parts of an emitBatch message for a given Process: prefix
+holds everything between the message header and the elements of
+Batch.spans, including the Process struct, suffix holds the bytes
+after the spans.
+"""
+
+
+def make_emit_batch_frame(process):
+    """
+    Encode the parts of emitBatch messages that are the same for all
+    batches of process, so they can be reused by
+    make_emit_batch_message_from_spans().
+
+    :param process: ttypes.Process
+    :return: EmitBatchFrame
+    """
+    message = make_emit_batch_message(ttypes.Batch(process=process, spans=[]), 0)
+    header = _make_message_header(0)
+    # an empty list header is one byte, followed by the stop fields
+    # of the Batch and emitBatch_args structs
+    return EmitBatchFrame(
+        process=process, prefix=message[len(header):-3], suffix=message[-2:])
+
+
+def make_emit_batch_message_from_spans(frame, serialized_spans, seqid=0):
+    """
+    Assemble an emitBatch message from spans already serialized with
+    serialize_span(). Equivalent to, but cheaper than, building a
+    ttypes.Batch of the same spans and calling make_emit_batch_message().
+
+    :param frame: EmitBatchFrame of the Process the spans belong to
+    """
+    parts = [
+        _make_message_header(seqid),
+        frame.prefix,
+        _compact_list_header(len(serialized_spans)),
+    ]
+    parts.extend(serialized_spans)
+    parts.append(frame.suffix)
+    return b''.join(parts)
+
+
+def emit_batch_overhead(frame):
+    """
+    Returns the max size of an emitBatch message, excluding the spans
+    themselves.
+
+    :param frame: EmitBatchFrame of the Process the spans belong to
+    """
+    # varints of seqid and of the spans list size take up to 5 bytes each
+    return len(_make_message_header(0)) + len(frame.prefix) + len(frame.suffix) + 4 + 6
+
+
+def split_by_size(items, sizes, max_size):
+    """
+    Split items into consecutive groups with sum of sizes not exceeding
+    max_size.
+
+    :return: tuple (groups, oversized), where oversized are the items
+        that do not fit max_size on their own
+    """
+    groups = []
+    oversized = []
+    group = []
+    group_size = 0
+    for item, size in zip(items, sizes):
+        if size > max_size:
+            oversized.append(item)
+            continue
+        if group and group_size + size > max_size:
+            groups.append(group)
+            group = []
+            group_size = 0
+        group.append(item)
+        group_size += size
+    if group:
+        groups.append(group)
+    return groups, oversized
 
 
 def parse_sampling_strategy(response):
@@ -0,0 +1,242 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Specialised Thrift compact protocol encoder for the structs in jaeger.thrift.
+
+The generated ttypes write() methods go through TCompactProtocol one
+method call per field. The functions below write the same bytes directly
+into a bytearray, and must stay wire-compatible with the generated code:
+fields set to None are skipped, lists of structs use the compact list
+header, bools are folded into the field header.
+
+When the C extension of the thrift package (fastbinary) is available,
+encode_span() and encode_batch() use it instead, and fall back to the
+pure-Python writers otherwise. ACCELERATED tells which one is active.
+"""
+
+import struct
+
+from thrift.Thrift import TType
+
+import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
+
+try:
+    from thrift.protocol import fastbinary
+except ImportError:  # pragma: no cover
+    fastbinary = None
+
+# see TCompactProtocol.CompactType
+_BOOL_TRUE = 0x01
+_BOOL_FALSE = 0x02
+_I32 = 0x05
+_I64 = 0x06
+_DOUBLE = 0x07
+_BINARY = 0x08
+_LIST = 0x09
+_STRUCT = 0x0C
+
+_pack_double = struct.Struct('<d').pack
+
+
+def _write_varint(buf, n):
+    while n > 0x7f:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _write_field_header(buf, field_type, fid, last_fid):
+    delta = fid - last_fid
+    if 0 < delta <= 15:
+        buf.append(delta << 4 | field_type)
+    else:
+        buf.append(field_type)
+        _write_varint(buf, (fid << 1) ^ (fid >> 15))
+    return fid
+
+
+def _write_i32_field(buf, fid, last_fid, value):
+    _write_field_header(buf, _I32, fid, last_fid)
+    _write_varint(buf, (value << 1) ^ (value >> 31))
+    return fid
+
+
+def _write_i64_field(buf, fid, last_fid, value):
+    _write_field_header(buf, _I64, fid, last_fid)
+    _write_varint(buf, (value << 1) ^ (value >> 63))
+    return fid
+
+
+def _write_string_field(buf, fid, last_fid, value):
+    _write_field_header(buf, _BINARY, fid, last_fid)
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    _write_varint(buf, len(value))
+    buf += value
+    return fid
+
+
+def _write_list_field(buf, fid, last_fid, items, write_item):
+    _write_field_header(buf, _LIST, fid, last_fid)
+    size = len(items)
+    if size < 15:
+        buf.append(size << 4 | _STRUCT)
+    else:
+        buf.append(0xf0 | _STRUCT)
+        _write_varint(buf, size)
+    for item in items:
+        write_item(buf, item)
+    return fid
+
+
+def write_tag(buf, tag):
+    last = 0
+    if tag.key is not None:
+        last = _write_string_field(buf, 1, last, tag.key)
+    if tag.vType is not None:
+        last = _write_i32_field(buf, 2, last, tag.vType)
+    if tag.vStr is not None:
+        last = _write_string_field(buf, 3, last, tag.vStr)
+    if tag.vDouble is not None:
+        last = _write_field_header(buf, _DOUBLE, 4, last)
+        buf += _pack_double(tag.vDouble)
+    if tag.vBool is not None:
+        last = _write_field_header(buf, _BOOL_TRUE if tag.vBool else _BOOL_FALSE, 5, last)
+    if tag.vLong is not None:
+        last = _write_i64_field(buf, 6, last, tag.vLong)
+    if tag.vBinary is not None:
+        last = _write_string_field(buf, 7, last, tag.vBinary)
+    buf.append(0)
+
+
+def write_log(buf, log):
+    last = 0
+    if log.timestamp is not None:
+        last = _write_i64_field(buf, 1, last, log.timestamp)
+    if log.fields is not None:
+        last = _write_list_field(buf, 2, last, log.fields, write_tag)
+    buf.append(0)
+
+
+def write_span_ref(buf, ref):
+    last = 0
+    if ref.refType is not None:
+        last = _write_i32_field(buf, 1, last, ref.refType)
+    if ref.traceIdLow is not None:
+        last = _write_i64_field(buf, 2, last, ref.traceIdLow)
+    if ref.traceIdHigh is not None:
+        last = _write_i64_field(buf, 3, last, ref.traceIdHigh)
+    if ref.spanId is not None:
+        last = _write_i64_field(buf, 4, last, ref.spanId)
+    buf.append(0)
+
+
+def write_span(buf, span):
+    last = 0
+    if span.traceIdLow is not None:
+        last = _write_i64_field(buf, 1, last, span.traceIdLow)
+    if span.traceIdHigh is not None:
+        last = _write_i64_field(buf, 2, last, span.traceIdHigh)
+    if span.spanId is not None:
+        last = _write_i64_field(buf, 3, last, span.spanId)
+    if span.parentSpanId is not None:
+        last = _write_i64_field(buf, 4, last, span.parentSpanId)
+    if span.operationName is not None:
+        last = _write_string_field(buf, 5, last, span.operationName)
+    if span.references is not None:
+        last = _write_list_field(buf, 6, last, span.references, write_span_ref)
+    if span.flags is not None:
+        last = _write_i32_field(buf, 7, last, span.flags)
+    if span.startTime is not None:
+        last = _write_i64_field(buf, 8, last, span.startTime)
+    if span.duration is not None:
+        last = _write_i64_field(buf, 9, last, span.duration)
+    if span.tags is not None:
+        last = _write_list_field(buf, 10, last, span.tags, write_tag)
+    if span.logs is not None:
+        last = _write_list_field(buf, 11, last, span.logs, write_log)
+    buf.append(0)
+
+
+def write_process(buf, process):
+    last = 0
+    if process.serviceName is not None:
+        last = _write_string_field(buf, 1, last, process.serviceName)
+    if process.tags is not None:
+        last = _write_list_field(buf, 2, last, process.tags, write_tag)
+    buf.append(0)
+
+
+def write_batch(buf, batch):
+    last = 0
+    if batch.process is not None:
+        last = _write_field_header(buf, _STRUCT, 1, last)
+        write_process(buf, batch.process)
+    if batch.spans is not None:
+        last = _write_list_field(buf, 2, last, batch.spans, write_span)
+    buf.append(0)
+
+
+def _fastbinary_type_args(ttype, args):
+    if ttype == TType.STRUCT:
+        return fastbinary_spec(args[0])
+    if ttype in (TType.LIST, TType.SET):
+        elem_type, elem_args = args
+        return (elem_type, _fastbinary_type_args(elem_type, elem_args), False)
+    return args
+
+
+def fastbinary_spec(cls):
+    """
+    Returns the type spec of a generated struct class in the format the
+    fastbinary encoders expect. The generated code in thrift_gen predates
+    that format, so its own thrift_spec cannot be passed in as is.
+    """
+    return [cls, tuple(
+        None if field is None else
+        field[:3] + (_fastbinary_type_args(field[1], field[3]),) + field[4:]
+        for field in cls.thrift_spec
+    )]
+
+
+ACCELERATED = fastbinary is not None
+
+if ACCELERATED:
+    _span_spec = fastbinary_spec(ttypes.Span)
+    _batch_spec = fastbinary_spec(ttypes.Batch)
+
+
+def encode_span(span):
+    """
+    :param span: ttypes.Span
+    :return: bytes of span in Thrift compact protocol
+    """
+    if ACCELERATED:
+        return fastbinary.encode_compact(span, _span_spec)
+    buf = bytearray()
+    write_span(buf, span)
+    return bytes(buf)
+
+
+def encode_batch(batch):
+    """
+    :param batch: ttypes.Batch
+    :return: bytes of batch in Thrift compact protocol
+    """
+    if ACCELERATED:
+        return fastbinary.encode_compact(batch, _batch_spec)
+    buf = bytearray()
+    write_batch(buf, batch)
+    return bytes(buf)
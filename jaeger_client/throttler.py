@@ -14,6 +14,7 @@
 
 import json
 import logging
+import os
 import random
 from threading import Lock
 from typing import Any, Optional
@@ -22,7 +23,7 @@ from tornado.ioloop import PeriodicCallback
 
 from .constants import DEFAULT_THROTTLER_REFRESH_INTERVAL
 from .metrics import Metrics, MetricsFactory
-from .utils import ErrorReporter
+from .utils import ErrorReporter, register_after_fork
 
 MINIMUM_CREDITS = 1.0
 default_logger = logging.getLogger('jaeger_tracing')
@@ -72,13 +73,41 @@ class RemoteThrottler(Throttler):
         self.running = True
         self.periodic = None
 
-        if not self.channel.io_loop:
+        self._io_loop = self.channel.io_loop
+        if not self._io_loop:
             self.logger.error(
                 'Cannot acquire IOLoop, throttler will not be updated')
         else:
-            self.channel.io_loop.add_callback(self._init_polling)
+            self._io_loop.add_callback(self._init_polling)
+        self._pid = os.getpid()
+        register_after_fork(self)
+
+    def _after_fork_in_child(self):
+        # Credits were granted to the parent, and the tracer sets a new
+        # client ID for the child. Polling is restarted by
+        # _restart_after_fork().
+        self.lock = Lock()
+        self.client_id = None
+        self.credits = {}
+
+    def _restart_after_fork(self):
+        # called on the first use of the throttler in a forked child
+        with self.lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # starts the IOLoop thread of the channel in the child
+            io_loop = self.channel.io_loop
+            if io_loop is self._io_loop:
+                return
+            self.periodic = None
+            self._io_loop = io_loop
+            if self.running and self._io_loop:
+                self._io_loop.add_callback(self._init_polling)
 
     def is_allowed(self, operation: str) -> bool:
+        if self._pid != os.getpid():
+            self._restart_after_fork()
         with self.lock:
             if operation not in self.credits:
                 self.credits[operation] = 0.0
@@ -120,13 +149,7 @@ class RemoteThrottler(Throttler):
             return self.credits.keys()
 
     def _delayed_polling(self):
-        def callback():
-            self._fetch_credits(self._operations())
-
-        periodic = PeriodicCallback(
-            callback=callback,
-            # convert interval to milliseconds
-            callback_time=self.refresh_interval * 1000)
+        periodic = self._create_periodic_callback()
         self._fetch_credits(self._operations())
         with self.lock:
             if not self.running:
@@ -137,6 +160,15 @@ class RemoteThrottler(Throttler):
                 'Throttling client started with refresh interval %d sec',
                 self.refresh_interval)
 
+    def _create_periodic_callback(self):
+        return PeriodicCallback(
+            callback=self._poll_credits,
+            # convert interval to milliseconds
+            callback_time=self.refresh_interval * 1000)
+
+    def _poll_credits(self):
+        self._fetch_credits(self._operations())
+
     def _fetch_credits(self, operations):
         if not operations:
             return
@@ -28,16 +28,15 @@ from opentracing.ext import tags as ext_tags
 from opentracing.scope_managers import ThreadLocalScopeManager, ScopeManager
 from opentracing.tracer import Reference
 
-from tornado.concurrent import Future
 
 from . import constants
 from .codecs import TextCodec, ZipkinCodec, ZipkinSpanFormat, BinaryCodec, Codec
-from .span import Span, SAMPLED_FLAG, DEBUG_FLAG
+from .span import Span, UnsampledSpan, SAMPLED_FLAG, DEBUG_FLAG
 from .span_context import SpanContext
 from .metrics import Metrics, LegacyMetricsFactory, MetricsFactory
-from .utils import local_ip
+from .utils import local_ip, register_after_fork
 from .sampler import Sampler
-from .reporter import BaseReporter
+from .reporter import BaseReporter, ReporterFuture
 from .throttler import Throttler
 
 logger = logging.getLogger('jaeger_tracing')
@@ -65,6 +64,7 @@ class Tracer(opentracing.Tracer):
         max_traceback_length: int = constants.MAX_TRACEBACK_LENGTH,
         throttler: Optional[Throttler] = None,
         scope_manager: Optional[ScopeManager] = None,
+        lazy_tag_encoding: bool = False,
     ) -> None:
         self.service_name = service_name
         self.reporter = reporter
@@ -76,6 +76,7 @@ class Tracer(opentracing.Tracer):
         self.one_span_per_rpc = one_span_per_rpc
         self.max_tag_value_length = max_tag_value_length
         self.max_traceback_length = max_traceback_length
+        self.lazy_tag_encoding = lazy_tag_encoding
         self.max_trace_id_bits = constants._max_trace_id_bits if generate_128bit_trace_id \
             else constants._max_id_bits
         self.codecs = {
@@ -127,6 +128,21 @@ class Tracer(opentracing.Tracer):
         super(Tracer, self).__init__(
             scope_manager=scope_manager or ThreadLocalScopeManager()
         )
+        register_after_fork(self)
+
+    def _after_fork_in_child(self):
+        # the generator state was copied from the parent, every child would
+        # generate the same IDs
+        self.random.seed()
+        if self.throttler:
+            client_id = random.randint(0, sys.maxsize)
+            self.throttler.set_client_id(client_id)
+            self.tags[constants.CLIENT_UUID_TAG_KEY] = client_id
+            self.reporter.set_process(
+                service_name=self.service_name,
+                tags=self.tags,
+                max_length=self.max_tag_value_length,
+            )
 
     def start_span(self,
                    operation_name: Optional[str] = None,
@@ -211,14 +227,26 @@ class Tracer(opentracing.Tracer):
                 span_id = self._random_id(constants._max_id_bits)
                 parent_id = parent.span_id
             flags = parent.flags
-            baggage = dict(parent.baggage)  # TODO do we need to clone?
+            if flags & SAMPLED_FLAG:
+                baggage = dict(parent.baggage)  # TODO do we need to clone?
+            else:
+                # with_baggage_item() copies on write, so it is safe to share
+                baggage = parent.baggage
 
         span_ctx = SpanContext(trace_id=trace_id, span_id=span_id,
                                parent_id=parent_id, flags=flags,
                                baggage=baggage)
-        span = Span(context=span_ctx, tracer=self,
-                    operation_name=operation_name or '',
-                    tags=tags, start_time=start_time, references=valid_references)
+        if flags & SAMPLED_FLAG or (tags and ext_tags.SAMPLING_PRIORITY in tags):
+            span = Span(context=span_ctx, tracer=self,
+                        operation_name=operation_name or '',
+                        tags=tags, start_time=start_time, references=valid_references,
+                        lazy_tag_encoding=self.lazy_tag_encoding)
+        else:
+            # tags of a span that is not sampled are discarded anyway
+            span = UnsampledSpan(context=span_ctx, tracer=self,
+                                 operation_name=operation_name or '',
+                                 start_time=start_time, references=valid_references,
+                                 lazy_tag_encoding=self.lazy_tag_encoding)
 
         self._emit_span_metrics(span=span, join=rpc_server)
 
@@ -282,12 +310,13 @@ class Tracer(opentracing.Tracer):
             raise UnsupportedFormatException(format)
         return codec.extract(carrier)
 
-    def close(self) -> Future:
+    def close(self) -> ReporterFuture:
         """
         Perform a clean shutdown of the tracer, flushing any traces that
         may be buffered in memory.
 
-        :return: Returns a tornado.concurrent.Future that indicates if the
+        :return: Returns the Future returned by close() of the reporter,
+            a tornado.concurrent.Future for Reporter, that indicates if the
             flush has been completed.
         """
         self.sampler.close()
@@ -12,13 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
+import logging
+import os
 import socket
 import struct
+import weakref
 from logging import Logger
 
 import time
 from typing import Any, Optional
 
+default_logger = logging.getLogger('jaeger_tracing')
+
 
 class ErrorReporter(object):
     """
@@ -50,6 +56,56 @@ class ErrorReporter(object):
         self._last_error_reported_at = current_time
 
 
+# objects to reinitialize in a child process after os.fork(), by the order
+# in which they were registered
+_fork_handlers: 'weakref.WeakValueDictionary[int, Any]' = weakref.WeakValueDictionary()
+_fork_handler_order = itertools.count()
+
+
+def register_after_fork(obj: Any) -> None:
+    """
+    Call obj._after_fork_in_child() in the child process after os.fork(),
+    for as long as obj is alive, in the order objects were registered.
+    Handlers run before the child does anything else, so they only reset
+    state, e.g. locks held by threads of the parent. Threads are started
+    again on first use in the child.
+    """
+    _fork_handlers[next(_fork_handler_order)] = obj
+
+
+def _after_fork_in_child():
+    for key in sorted(_fork_handlers.keys()):
+        obj = _fork_handlers.get(key)
+        if obj is None:
+            continue
+        try:
+            obj._after_fork_in_child()
+        except Exception:
+            default_logger.exception('Failed to reinitialize %r after fork', obj)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def process_exists(pid: int) -> bool:
+    """
+    Whether a process with pid exists, a process that has exited but has
+    not been waited for yet included. Always true where os.kill() cannot
+    check it without signalling the process.
+    """
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # it exists, but belongs to another user
+        return True
+    return True
+
+
 def get_boolean(string: str, default: bool) -> bool:
     string = str(string).lower()
     if string in ['false', '0', 'none']:
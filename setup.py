@@ -47,6 +47,11 @@ setup(
     # dependency_links=[
     #     'git+ssh://git@github.com/opentracing/opentracing-python.git@BRANCHNAME#egg=opentracing',
     # ],
+    entry_points={
+        'console_scripts': [
+            'jaeger-ring-shipper = jaeger_client.shipper:main',
+        ],
+    },
     test_suite='tests',
     extras_require={
         'tests': [
@@ -13,11 +13,13 @@
 # limitations under the License.
 
 import socket
+import time
 import unittest
 from unittest import mock
 
 import pytest
 
+from jaeger_client import sendmmsg
 from jaeger_client.TUDPTransport import TUDPTransport
 
 
@@ -82,3 +84,115 @@ def test_created_socket_specified_family(addrinfo, expected_family):
         transport = TUDPTransport('ipv6-host', 12345)
         sock = transport._create_socket()
         assert sock.family == expected_family
+
+
+def _wait_for(fn):
+    for _ in range(100):
+        if fn():
+            return
+        time.sleep(0.01)
+
+
+def test_write_uses_connected_socket():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    server.settimeout(1)
+    try:
+        with mock.patch('socket.getaddrinfo', wraps=socket.getaddrinfo) as getaddrinfo:
+            transport = TUDPTransport('localhost', server.getsockname()[1], blocking=True)
+            for _ in range(3):
+                transport.write(b'hello')
+        assert getaddrinfo.call_count == 1, 'resolved only once'
+        assert transport.transport_sock.getpeername()[1] == server.getsockname()[1]
+        assert server.recv(100) == b'hello'
+    finally:
+        server.close()
+        transport.close()
+
+
+def test_write_resolves_again_after_interval():
+    servers = []
+    for _ in range(2):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(1)
+        servers.append(server)
+    addrinfo = [(socket.AF_INET, socket.SOCK_DGRAM, 17, '', servers[0].getsockname())]
+    try:
+        with mock.patch('socket.getaddrinfo', side_effect=lambda *args, **kwargs: addrinfo):
+            transport = TUDPTransport('agent', 6831, blocking=True, resolve_interval=0.01)
+            transport.write(b'first')
+            assert servers[0].recv(100) == b'first'
+
+            # the agent moved to another address
+            addrinfo = [(socket.AF_INET, socket.SOCK_DGRAM, 17, '', servers[1].getsockname())]
+            time.sleep(0.02)
+            transport.write(b'second')  # still sent to the old address
+            _wait_for(lambda: transport._next_addrinfo is not None)
+            transport.write(b'third')
+        assert servers[0].recv(100) == b'second'
+        assert servers[1].recv(100) == b'third'
+    finally:
+        for server in servers:
+            server.close()
+        transport.close()
+
+
+def test_write_backs_off_when_agent_is_down():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    server.close()
+
+    transport = TUDPTransport('127.0.0.1', port, blocking=True, resolve_interval=None)
+    with pytest.raises(ConnectionRefusedError):
+        # ICMP port unreachable from the first packet fails a later send
+        for _ in range(10):
+            transport.write(b'hello')
+            time.sleep(0.01)
+    with mock.patch.object(transport, 'transport_sock') as sock:
+        with pytest.raises(ConnectionRefusedError):
+            transport.write(b'hello')
+        assert not sock.send.called, 'no packets are sent while backing off'
+    transport._backoff_until = time.monotonic() - 1
+    _wait_for(lambda: not transport._resolving)
+    transport.write(b'hello')
+    transport.close()
+
+
+@pytest.mark.parametrize('supported', [True, False])
+def test_write_many(supported):
+    if supported and not sendmmsg.SUPPORTED:
+        pytest.skip('sendmmsg is not available')
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    server.settimeout(1)
+    transport = TUDPTransport('127.0.0.1', server.getsockname()[1], blocking=True)
+    try:
+        with mock.patch.object(sendmmsg, 'SUPPORTED', supported):
+            packets = [b'a', b'bb', b'c' * 60000]
+            assert transport.write_many(packets) == 3
+        assert [server.recv(65536) for _ in packets] == packets
+    finally:
+        server.close()
+        transport.close()
+
+
+def test_write_many_backs_off_when_agent_is_down():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    server.close()
+
+    transport = TUDPTransport('127.0.0.1', port, blocking=True, resolve_interval=None)
+    transport.write(b'hello')
+    time.sleep(0.01)
+    # ICMP port unreachable from the first packet fails the whole call
+    with pytest.raises(ConnectionRefusedError):
+        transport.write_many([b'hello', b'world'])
+    assert transport._backoff_until
+    with mock.patch.object(transport, 'transport_sock') as sock:
+        with pytest.raises(ConnectionRefusedError):
+            transport.write_many([b'hello', b'world'])
+        assert not sock.fileno.called and not sock.send.called
+    transport.close()
@@ -0,0 +1,135 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import socket
+
+import pytest
+
+from jaeger_client.constants import DEFAULT_MAX_UNIX_PACKET_SIZE
+from jaeger_client.local_agent_net import LocalAgentSender
+from jaeger_client.TUnixDatagramTransport import TUnixDatagramTransport
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                                reason='Unix domain sockets are not supported')
+
+
+def _bind(path):
+    """Start a stand-in for an agent listening on a Unix datagram socket."""
+    receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    receiver.bind(path)
+    receiver.settimeout(1)
+    return receiver
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / 'agent.sock')
+
+
+def test_write_large_datagram(socket_path):
+    receiver = _bind(socket_path)
+    transport = TUnixDatagramTransport(socket_path, blocking=True)
+    try:
+        transport.write(b'hello')
+        assert receiver.recv(100) == b'hello'
+        data = os.urandom(DEFAULT_MAX_UNIX_PACKET_SIZE)
+        transport.write(data)
+        assert receiver.recv(2 * DEFAULT_MAX_UNIX_PACKET_SIZE) == data
+    finally:
+        transport.close()
+        receiver.close()
+
+
+def test_write_backpressure(socket_path):
+    receiver = _bind(socket_path)
+    transport = TUnixDatagramTransport(socket_path, send_buffer_size=4096)
+    try:
+        with pytest.raises(BlockingIOError):
+            for _ in range(10000):
+                transport.write(b'x' * 1000)
+        assert transport.backpressure_count == 1
+        # once the receiver catches up, writes succeed again
+        receiver.setblocking(False)
+        try:
+            while receiver.recv(2000):
+                pass
+        except BlockingIOError:
+            pass
+        transport.write(b'x')
+    finally:
+        transport.close()
+        receiver.close()
+
+
+def test_write_many(socket_path):
+    receiver = _bind(socket_path)
+    transport = TUnixDatagramTransport(socket_path, blocking=True)
+    try:
+        packets = [b'a', b'bb', os.urandom(DEFAULT_MAX_UNIX_PACKET_SIZE)]
+        assert transport.write_many(packets) == 3
+        assert [receiver.recv(2 * DEFAULT_MAX_UNIX_PACKET_SIZE) for _ in packets] == packets
+    finally:
+        transport.close()
+        receiver.close()
+
+
+def test_write_many_backpressure(socket_path):
+    receiver = _bind(socket_path)
+    transport = TUnixDatagramTransport(socket_path, send_buffer_size=4096)
+    try:
+        sent = transport.write_many([b'x' * 1000] * 100)
+        assert 0 < sent < 100, 'stops at the first datagram that would block'
+        with pytest.raises(BlockingIOError):
+            transport.write_many([b'x' * 1000] * 100)
+        assert transport.backpressure_count >= 1
+    finally:
+        transport.close()
+        receiver.close()
+
+
+def test_write_reconnects(socket_path):
+    # the agent is not up yet
+    transport = TUnixDatagramTransport(socket_path, blocking=True)
+    with pytest.raises(FileNotFoundError):
+        transport.write(b'lost')
+
+    receiver = _bind(socket_path)
+    transport.write(b'first')
+    assert receiver.recv(100) == b'first'
+
+    # the agent restarts and re-creates its socket
+    receiver.close()
+    os.unlink(socket_path)
+    with pytest.raises(ConnectionRefusedError):
+        transport.write(b'lost')
+    receiver = _bind(socket_path)
+    transport.write(b'second')
+    assert receiver.recv(100) == b'second'
+    transport.close()
+    receiver.close()
+    assert not transport.isOpen()
+
+
+def test_local_agent_sender_reporting_socket(socket_path):
+    receiver = _bind(socket_path)
+    sender = LocalAgentSender(host='localhost', sampling_port=5778, reporting_port=6831,
+                              reporting_socket=socket_path)
+    try:
+        assert isinstance(sender._TBufferedTransport__trans, TUnixDatagramTransport)
+        sender.write(b'hello')
+        sender.flush()
+        assert receiver.recv(100) == b'hello'
+    finally:
+        receiver.close()
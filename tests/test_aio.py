@@ -0,0 +1,196 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import socket
+
+from jaeger_client.aio import (
+    AsyncioLocalAgentSender,
+    AsyncioReporter,
+    AsyncioRemoteControlledSampler,
+    AsyncioRemoteThrottler,
+)
+from jaeger_client.sampler import ProbabilisticSampler
+from tests import test_reporter
+from tests.test_local_agent_net import test_credits
+from tests.test_reporter import FakeMetricsFactory, _decode_batch
+
+test_strategy = """
+    {
+        "strategyType": "PROBABILISTIC",
+        "probabilisticSampling":
+        {
+            "samplingRate": 0.002
+        }
+    }
+"""
+
+
+def _new_span(name):
+    return test_reporter.ReporterTest._new_span(name)
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def _wait_for(fn):
+    """Wait until fn() returns truth, but not longer than 1 second."""
+    for _ in range(1000):
+        if fn():
+            return
+        await asyncio.sleep(0.001)
+
+
+async def _start_agent(requests):
+    """Start a stand-in for the jaeger-agent HTTP endpoints."""
+    async def handle(reader, writer):
+        request = await reader.readuntil(b'\r\n\r\n')
+        path = request.split(b' ')[1].decode('utf-8')
+        requests.append(path)
+        body = test_credits if path.startswith('/credits') else test_strategy
+        writer.write(b'HTTP/1.0 200 OK\r\n\r\n' + body.encode('utf-8'))
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_asyncio_reporter():
+    async def run():
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.setblocking(False)
+        sender = AsyncioLocalAgentSender(
+            host='127.0.0.1', sampling_port=5778,
+            reporting_port=sock.getsockname()[1], loop=loop)
+        reporter = AsyncioReporter(
+            sender, batch_size=2, flush_interval=None,
+            metrics_factory=FakeMetricsFactory())
+        reporter.set_process('service', {}, max_length=0)
+        try:
+            for i in range(3):
+                reporter.report_span(_new_span('%s' % i))
+            batch = _decode_batch(await asyncio.wait_for(loop.sock_recv(sock, 65536), 1))
+            assert ['0', '1'] == [span.operationName for span in batch.spans]
+
+            await asyncio.wrap_future(reporter.close())
+            batch = _decode_batch(await asyncio.wait_for(loop.sock_recv(sock, 65536), 1))
+            assert ['2'] == [span.operationName for span in batch.spans]
+
+            counters = reporter.metrics_factory.counters
+            assert 3 == counters['jaeger:reporter_spans.result_ok']
+            reporter.report_span(_new_span('3'))
+            assert 1 == counters['jaeger:reporter_spans.result_dropped']
+        finally:
+            sender.close()
+            sock.close()
+
+    _run(run())
+
+
+def test_asyncio_reporter_flush_interval():
+    async def run():
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.setblocking(False)
+        sender = AsyncioLocalAgentSender(
+            host='127.0.0.1', sampling_port=5778,
+            reporting_port=sock.getsockname()[1], loop=loop)
+        reporter = AsyncioReporter(sender, batch_size=10, flush_interval=0.01)
+        reporter.set_process('service', {}, max_length=0)
+        try:
+            reporter.report_span(_new_span('1'))
+            batch = _decode_batch(await asyncio.wait_for(loop.sock_recv(sock, 65536), 1))
+            assert 1 == len(batch.spans)
+            await asyncio.wrap_future(reporter.close())
+        finally:
+            sender.close()
+            sock.close()
+
+    _run(run())
+
+
+def test_asyncio_reporter_created_outside_of_loop():
+    loop = asyncio.new_event_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.setblocking(False)
+    sender = AsyncioLocalAgentSender(
+        host='127.0.0.1', sampling_port=5778,
+        reporting_port=sock.getsockname()[1], loop=loop)
+    reporter = AsyncioReporter(sender, batch_size=1, flush_interval=None)
+    reporter.set_process('service', {}, max_length=0)
+
+    async def run():
+        reporter.report_span(_new_span('1'))
+        batch = _decode_batch(await asyncio.wait_for(loop.sock_recv(sock, 65536), 1))
+        assert ['1'] == [span.operationName for span in batch.spans]
+        await asyncio.wrap_future(reporter.close())
+
+    try:
+        loop.run_until_complete(run())
+    finally:
+        sender.close()
+        sock.close()
+        loop.close()
+
+
+def test_asyncio_remote_controlled_sampler():
+    async def run():
+        requests = []
+        server, port = await _start_agent(requests)
+        sender = AsyncioLocalAgentSender(
+            host='127.0.0.1', sampling_port=port, reporting_port=6831)
+        sampler = AsyncioRemoteControlledSampler(
+            channel=sender, service_name='svc', sampling_refresh_interval=0.01)
+        try:
+            await _wait_for(lambda: sampler.sampler == ProbabilisticSampler(0.002))
+            assert sampler.sampler == ProbabilisticSampler(0.002)
+            assert requests[0] == '/sampling?service=svc'
+            assert sampler.periodic.is_running()
+        finally:
+            sampler.close()
+            server.close()
+        assert not sampler.periodic.is_running()
+
+    _run(run())
+
+
+def test_asyncio_remote_throttler():
+    async def run():
+        requests = []
+        server, port = await _start_agent(requests)
+        sender = AsyncioLocalAgentSender(
+            host='127.0.0.1', sampling_port=port, reporting_port=6831,
+            throttling_port=port)
+        throttler = AsyncioRemoteThrottler(sender, 'svc', refresh_interval=0.01)
+        throttler.set_client_id(1)
+        assert not throttler.is_allowed('test-operation')
+        try:
+            await _wait_for(lambda: throttler.credits['test-operation'] >= 2.0)
+            assert requests[0] == '/credits?service=svc&uuid=1&operations=test-operation'
+            assert throttler.is_allowed('test-operation')
+        finally:
+            throttler.close()
+            server.close()
+
+    _run(run())
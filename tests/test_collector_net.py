@@ -0,0 +1,169 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from thrift.protocol.TBinaryProtocol import TBinaryProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
+from jaeger_client import thrift
+from jaeger_client.collector_net import HttpCollectorSender
+from jaeger_client.reporter import ThreadedReporter
+from tests import test_reporter
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.path, dict(self.headers), body))
+        time.sleep(self.server.delay)
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        # close the keep-alive connection without telling the client
+        self.close_connection = self.server.close_connections
+
+    def log_message(self, *args):
+        pass
+
+
+class CollectorServer(HTTPServer):
+    """A stand-in for jaeger-collector that records submitted batches."""
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), CollectorHandler)
+        self.requests = []
+        self.connections = 0
+        self.status = 202
+        self.delay = 0
+        self.close_connections = False
+
+    def process_request(self, request, client_address):
+        # serve each keep-alive connection from its own thread
+        self.connections += 1
+        t = threading.Thread(target=HTTPServer.process_request,
+                             args=(self, request, client_address), daemon=True)
+        t.start()
+
+    @property
+    def endpoint(self):
+        return 'http://127.0.0.1:%d/api/traces' % self.server_address[1]
+
+
+@pytest.fixture
+def collector():
+    server = CollectorServer()
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _make_batch(count):
+    spans = [test_reporter.ReporterTest._new_span('%s' % i) for i in range(count)]
+    process = thrift.make_process('service', {}, max_length=0)
+    return thrift.make_jaeger_batch(spans=spans, process=process)
+
+
+def _decode_batch(body):
+    batch = ttypes.Batch()
+    batch.read(TBinaryProtocol(TMemoryBuffer(body)))
+    return batch
+
+
+def test_http_collector_sender(collector):
+    sender = HttpCollectorSender(collector.endpoint)
+    # well beyond what fits in a UDP packet
+    batch = _make_batch(2000)
+    assert len(sender.serialize(batch)) > 65000
+    sender.send(batch)
+    sender.send(_make_batch(1))
+
+    assert len(collector.requests) == 2
+    assert collector.connections == 1, 'connection is kept alive'
+    path, headers, body = collector.requests[0]
+    assert path == '/api/traces'
+    assert headers['Content-Type'] == 'application/x-thrift'
+    decoded = _decode_batch(body)
+    assert decoded.process.serviceName == 'service'
+    assert len(decoded.spans) == 2000
+    sender.close()
+
+
+def test_http_collector_sender_gzip(collector):
+    sender = HttpCollectorSender(collector.endpoint, gzip_payload=True,
+                                 headers={'Authorization': 'Bearer x'})
+    sender.send(_make_batch(3))
+    _, headers, body = collector.requests[0]
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Authorization'] == 'Bearer x'
+    assert len(_decode_batch(gzip.decompress(body)).spans) == 3
+
+
+def test_http_collector_sender_error(collector):
+    collector.status = 500
+    sender = HttpCollectorSender(collector.endpoint)
+    with pytest.raises(IOError):
+        sender.send(_make_batch(1))
+
+
+def test_http_collector_sender_reconnects(collector):
+    collector.close_connections = True
+    sender = HttpCollectorSender(collector.endpoint)
+    sender.send(_make_batch(1))
+    # the server has closed the idle keep-alive connection
+    sender.send(_make_batch(1))
+    assert len(collector.requests) == 2
+    assert collector.connections == 2
+
+
+def test_http_collector_sender_does_not_resend_after_timeout(collector):
+    sender = HttpCollectorSender(collector.endpoint, timeout=0.1)
+    sender.send(_make_batch(1))
+    # the collector accepts the batch, but responds too late
+    collector.delay = 0.3
+    with pytest.raises(socket.timeout):
+        sender.send(_make_batch(1))
+    assert len(collector.requests) == 2
+    assert collector.connections == 1
+
+
+def test_http_collector_sender_bad_endpoint():
+    with pytest.raises(ValueError):
+        HttpCollectorSender('udp://localhost:6831')
+
+
+def test_threaded_reporter_with_collector(collector):
+    reporter = ThreadedReporter(
+        sender=HttpCollectorSender(collector.endpoint),
+        queue_capacity=200, batch_size=100)
+    reporter.set_process('service', {}, max_length=0)
+    for i in range(150):
+        reporter.report_span(test_reporter.ReporterTest._new_span('%s' % i))
+    assert reporter.close().result(timeout=1)
+    assert [100, 50] == [len(_decode_batch(body).spans)
+                         for _, _, body in collector.requests]
+
+
+def test_threaded_reporter_requires_one_destination():
+    with pytest.raises(ValueError):
+        ThreadedReporter()
@@ -40,6 +40,59 @@ class ConfigTests(unittest.TestCase):
         c = Config({}, service_name='x')
         assert c.reporter_batch_size == 10
 
+    def test_reporter_max_packet_size(self):
+        c = Config({'reporter_max_packet_size': 8000}, service_name='x', validate=True)
+        assert c.reporter_max_packet_size == 8000
+        c = Config({}, service_name='x')
+        assert c.reporter_max_packet_size == 65000
+
+    def test_reporter_queue_max_bytes(self):
+        c = Config({'reporter_queue_max_bytes': 1 << 20}, service_name='x', validate=True)
+        assert c.reporter_queue_max_bytes == 1 << 20
+        c = Config({}, service_name='x')
+        assert c.reporter_queue_max_bytes is None
+
+    def test_reporter_queue_full_policy(self):
+        c = Config({}, service_name='x')
+        assert c.reporter_queue_full_policy == 'drop_newest'
+        assert c.reporter_queue_block_timeout == 1
+        assert c.reporter_queue_sample_down_rate == 10
+        c = Config({'reporter_queue_full_policy': 'block',
+                    'reporter_queue_block_timeout': '0.5',
+                    'reporter_queue_sample_down_rate': 4}, service_name='x', validate=True)
+        assert c.reporter_queue_full_policy == 'block'
+        assert c.reporter_queue_block_timeout == 0.5
+        assert c.reporter_queue_sample_down_rate == 4
+
+    def test_reporter_priority_queue_size(self):
+        c = Config({}, service_name='x')
+        assert c.reporter_priority_queue_size == 0
+        c = Config({'reporter_priority_queue_size': 50}, service_name='x', validate=True)
+        assert c.reporter_priority_queue_size == 50
+
+    def test_reporter_spool(self):
+        c = Config({}, service_name='x')
+        assert c.reporter_spool_dir is None
+        assert c.reporter_spool_max_bytes == 64 * 1024 * 1024
+        c = Config({'reporter_spool_dir': '/var/spool/jaeger',
+                    'reporter_spool_max_bytes': '1024'}, service_name='x', validate=True)
+        assert c.reporter_spool_dir == '/var/spool/jaeger'
+        assert c.reporter_spool_max_bytes == 1024
+
+    def test_sampling_strategy_cache_dir(self):
+        c = Config({}, service_name='x')
+        assert c.sampling_strategy_cache_dir is None
+        c = Config({'sampling_strategy_cache_dir': '/run/jaeger'}, service_name='x',
+                   validate=True)
+        assert c.sampling_strategy_cache_dir == '/run/jaeger'
+
+    def test_sampling_rate_limiter_file(self):
+        c = Config({}, service_name='x')
+        assert c.sampling_rate_limiter_file is None
+        c = Config({'sampling_rate_limiter_file': '/dev/shm/jaeger-limits'}, service_name='x',
+                   validate=True)
+        assert c.sampling_rate_limiter_file == '/dev/shm/jaeger-limits'
+
     def test_tags(self):
         os.environ['JAEGER_TAGS'] = 'a=b,c=d'
         c = Config({'tags': {'e': 'f'}}, service_name='x')
@@ -119,6 +172,16 @@ class ConfigTests(unittest.TestCase):
         t = c.create_tracer(NullReporter(), ConstSampler(True))
         assert t.max_traceback_length == 333
 
+    def test_lazy_tag_encoding(self):
+        c = Config({}, service_name='x')
+        assert c.lazy_tag_encoding is False
+
+        c = Config({'lazy_tag_encoding': True}, service_name='x')
+        assert c.lazy_tag_encoding is True
+
+        t = c.create_tracer(NullReporter(), ConstSampler(True))
+        assert t.lazy_tag_encoding is True
+
     def test_propagation(self):
         c = Config({}, service_name='x')
         assert c.propagation == {}
@@ -183,6 +246,21 @@ class ConfigTests(unittest.TestCase):
         assert c.local_agent_reporting_port == 6831
         assert c.local_agent_enabled is True
 
+    def test_local_agent_reporting_resolve_interval(self):
+        c = Config({}, service_name='x')
+        assert c.local_agent_reporting_resolve_interval == 30
+        c = Config({'local_agent': {'reporting_resolve_interval': 0}}, service_name='x')
+        assert c.local_agent_reporting_resolve_interval == 0
+
+    def test_local_agent_reporting_socket(self):
+        c = Config({}, service_name='x')
+        assert c.local_agent_reporting_socket is None
+        assert c.reporter_max_packet_size == 65000
+        c = Config({'local_agent': {'reporting_socket': '/run/jaeger/agent.sock'}},
+                   service_name='x', validate=True)
+        assert c.local_agent_reporting_socket == '/run/jaeger/agent.sock'
+        assert c.reporter_max_packet_size == 256 * 1024
+
     def test_generate_128bit_trace_id(self):
         c = Config({}, service_name='x')
         assert c.generate_128bit_trace_id is False
@@ -14,8 +14,10 @@
 
 import time
 import mock
+import pytest
 
-from jaeger_client.rate_limiter import RateLimiter
+from jaeger_client.metrics import LegacyMetricsFactory, Metrics
+from jaeger_client.rate_limiter import RateLimiter, RateLimiterTable, SharedRateLimiter
 
 
 def test_rate_limiting_sampler():
@@ -82,3 +84,120 @@ def test_rate_limiting_sampler():
         assert rate_limiter.check_credit(1)
         rate_limiter.update(2.0, 2.0)
         assert rate_limiter.balance == 4.0 / 3.0
+
+
+def test_shared_rate_limiter(tmp_path):
+    path = str(tmp_path / 'limits')
+    # tables opened separately, as by different processes
+    table, other_table = RateLimiterTable(path, 'svc'), RateLimiterTable(path, 'svc')
+    ts = time.time()
+    with mock.patch('jaeger_client.rate_limiter.RateLimiter.timestamp') as mock_time, \
+            mock.patch('jaeger_client.rate_limiter.random.random', return_value=1.0):
+        mock_time.side_effect = lambda: ts
+        limiter = SharedRateLimiter(2, 2, table, 'op')
+        other_limiter = SharedRateLimiter(2, 2, other_table, 'op')
+        assert limiter.check_credit(1)
+        assert other_limiter.check_credit(1)
+        assert not limiter.check_credit(1), 'balance is shared'
+        assert not other_limiter.check_credit(1)
+
+        # another key, or another service, has a balance of its own
+        assert SharedRateLimiter(2, 2, table, 'other-op').check_credit(1)
+        assert SharedRateLimiter(2, 2, RateLimiterTable(path, 'other-svc'), 'op').check_credit(1)
+
+        mock_time.side_effect = lambda: ts + 0.5
+        assert other_limiter.check_credit(1)
+        assert not limiter.check_credit(1)
+
+        # the balance is capped at max_balance
+        mock_time.side_effect = lambda: ts + 10
+        limiter.update(1, 1)
+        assert limiter.check_credit(1)
+        assert not other_limiter.check_credit(1)
+    table.close()
+    other_table.close()
+
+
+def test_shared_rate_limiter_table_full(tmp_path):
+    table = RateLimiterTable(str(tmp_path / 'limits'), 'svc', slots=1)
+    ts = time.time()
+    with mock.patch('jaeger_client.rate_limiter.RateLimiter.timestamp') as mock_time, \
+            mock.patch('jaeger_client.rate_limiter.random.random', return_value=1.0):
+        mock_time.side_effect = lambda: ts
+        assert table.check_credit('a', 1, 1, 1, ts)
+        assert table.check_credit('b', 1, 1, 1, ts) is None
+        # falls back to a balance of its own
+        limiter = SharedRateLimiter(1, 1, table, 'b')
+        assert limiter.check_credit(1)
+        assert not limiter.check_credit(1)
+    table.close()
+
+
+def test_rate_limiter_table_reuses_stale_slot(tmp_path):
+    fallbacks = {}
+
+    def count(name, value):
+        fallbacks[name] = fallbacks.get(name, 0) + value
+
+    path = str(tmp_path / 'limits')
+    table = RateLimiterTable(path, 'svc', slots=1, slot_ttl=60,
+                             metrics_factory=LegacyMetricsFactory(Metrics(count=count)))
+    other = RateLimiterTable(path, 'svc', slots=1, slot_ttl=60)
+    ts = time.time()
+    with mock.patch('jaeger_client.rate_limiter.random.random', return_value=1.0):
+        assert table.check_credit('a', 1, 1, 1, ts)
+        assert table.check_credit('b', 1, 1, 1, ts + 30) is None
+        assert fallbacks == {'jaeger:rate_limiter_fallbacks': 1}
+        # the table is not scanned again right away
+        with mock.patch.object(table, '_find_slot') as find_slot:
+            assert table.check_credit('b', 1, 1, 1, ts + 30.5) is None
+            assert not find_slot.called
+        assert fallbacks == {'jaeger:rate_limiter_fallbacks': 2}
+
+        # 'a' has not been used for longer than slot_ttl
+        assert other.check_credit('b', 1, 1, 1, ts + 61)
+        assert not other.check_credit('b', 1, 1, 1, ts + 61)
+        # the slot of 'a' was taken over, and the table is full again
+        assert table.check_credit('a', 1, 1, 1, ts + 62) is None
+        assert fallbacks == {'jaeger:rate_limiter_fallbacks': 3}
+        # 'b' now shares the bucket of the other process
+        assert table.check_credit('b', 1, 1, 1, ts + 62)
+        assert not other.check_credit('b', 1, 1, 1, ts + 62)
+    table.close()
+    other.close()
+
+
+def test_rate_limiter_table_leases_credits(tmp_path):
+    path = str(tmp_path / 'limits')
+    table = RateLimiterTable(path, 'svc', lease_fraction=0.1)
+    other = RateLimiterTable(path, 'svc')
+    ts = time.time()
+    with mock.patch('jaeger_client.rate_limiter.random.random', return_value=1.0), \
+            mock.patch('jaeger_client.rate_limiter.fcntl.lockf') as lockf:
+        for _ in range(100):
+            assert table.check_credit('a', 1, 100, 100, ts)
+        # the slot was claimed, and 10 leases of 10 credits taken
+        assert 2 + 10 * 2 == lockf.call_count
+        assert not other.check_credit('a', 1, 100, 100, ts), 'all credits were leased'
+
+        lockf.reset_mock()
+        assert not table.check_credit('a', 1, 100, 100, ts)
+        assert 2 == lockf.call_count
+        # the empty bucket is not looked at again before it has a credit
+        for _ in range(100):
+            assert not table.check_credit('a', 1, 100, 100, ts + 0.005)
+        assert 2 == lockf.call_count
+        # unless the rate changed
+        assert not table.check_credit('a', 1, 200, 200, ts + 0.004)
+        assert 4 == lockf.call_count
+        assert table.check_credit('a', 1, 100, 100, ts + 0.5)
+        assert 6 == lockf.call_count
+    table.close()
+    other.close()
+
+
+def test_rate_limiter_table_invalid_file(tmp_path):
+    path = tmp_path / 'limits'
+    path.write_bytes(b'not a table')
+    with pytest.raises(ValueError):
+        RateLimiterTable(str(path), 'svc')
@@ -14,6 +14,8 @@
 
 
 import logging
+import socket
+import tempfile
 import time
 import collections
 
@@ -23,13 +25,20 @@ import tornado.gen
 import jaeger_client.reporter
 
 from tornado.concurrent import Future
-from jaeger_client import Span, SpanContext
+from jaeger_client import Span, SpanContext, thrift
+from jaeger_client.constants import DEBUG_FLAG
 from jaeger_client.metrics import LegacyMetricsFactory, Metrics
 from jaeger_client.utils import ErrorReporter
 from tornado.ioloop import IOLoop
 from tornado.testing import AsyncTestCase, gen_test
-from jaeger_client.reporter import Reporter
+from jaeger_client.reporter import Reporter, ThreadedReporter
+from jaeger_client.spool import SpanSpool
 from jaeger_client.ioloop_util import future_result
+from jaeger_client.thrift_gen.agent import Agent
+from jaeger_client.thrift_gen.jaeger import ttypes
+from jaeger_client.TUDPTransport import TUDPTransport
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer
 
 
 def test_null_reporter():
@@ -66,14 +75,36 @@ class FakeSender(object):
         self.requests = []
         self.futures = []
 
-    def __call__(self, spans):
+    def __call__(self, serialized_spans):
         # print('ManualSender called', request)
-        self.requests.append(spans)
+        self.requests.append(_make_batch(serialized_spans))
         fut = Future()
         self.futures.append(fut)
         return fut
 
 
+class BulkTransport(object):
+    """
+    A transport with write_many(), which sends at most max_count messages
+    per call, and fails the calls listed in fail_calls.
+    """
+    def __init__(self, max_count=2, fail_calls=()):
+        self.max_count = max_count
+        self.fail_calls = fail_calls
+        self.calls = []
+        self.messages = []
+
+    def write(self, buf):
+        self.write_many([buf])
+
+    def write_many(self, bufs):
+        self.calls.append(len(bufs))
+        if len(self.calls) in self.fail_calls:
+            raise socket.error('boom')
+        self.messages.extend(bufs[:self.max_count])
+        return min(len(bufs), self.max_count)
+
+
 class HardErrorReporter(object):
     def error(self, name, count, *args):
         raise ValueError(*args)
@@ -128,6 +159,28 @@ class ReporterTest(AsyncTestCase):
         reporter._send = sender
         return reporter, sender
 
+    @staticmethod
+    def _asleep_reporter(**kwargs):
+        """
+        Returns a Reporter whose consumer stays asleep until close(), and
+        the list of batches it sends.
+        """
+        reporter = Reporter(channel=mock.MagicMock(),
+                            io_loop=IOLoop.current(),
+                            flush_interval=None,
+                            metrics_factory=FakeMetricsFactory(),
+                            **kwargs)
+        reporter.set_process('service', {}, max_length=0)
+        reporter._wakeup_pending = True
+        batches = []
+
+        def send(serialized_spans):
+            batches.append(_make_batch(serialized_spans))
+            return future_result(True)
+
+        reporter._send = send
+        return reporter, batches
+
     @tornado.gen.coroutine
     def _wait_for(self, fn):
         """Wait until fn() returns truth, but not longer than 1 second."""
@@ -240,7 +293,7 @@ class ReporterTest(AsyncTestCase):
         # and flood the queue with messages
         count = [0]
 
-        def send(_):
+        def send(serialized_spans):
             count[0] += 1
             return future_result(True)
 
@@ -248,20 +301,274 @@ class ReporterTest(AsyncTestCase):
         reporter.batch_size = 3
         for i in range(10):
             reporter.report_span(self._new_span('%s' % i))
-        yield self._wait_for(lambda: reporter.queue.qsize() > 0)
-        assert reporter.queue.qsize() == 10, 'queued 10 spans'
+        assert len(reporter.queue) == 10, 'queued 10 spans'
 
         # now unblock consumer
         sender.futures[0].set_result(1)
         yield self._wait_for(lambda: count[0] > 2)
 
         assert count[0] == 3, '9 out of 10 spans submitted in 3 batches'
-        assert reporter.queue._unfinished_tasks == 1, 'one span still pending'
+        assert len(reporter.queue) == 1, 'one span still pending'
 
         yield reporter.close()
-        assert reporter.queue.qsize() == 0, 'all spans drained'
+        assert len(reporter.queue) == 0, 'all spans drained'
         assert count[0] == 4, 'last span submitted in one extrac batch'
 
+    @gen_test
+    def test_close_drops_span_racing_close(self):
+        reporter, sender = self._new_reporter(batch_size=10)
+        yield reporter.close()
+        # a span that passed the stopped check just before close() is
+        # queued after the consumer exited
+        reporter.stopped = False
+        reporter.report_span(self._new_span('late'))
+        assert 0 == len(reporter.queue)
+        counters = reporter.metrics_factory.counters
+        assert 1 == counters['jaeger:reporter_spans.result_dropped']
+        assert 0 == len(sender.requests)
+
+    @gen_test
+    def test_wakeup_once_per_batch(self):
+        reporter, sender = self._new_reporter(batch_size=3)
+        with mock.patch.object(reporter.io_loop, 'add_callback',
+                               wraps=reporter.io_loop.add_callback) as add_callback:
+            for i in range(2):
+                reporter.report_span(self._new_span('%s' % i))
+            assert add_callback.call_count == 0, 'no wakeup before a full batch'
+            for i in range(2, 5):
+                reporter.report_span(self._new_span('%s' % i))
+            assert add_callback.call_count == 1, 'one wakeup per batch'
+
+        yield self._wait_for(lambda: len(sender.futures) > 0)
+        assert 3 == len(sender.requests[0].spans)
+        sender.futures[0].set_result(1)
+        assert len(reporter.queue) == 2
+
+        close = reporter.close()
+        yield self._wait_for(lambda: len(sender.futures) > 1)
+        assert 2 == len(sender.requests[1].spans)
+        sender.futures[1].set_result(1)
+        yield close
+
+    @gen_test
+    def test_submit_splits_large_batch(self):
+        reporter, _ = self._new_reporter(batch_size=10)
+        reporter.error_reporter = mock.MagicMock()
+        batches = []
+
+        def send(serialized_spans):
+            batches.append(_make_batch(serialized_spans))
+            return future_result(True)
+
+        reporter._send = send
+        # room for 4 spans per packet
+        reporter.max_packet_size = _max_packet_size(reporter, 4)
+        for i in range(10):
+            name = 'x' * reporter.max_packet_size if i == 4 else '%s' % i
+            reporter.report_span(self._new_span(name))
+        yield reporter.close()
+
+        assert [['0', '1', '2', '3'], ['5', '6', '7', '8'], ['9']] == \
+            [[span.operationName for span in batch.spans] for batch in batches]
+        counters = reporter.metrics_factory.counters
+        assert 9 == counters['jaeger:reporter_spans.result_ok']
+        assert 1 == counters['jaeger:reporter_spans.result_dropped']
+        assert 1 == counters['jaeger:reporter_dropped_spans.reason_too_large']
+        assert reporter.error_reporter.error.called
+
+    @gen_test
+    def test_send_reuses_encoded_process(self):
+        reporter = Reporter(channel=mock.MagicMock(), io_loop=IOLoop.current())
+        reporter.set_process('service', {'tag%d' % i: i for i in range(15)}, max_length=0)
+        batch = thrift.make_jaeger_batch(
+            spans=[self._new_span('1'), self._new_span('2')], process=reporter._process)
+        serialized_spans = [thrift.serialize_span(span) for span in batch.spans]
+        with mock.patch.object(reporter._process, 'write') as process_write:
+            yield reporter._send(serialized_spans)
+            yield reporter._send(serialized_spans)
+        assert not process_write.called
+        messages = [args[0] for args, _ in reporter._channel.write.call_args_list]
+        assert messages == [thrift.make_emit_batch_message(batch, seqid) for seqid in (1, 2)]
+        assert 2 == reporter._channel.flush.call_count
+        yield reporter.close()
+
+    @gen_test
+    def test_submit_backlog_with_write_many(self):
+        channel = BulkTransport(max_count=2, fail_calls=(2,))
+        channel.io_loop = mock.MagicMock()  # for Agent.Client
+        reporter = Reporter(channel=channel, io_loop=IOLoop.current(), batch_size=2,
+                            metrics_factory=FakeMetricsFactory(),
+                            error_reporter=mock.MagicMock())
+        reporter.set_process('service', {}, max_length=0)
+        yield reporter._submit_all([
+            [reporter._encode(self._new_span('%s' % i)) for i in range(j, j + 2)]
+            for j in range(0, 10, 2)])
+
+        assert [5, 3, 2] == channel.calls
+        assert [['0', '1'], ['2', '3'], ['6', '7'], ['8', '9']] == \
+            [[span.operationName for span in _decode_batch(message).spans]
+             for message in channel.messages]
+        counters = reporter.metrics_factory.counters
+        assert 8 == counters['jaeger:reporter_spans.result_ok']
+        assert 2 == counters['jaeger:reporter_spans.result_err']
+        assert reporter.error_reporter.error.called
+        yield reporter.close()
+
+    @gen_test
+    def test_spool_failed_messages_of_write_many(self):
+        channel = BulkTransport(max_count=2, fail_calls=(2,))
+        channel.io_loop = mock.MagicMock()  # for Agent.Client
+        reporter = Reporter(channel=channel, io_loop=IOLoop.current(), batch_size=2,
+                            metrics_factory=FakeMetricsFactory(),
+                            error_reporter=mock.MagicMock())
+        reporter.set_process('service', {}, max_length=0)
+        counters = reporter.metrics_factory.counters
+        with tempfile.TemporaryDirectory() as spool_dir:
+            reporter.spool = SpanSpool(spool_dir, max_bytes=1024 * 1024)
+            yield reporter._submit_all([
+                [reporter._encode(self._new_span('%s' % i)) for i in range(j, j + 2)]
+                for j in range(0, 10, 2)])
+
+            assert 8 == counters['jaeger:reporter_spans.result_ok']
+            assert 'jaeger:reporter_spans.result_err' not in counters
+            assert 2 == counters['jaeger:reporter_spooled_spans']
+            assert ['4', '5'] == [thrift.deserialize_span(data).operationName
+                                  for data in reporter.spool.read(10)]
+            yield reporter.close()
+
+    @gen_test
+    def test_spool_while_agent_is_down(self):
+        reporter, _ = self._new_reporter(batch_size=1, flush=0.01)
+        reporter.error_reporter = mock.MagicMock()
+        agent_down = [True]
+        sent = []
+
+        def send(serialized_spans):
+            if agent_down[0]:
+                raise socket.error('agent is down')
+            sent.extend(span.operationName for span in _make_batch(serialized_spans).spans)
+            fut = Future()
+            fut.set_result(None)
+            return fut
+
+        reporter._send = send
+        counters = reporter.metrics_factory.counters
+        with tempfile.TemporaryDirectory() as spool_dir:
+            reporter.spool = SpanSpool(spool_dir, max_bytes=1024 * 1024)
+            # failed batches are spooled, and once sends keep failing,
+            # new batches are spooled without trying to send them
+            for i in range(3):
+                reporter.report_span(self._new_span('%s' % i))
+            yield self._wait_for(lambda: counters.get('jaeger:reporter_spooled_spans') == 3)
+            assert reporter._agent_down()
+            for i in range(3, 5):
+                reporter.report_span(self._new_span('%s' % i))
+            yield self._wait_for(lambda: counters.get('jaeger:reporter_spooled_spans') == 5)
+            assert 5 == len(reporter.spool)
+            assert 'jaeger:reporter_spans.result_err' not in counters
+
+            # the agent recovers, and the spool is drained in order
+            agent_down[0] = False
+            yield self._wait_for(lambda: len(sent) == 5)
+            assert ['0', '1', '2', '3', '4'] == sent
+            assert 0 == len(reporter.spool)
+            assert 5 == counters['jaeger:reporter_spans.result_ok']
+            yield reporter.close()
+
+    @gen_test
+    def test_queue_full_block_on_ioloop_thread(self):
+        reporter, sender = self._new_reporter(batch_size=1, queue_cap=1)
+        reporter.queue_full_policy = 'block'
+        reporter.error_reporter = mock.MagicMock()
+        reporter.report_span(self._new_span('0'))
+        yield self._wait_for(lambda: len(sender.futures) > 0)
+        # the consumer is busy sending, but must not be waited for on the
+        # IOLoop thread, where it runs
+        for i in range(2):
+            reporter.report_span(self._new_span('%s' % i))
+        assert 1 == len(reporter.queue)
+        counters = reporter.metrics_factory.counters
+        assert 1 == counters['jaeger:reporter_dropped_spans.reason_queue_full']
+        sender.futures[0].set_result(1)
+        yield self._wait_for(lambda: len(sender.futures) > 1)
+        sender.futures[1].set_result(1)
+        yield reporter.close()
+
+    @gen_test
+    def test_queue_max_bytes(self):
+        reporter, batches = self._asleep_reporter(
+            batch_size=10, queue_capacity=10, queue_max_bytes=4000)
+        small = [self._new_span('small') for _ in range(20)]
+        large = self._new_span('x' * 3500)
+        for span in small[:10] + [large] + small[10:]:
+            reporter.report_span(span)
+
+        # the byte budget applies instead of queue_capacity
+        assert 20 == len(reporter.queue), 'all small spans queued'
+        assert 0 < reporter.queue_bytes <= 4000
+        counters = reporter.metrics_factory.counters
+        assert 1 == counters['jaeger:reporter_spans.result_dropped']
+        yield reporter.close()
+        assert 0 == reporter.queue_bytes
+        assert [10, 10] == [len(batch.spans) for batch in batches]
+        assert 20 == counters['jaeger:reporter_spans.result_ok']
+
+    @gen_test
+    def test_queue_full_drop_oldest(self):
+        reporter, batches = self._asleep_reporter(
+            batch_size=10, queue_capacity=10, queue_full_policy='drop_oldest')
+        for i in range(12):
+            reporter.report_span(self._new_span('%s' % i))
+        assert [str(i) for i in range(2, 12)] == _queued_names(reporter)
+        counters = reporter.metrics_factory.counters
+        assert 2 == counters['jaeger:reporter_spans.result_dropped']
+        assert 2 == counters['jaeger:reporter_dropped_spans.reason_evicted']
+        yield reporter.close()
+        assert [[str(i) for i in range(2, 12)]] == \
+            [[span.operationName for span in batch.spans] for batch in batches]
+
+    @gen_test
+    def test_queue_full_sample_down(self):
+        reporter, batches = self._asleep_reporter(
+            batch_size=10, queue_capacity=10, queue_full_policy='sample_down',
+            queue_sample_down_rate=2)
+        for i in range(14):
+            reporter.report_span(self._new_span('%s' % i))
+        # every other span is kept above the high-water mark of 8 spans
+        queued = ['0', '1', '2', '3', '4', '5', '6', '7', '9', '11']
+        assert queued == _queued_names(reporter)
+        counters = reporter.metrics_factory.counters
+        assert 3 == counters['jaeger:reporter_dropped_spans.reason_sampled_down']
+        assert 1 == counters['jaeger:reporter_dropped_spans.reason_queue_full']
+        assert 4 == counters['jaeger:reporter_spans.result_dropped']
+        yield reporter.close()
+        assert [queued] == \
+            [[span.operationName for span in batch.spans] for batch in batches]
+
+    @gen_test
+    def test_priority_queue(self):
+        reporter, batches = self._asleep_reporter(
+            batch_size=4, queue_capacity=4, priority_queue_capacity=2,
+            priority_span_predicate=lambda span: span.operation_name == 'vip')
+        reporter.error_reporter = mock.MagicMock()
+        for i in range(6):
+            reporter.report_span(self._new_span('%s' % i))
+        error = self._new_span('error')
+        error.tags.append(thrift.make_tag('error', True, max_length=100, max_traceback_length=100))
+        debug = self._new_span('debug')
+        debug.context.flags |= DEBUG_FLAG
+        for span in (error, debug, self._new_span('vip')):
+            reporter.report_span(span)
+
+        assert ['error', 'debug'] == [span.operation_name for span in reporter.priority_queue]
+        assert ['0', '1', '2', '3'] == _queued_names(reporter)
+        yield reporter.close()
+        assert [['error', 'debug'], ['0', '1', '2', '3']] == \
+            [[span.operationName for span in batch.spans] for batch in batches]
+        # the priority queue was full, so 'vip' was dropped along with '4' and '5'
+        counters = reporter.metrics_factory.counters
+        assert 3 == counters['jaeger:reporter_spans.result_dropped']
+
     @gen_test
     def test_composite_reporter(self):
         reporter = jaeger_client.reporter.CompositeReporter(
@@ -298,3 +605,265 @@ class ReporterTest(AsyncTestCase):
                 f2.set_result(True)
                 yield f
                 assert f.result()
+
+
+def _make_batch(serialized_spans):
+    return ttypes.Batch(spans=[thrift.deserialize_span(data) for data in serialized_spans])
+
+
+def _decode_batch(data):
+    prot = TCompactProtocol(TMemoryBuffer(data))
+    prot.readMessageBegin()
+    args = Agent.emitBatch_args()
+    args.read(prot)
+    prot.readMessageEnd()
+    return args.batch
+
+
+def test_threaded_reporter():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(1)
+    reporter = ThreadedReporter(
+        transport=TUDPTransport('127.0.0.1', sock.getsockname()[1], blocking=True),
+        batch_size=2,
+        flush_interval=None,
+        metrics_factory=FakeMetricsFactory())
+    reporter.set_process('service', {}, max_length=0)
+    try:
+        for i in range(3):
+            reporter.report_span(ReporterTest._new_span('%s' % i))
+        batch = _decode_batch(sock.recv(65536))
+        assert batch.process.serviceName == 'service'
+        assert ['0', '1'] == [span.operationName for span in batch.spans]
+
+        assert reporter.close().result(timeout=1)
+        batch = _decode_batch(sock.recv(65536))
+        assert ['2'] == [span.operationName for span in batch.spans]
+
+        counters = reporter.metrics_factory.counters
+        assert 3 == counters['jaeger:reporter_spans.result_ok']
+        reporter.report_span(ReporterTest._new_span('3'))
+        assert 1 == counters['jaeger:reporter_spans.result_dropped']
+    finally:
+        sock.close()
+
+
+def _max_packet_size(reporter, span_count):
+    """Returns the max packet size that fits span_count of ReporterTest spans."""
+    batch = thrift.make_jaeger_batch([ReporterTest._new_span('0')], reporter._process)
+    span_size = len(thrift.serialize_span(batch.spans[0]))
+    return thrift.emit_batch_overhead(reporter._frame) + span_count * span_size
+
+
+def test_threaded_reporter_splits_large_batch():
+    reporter = ThreadedReporter(
+        transport=mock.MagicMock(), batch_size=10, flush_interval=None,
+        metrics_factory=FakeMetricsFactory(), error_reporter=mock.MagicMock())
+    reporter.set_process('service', {}, max_length=0)
+    reporter.max_packet_size = _max_packet_size(reporter, 4)
+    for i in range(10):
+        name = 'x' * reporter.max_packet_size if i == 4 else '%s' % i
+        reporter.report_span(ReporterTest._new_span(name))
+    assert reporter.close().result(timeout=1)
+
+    messages = [args[0] for args, _ in reporter.transport.write.call_args_list]
+    assert all(len(message) <= reporter.max_packet_size for message in messages)
+    assert [['0', '1', '2', '3'], ['5', '6', '7', '8'], ['9']] == \
+        [[span.operationName for span in _decode_batch(message).spans]
+         for message in messages]
+    counters = reporter.metrics_factory.counters
+    assert 9 == counters['jaeger:reporter_spans.result_ok']
+    assert 1 == counters['jaeger:reporter_dropped_spans.reason_too_large']
+
+
+def test_threaded_reporter_drains_backlog_with_write_many():
+    reporter = ThreadedReporter(
+        transport=BulkTransport(max_count=10), batch_size=2, flush_interval=None,
+        metrics_factory=FakeMetricsFactory())
+    reporter.set_process('service', {}, max_length=0)
+    # keep the consumer asleep until close()
+    reporter._wakeup_pending = True
+    for i in range(7):
+        reporter.report_span(ReporterTest._new_span('%s' % i))
+    assert reporter.close().result(timeout=1)
+
+    assert [4] == reporter.transport.calls, 'one call for the whole backlog'
+    assert [['0', '1'], ['2', '3'], ['4', '5'], ['6']] == \
+        [[span.operationName for span in _decode_batch(message).spans]
+         for message in reporter.transport.messages]
+    assert 7 == reporter.metrics_factory.counters['jaeger:reporter_spans.result_ok']
+
+
+def test_threaded_reporter_encodes_spans_one_by_one():
+    reporter = ThreadedReporter(
+        transport=mock.MagicMock(), batch_size=3, flush_interval=None,
+        metrics_factory=FakeMetricsFactory(), error_reporter=mock.MagicMock())
+    reporter.set_process('service', {}, max_length=0)
+    reporter._wakeup_pending = True
+    for i in range(3):
+        span = ReporterTest._new_span('%s' % i)
+        if i == 1:
+            span.end_time = None
+        reporter.report_span(span)
+    assert reporter.close().result(timeout=1)
+
+    messages = [args[0] for args, _ in reporter.transport.write.call_args_list]
+    assert [['0', '2']] == \
+        [[span.operationName for span in _decode_batch(message).spans]
+         for message in messages]
+    counters = reporter.metrics_factory.counters
+    assert 2 == counters['jaeger:reporter_spans.result_ok']
+    assert 1 == counters['jaeger:reporter_spans.result_err']
+    reporter.error_reporter.error.assert_called_once()
+
+
+def test_threaded_reporter_queue_max_bytes():
+    reporter = ThreadedReporter(
+        transport=mock.MagicMock(), batch_size=10, flush_interval=None,
+        metrics_factory=FakeMetricsFactory(), queue_capacity=10, queue_max_bytes=4000)
+    reporter.set_process('service', {}, max_length=0)
+    reporter._wakeup_pending = True
+    small = [ReporterTest._new_span('small') for _ in range(20)]
+    large = ReporterTest._new_span('x' * 3500)
+    for span in small[:10] + [large] + small[10:]:
+        reporter.report_span(span)
+
+    # the byte budget applies instead of queue_capacity
+    assert 20 == len(reporter.queue), 'all small spans queued'
+    assert 0 < reporter.queue_bytes <= 4000
+    assert 1 == reporter.metrics_factory.counters['jaeger:reporter_spans.result_dropped']
+    assert reporter.close().result(timeout=1)
+    assert 0 == reporter.queue_bytes
+    assert 20 == reporter.metrics_factory.counters['jaeger:reporter_spans.result_ok']
+
+
+def _asleep_threaded_reporter(**kwargs):
+    """Returns a ThreadedReporter whose consumer stays asleep until close()."""
+    reporter = ThreadedReporter(
+        transport=mock.MagicMock(), flush_interval=None,
+        metrics_factory=FakeMetricsFactory(), **kwargs)
+    reporter.set_process('service', {}, max_length=0)
+    reporter._wakeup_pending = True
+    return reporter
+
+
+def _queued_names(reporter):
+    return [span.operation_name for span in reporter.queue]
+
+
+@pytest.mark.parametrize('policy,queued,reason', [
+    ('drop_newest', [str(i) for i in range(10)], 'queue_full'),
+    ('drop_oldest', [str(i) for i in range(2, 12)], 'evicted'),
+])
+def test_threaded_reporter_queue_full_policy(policy, queued, reason):
+    reporter = _asleep_threaded_reporter(
+        queue_capacity=10, batch_size=10, queue_full_policy=policy)
+    for i in range(12):
+        reporter.report_span(ReporterTest._new_span('%s' % i))
+    assert queued == _queued_names(reporter)
+    counters = reporter.metrics_factory.counters
+    assert 2 == counters['jaeger:reporter_spans.result_dropped']
+    assert 2 == counters['jaeger:reporter_dropped_spans.reason_%s' % reason]
+    assert reporter.close().result(timeout=1)
+    assert 10 == counters['jaeger:reporter_spans.result_ok']
+
+
+def test_threaded_reporter_queue_full_sample_down():
+    reporter = _asleep_threaded_reporter(
+        queue_capacity=10, batch_size=10, queue_full_policy='sample_down',
+        queue_sample_down_rate=2)
+    for i in range(14):
+        reporter.report_span(ReporterTest._new_span('%s' % i))
+    # every other span is kept above the high-water mark of 8 spans
+    assert ['0', '1', '2', '3', '4', '5', '6', '7', '9', '11'] == _queued_names(reporter)
+    counters = reporter.metrics_factory.counters
+    assert 3 == counters['jaeger:reporter_dropped_spans.reason_sampled_down']
+    assert 1 == counters['jaeger:reporter_dropped_spans.reason_queue_full']
+    assert 4 == counters['jaeger:reporter_spans.result_dropped']
+    assert reporter.close().result(timeout=1)
+
+
+def test_threaded_reporter_queue_full_block():
+    reporter = ThreadedReporter(
+        transport=mock.MagicMock(), queue_capacity=2, batch_size=2, flush_interval=None,
+        metrics_factory=FakeMetricsFactory(), queue_full_policy='block')
+    reporter.set_process('service', {}, max_length=0)
+    for i in range(50):
+        reporter.report_span(ReporterTest._new_span('%s' % i))
+    assert reporter.close().result(timeout=1)
+    counters = reporter.metrics_factory.counters
+    assert 50 == counters['jaeger:reporter_spans.result_ok']
+    assert 'jaeger:reporter_spans.result_dropped' not in counters
+
+
+def test_threaded_reporter_queue_full_block_timeout():
+    reporter = _asleep_threaded_reporter(
+        queue_capacity=2, batch_size=2, queue_full_policy='block', queue_block_timeout=0.05)
+    for i in range(3):
+        reporter.report_span(ReporterTest._new_span('%s' % i))
+    assert ['0', '1'] == _queued_names(reporter)
+    counters = reporter.metrics_factory.counters
+    assert 1 == counters['jaeger:reporter_dropped_spans.reason_block_timeout']
+    assert reporter.close().result(timeout=1)
+
+
+def test_threaded_reporter_unknown_queue_full_policy():
+    with pytest.raises(ValueError):
+        ThreadedReporter(transport=mock.MagicMock(), queue_full_policy='drop_all')
+
+
+def test_threaded_reporter_priority_queue():
+    reporter = _asleep_threaded_reporter(
+        queue_capacity=4, batch_size=4, priority_queue_capacity=2,
+        priority_span_predicate=lambda span: span.operation_name == 'vip')
+    reporter.error_reporter = mock.MagicMock()
+    for i in range(6):
+        reporter.report_span(ReporterTest._new_span('%s' % i))
+    error = ReporterTest._new_span('error')
+    error.tags.append(thrift.make_tag('error', True, max_length=100, max_traceback_length=100))
+    debug = ReporterTest._new_span('debug')
+    debug.context.flags |= DEBUG_FLAG
+    for span in (error, debug, ReporterTest._new_span('vip')):
+        reporter.report_span(span)
+
+    assert ['error', 'debug'] == [span.operation_name for span in reporter.priority_queue]
+    assert ['0', '1', '2', '3'] == _queued_names(reporter)
+    assert reporter.close().result(timeout=1)
+    messages = [args[0] for args, _ in reporter.transport.write.call_args_list]
+    assert [['error', 'debug'], ['0', '1', '2', '3']] == \
+        [[span.operationName for span in _decode_batch(message).spans]
+         for message in messages]
+    # the priority queue was full, so 'vip' was dropped along with '4' and '5'
+    assert 3 == reporter.metrics_factory.counters['jaeger:reporter_spans.result_dropped']
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'queue_full_policy': 'block'},
+    {'priority_queue_capacity': 2, 'priority_span_predicate': lambda span: True},
+])
+def test_threaded_reporter_drops_span_racing_close(kwargs):
+    reporter = _asleep_threaded_reporter(queue_capacity=10, batch_size=10, **kwargs)
+    assert reporter.close().result(timeout=1)
+    # a span that passed the stopped check just before close() is queued
+    # after the consumer exited
+    reporter.stopped = False
+    reporter.report_span(ReporterTest._new_span('late'))
+    assert 0 == len(reporter.queue) + len(reporter.priority_queue)
+    assert 0 == reporter.queue_bytes
+    assert 1 == reporter.metrics_factory.counters['jaeger:reporter_spans.result_dropped']
+
+
+def test_threaded_reporter_flush_interval():
+    reporter = ThreadedReporter(
+        transport=mock.MagicMock(), batch_size=10, flush_interval=0.01)
+    reporter.set_process('service', {}, max_length=0)
+    reporter.report_span(ReporterTest._new_span('1'))
+    for _ in range(100):
+        if reporter.transport.write.called:
+            break
+        time.sleep(0.01)
+    batch = _decode_batch(reporter.transport.write.call_args[0][0])
+    assert 1 == len(batch.spans)
+    assert reporter.close().result(timeout=1)
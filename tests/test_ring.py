@@ -0,0 +1,138 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import mock
+import pytest
+
+from jaeger_client import ConstSampler, Tracer, thrift
+from jaeger_client.metrics import LegacyMetricsFactory, Metrics
+from jaeger_client.ring import RingReporter, SpanRing
+
+
+@pytest.fixture
+def ring_path(tmp_path):
+    return str(tmp_path / 'spans.ring')
+
+
+def _data(records):
+    return [data for _, _, data in records]
+
+
+def test_append_and_read_wraps_around(ring_path):
+    ring = SpanRing(ring_path, capacity=32)
+    for i in range(10):
+        # each record takes 4 + 10 bytes, so only two fit at a time
+        data = b'span-%05d' % i
+        assert ring.append(data)
+        records = ring.read(10)
+        assert [data] == _data(records)
+        ring.consume(records[-1][1])
+    assert 0 == len(ring)
+    assert ring.write_cursor == 140
+    ring.close()
+
+
+def test_append_when_full(ring_path):
+    ring = SpanRing(ring_path, capacity=32)
+    assert ring.append(b'a' * 10)
+    assert ring.append(b'b' * 10)
+    assert not ring.append(b'c'), 'no room left'
+    records = ring.read(1)
+    assert [b'a' * 10] == _data(records)
+    ring.consume(records[0][1])
+    assert ring.append(b'c')
+    assert [b'b' * 10, b'c'] == _data(ring.read(10))
+    ring.close()
+
+
+def test_reopen_keeps_spans(ring_path):
+    ring = SpanRing(ring_path, capacity=64)
+    ring.set_process(b'process')
+    ring.append(b'first')
+    ring.append(b'second')
+    ring.consume(ring.read(1)[0][1])
+    ring.close()
+
+    ring = SpanRing(ring_path, capacity=1024, create=False)
+    assert 64 == ring.capacity
+    assert b'process' == ring.get_process()
+    assert [b'second'] == _data(ring.read(10))
+    ring.close()
+
+
+def test_not_a_ring_file(ring_path):
+    with open(ring_path, 'wb') as f:
+        f.write(b'garbage')
+    with pytest.raises(ValueError):
+        SpanRing(ring_path, create=False)
+    ring = SpanRing(ring_path, capacity=64)
+    assert 0 == len(ring)
+    assert ring.get_process() is None
+    ring.close()
+
+
+def test_process_too_large(ring_path):
+    ring = SpanRing(ring_path, capacity=64)
+    with pytest.raises(ValueError):
+        ring.set_process(b'x' * 100000)
+    ring.close()
+
+
+def test_ring_reporter(ring_path):
+    counters = {}
+
+    def count(key, value):
+        counters[key] = counters.get(key, 0) + value
+
+    reporter = RingReporter(ring_path, capacity=1024,
+                            metrics_factory=LegacyMetricsFactory(Metrics(count=count)))
+    tracer = Tracer(service_name='ring-test', reporter=reporter, sampler=ConstSampler(True))
+    for name in ('first', 'second'):
+        tracer.start_span(name).finish()
+    # the ring has no room left for a large span
+    tracer.start_span('large', tags={'x': 'x' * 1000}).finish()
+    assert 1 == counters['jaeger:reporter_dropped_spans.reason_queue_full']
+    tracer.close()
+    tracer.start_span('after-close').finish()
+
+    ring = SpanRing(ring_path, create=False)
+    assert 'ring-test' == thrift.deserialize_process(ring.get_process()).serviceName
+    assert ['first', 'second'] == [
+        thrift.deserialize_span(data).operationName for data in _data(ring.read(10))]
+    ring.close()
+    assert 2 == counters['jaeger:reporter_spans.result_dropped']
+
+
+def test_ring_reporter_in_forked_child(ring_path):
+    counters = {}
+
+    def count(key, value):
+        counters[key] = counters.get(key, 0) + value
+
+    reporter = RingReporter(ring_path, error_reporter=mock.MagicMock(),
+                            metrics_factory=LegacyMetricsFactory(Metrics(count=count)))
+    tracer = Tracer(service_name='ring-test', reporter=reporter, sampler=ConstSampler(True))
+    with mock.patch('os.getpid', return_value=os.getpid() + 1):
+        reporter.set_process('child', {}, max_length=0)
+        tracer.start_span('in-child').finish()
+    assert 1 == counters['jaeger:reporter_spans.result_dropped']
+    assert reporter.error_reporter.error.called
+    tracer.close()
+
+    ring = SpanRing(ring_path, create=False)
+    assert 'ring-test' == thrift.deserialize_process(ring.get_process()).serviceName
+    assert 0 == len(ring)
+    ring.close()
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
 import time
 import math
 import mock
@@ -30,6 +31,7 @@ from jaeger_client.sampler import (
     get_sampling_probability,
     get_rate_limit,
 )
+from jaeger_client.rate_limiter import RateLimiterTable, SharedRateLimiter
 
 MAX_INT = 1 << 63
 
@@ -167,9 +169,14 @@ def test_rate_limiting_sampler():
         assert '%s' % sampler == \
                'RateLimitingSampler(3.0)', 'should short cirtcuit if rate is the same'
 
+        rate_limiter = sampler.rate_limiter
         sampler.update(2.0)
         assert sampler.rate_limiter.balance == 4.0 / 3.0
         assert '%s' % sampler == 'RateLimitingSampler(2.0)'
+        # the rate limiter in use by concurrent decisions is not changed
+        assert sampler.rate_limiter is not rate_limiter
+        assert rate_limiter.credits_per_second == 3.0
+        assert rate_limiter.balance == 2.0
     sampler.close()
 
 
@@ -237,12 +244,17 @@ def test_adaptive_sampler():
         assert tags == get_tags('lowerbound', 0.51)
 
     # This operation is seen for the first time by the sampler but surpasses
-    # max_operations of 2. The default probabilistic sampler will be used
+    # max_operations of 2. The least recently used operation is evicted
     sampled, tags = sampler.is_sampled(MAX_INT - 10, 'new_op_2')
     assert sampled
     assert tags == get_tags('probabilistic', 0.51)
-    sampled, _ = sampler.is_sampled(int(MAX_INT + (MAX_INT / 4)), 'new_op_2')
-    assert not sampled
+    assert ['new_op', 'new_op_2'] == sorted(sampler.samplers)
+
+    # An evicted operation gets the sampling rate of its strategy back
+    sampled, tags = sampler.is_sampled(MAX_INT - 10, 'op')
+    assert sampled
+    assert tags == get_tags('probabilistic', 0.5)
+    assert ['new_op_2', 'op'] == sorted(sampler.samplers)
     assert '%s' % sampler == 'AdaptiveSampler(0.510000, 3.000000, 2)'
 
     # Update the strategies
@@ -281,6 +293,47 @@ def test_adaptive_sampler():
     sampler.close()
 
 
+def test_adaptive_sampler_evicts_least_recently_used():
+    sampler = AdaptiveSampler({}, 10)
+    for i in range(10):
+        sampler.is_sampled(0, 'op-%d' % i)
+    # op-0 is used again, op-1 is the least recently used operation now
+    sampler.is_sampled(0, 'op-0')
+    sampler.is_sampled(0, 'op-10')
+    assert 10 == len(sampler.samplers)
+    assert 'op-0' in sampler.samplers
+    assert 'op-1' not in sampler.samplers
+    assert 'op-10' in sampler.samplers
+
+
+def test_adaptive_sampler_without_operations_uses_default_sampler():
+    sampler = AdaptiveSampler({'defaultSamplingProbability': 0.51}, 0)
+    sampled, tags = sampler.is_sampled(MAX_INT - 10, 'op')
+    assert sampled
+    assert tags == get_tags('probabilistic', 0.51)
+    assert {} == sampler.samplers
+
+
+def test_adaptive_sampler_concurrent_operations():
+    sampler = AdaptiveSampler({}, 50)
+    errors = []
+
+    def sample(thread):
+        try:
+            for i in range(2000):
+                sampler.is_sampled(0, 'op-%d' % ((thread * 7 + i) % 200))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=sample, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [] == errors
+    assert len(sampler.samplers) <= 50
+
+
 def test_adaptive_sampler_default_values():
     adaptive_sampler = AdaptiveSampler({}, 2)
     assert '%s' % adaptive_sampler == \
@@ -634,6 +687,86 @@ def test_update_sampler(response, init_sampler, expected_sampler,
     remote_sampler.close()
 
 
+# noinspection PyProtectedMember
+def test_update_sampler_replaces_sampler():
+    remote_sampler = RemoteControlledSampler(
+        channel=mock.MagicMock(),
+        service_name='x',
+        max_operations=10,
+        init_sampler=RateLimitingSampler(10),
+    )
+    # decisions do not take the lock that serializes updates
+    remote_sampler.lock = mock.MagicMock()
+    remote_sampler.is_sampled(MAX_INT - 1, 'op')
+    assert not remote_sampler.lock.__enter__.called
+
+    rate_limiting_sampler = remote_sampler.sampler
+    remote_sampler._update_sampler({
+        'strategyType': 'RATE_LIMITING',
+        'rateLimitingSampling': {'maxTracesPerSecond': 20},
+    })
+    assert '%s' % remote_sampler.sampler == 'RateLimitingSampler(20)'
+    assert '%s' % rate_limiting_sampler == 'RateLimitingSampler(10)', \
+        'sampler in use is not changed'
+
+    strategies = {
+        'defaultSamplingProbability': 0.001,
+        'defaultLowerBoundTracesPerSecond': 2,
+        'perOperationStrategies': [
+            {'operation': 'op1', 'probabilisticSampling': {'samplingRate': 0.1}},
+            {'operation': 'op2', 'probabilisticSampling': {'samplingRate': 0.2}},
+        ],
+    }
+    remote_sampler._update_sampler({'operationSampling': strategies})
+    adaptive_sampler = remote_sampler.sampler
+    op1_sampler = adaptive_sampler.samplers['op1']
+    op2_sampler = adaptive_sampler.samplers['op2']
+
+    strategies['perOperationStrategies'][1]['probabilisticSampling']['samplingRate'] = 0.5
+    remote_sampler._update_sampler({'operationSampling': strategies})
+    assert remote_sampler.sampler is not adaptive_sampler
+    assert remote_sampler.sampler.samplers['op1'] is op1_sampler, 'unchanged sampler is shared'
+    new_op2_sampler = remote_sampler.sampler.samplers['op2']
+    assert new_op2_sampler.rate == 0.5
+    assert new_op2_sampler.lower_bound_sampler is op2_sampler.lower_bound_sampler
+    assert adaptive_sampler.samplers['op2'] is op2_sampler
+    assert op2_sampler.rate == 0.2, 'sampler in use is not changed'
+    remote_sampler.close()
+
+
+# noinspection PyProtectedMember
+def test_update_sampler_shared_rate_limits(tmp_path):
+    table = RateLimiterTable(str(tmp_path / 'limits'), 'x')
+    remote_sampler = RemoteControlledSampler(
+        channel=mock.MagicMock(),
+        service_name='x',
+        rate_limiter_table=table,
+    )
+    remote_sampler._update_sampler({
+        'strategyType': 'RATE_LIMITING',
+        'rateLimitingSampling': {'maxTracesPerSecond': 10},
+    })
+    assert isinstance(remote_sampler.sampler.rate_limiter, SharedRateLimiter)
+    assert '' == remote_sampler.sampler.rate_limiter.key
+
+    remote_sampler._update_sampler({
+        'operationSampling': {
+            'defaultSamplingProbability': 0.001,
+            'defaultLowerBoundTracesPerSecond': 2,
+            'perOperationStrategies': [
+                {'operation': 'op', 'probabilisticSampling': {'samplingRate': 0.002}},
+            ],
+        },
+    })
+    remote_sampler.is_sampled(MAX_INT - 1, 'new-op')
+    for operation in ('op', 'new-op'):
+        rate_limiter = remote_sampler.sampler.samplers[operation].lower_bound_sampler.rate_limiter
+        assert isinstance(rate_limiter, SharedRateLimiter)
+        assert 'lower_bound:' + operation == rate_limiter.key
+    remote_sampler.close()
+    table.close()
+
+
 # noinspection PyProtectedMember
 def test_update_sampler_adaptive_sampler():
     error_reporter = mock.MagicMock()
@@ -0,0 +1,151 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+
+import mock
+import pytest
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+from jaeger_client import ConstSampler, Tracer, thrift
+from jaeger_client.ring import RingReporter, SpanRing
+from jaeger_client.shipper import RingShipper, main
+from jaeger_client.thrift_gen.agent import Agent
+from tests.test_reporter import FakeMetricsFactory
+
+
+def _decode_batch(data):
+    prot = TCompactProtocol(TMemoryBuffer(data))
+    prot.readMessageBegin()
+    args = Agent.emitBatch_args()
+    args.read(prot)
+    return args.batch
+
+
+class FakeTransport(object):
+    def __init__(self, fail=0, fail_after=0):
+        self.fail = fail
+        # number of writes that succeed before the failing ones
+        self.fail_after = fail_after
+        self.batches = []
+
+    def write(self, buf):
+        if self.fail_after:
+            self.fail_after -= 1
+        elif self.fail:
+            self.fail -= 1
+            raise socket.error('agent is down')
+        self.batches.append(_decode_batch(buf))
+
+
+@pytest.fixture
+def ring_path(tmp_path):
+    path = str(tmp_path / 'spans.ring')
+    tracer = Tracer(service_name='shipper-test', reporter=RingReporter(path),
+                    sampler=ConstSampler(True))
+    for i in range(5):
+        tracer.start_span('span-%d' % i).finish()
+    tracer.close()
+    return path
+
+
+def _names(batches):
+    return [[span.operationName for span in batch.spans] for batch in batches]
+
+
+def test_ship_to_agent(ring_path):
+    ring = SpanRing(ring_path, create=False)
+    transport = FakeTransport()
+    shipper = RingShipper(ring, transport=transport, batch_size=3)
+    assert 3 == shipper.ship()
+    assert 2 == shipper.ship()
+    assert 0 == shipper.ship()
+    assert [['span-0', 'span-1', 'span-2'], ['span-3', 'span-4']] == _names(transport.batches)
+    assert 'shipper-test' == transport.batches[0].process.serviceName
+    assert 0 == len(ring)
+    ring.close()
+
+
+def test_ship_splits_large_batch(ring_path):
+    ring = SpanRing(ring_path, create=False)
+    transport = FakeTransport()
+    shipper = RingShipper(ring, transport=transport)
+    # room for two spans per packet at most
+    shipper.max_packet_size = thrift.emit_batch_overhead(shipper._get_frame()) + \
+        max(len(data) for _, _, data in ring.read(10)) * 2
+    assert 5 == shipper.ship()
+    assert 3 == len(transport.batches)
+    assert ['span-%d' % i for i in range(5)] == sum(_names(transport.batches), [])
+    ring.close()
+
+
+def test_ship_retries_failed_batch(ring_path):
+    ring = SpanRing(ring_path, create=False)
+    transport = FakeTransport(fail=1)
+    shipper = RingShipper(ring, transport=transport, batch_size=3,
+                          error_reporter=mock.MagicMock())
+    assert 0 == shipper.ship()
+    assert shipper.error_reporter.error.called
+    assert 3 == shipper.ship()
+    assert [['span-0', 'span-1', 'span-2']] == _names(transport.batches)
+    ring.close()
+
+
+def test_ship_counts_dropped_span_once(tmp_path):
+    path = str(tmp_path / 'spans.ring')
+    tracer = Tracer(service_name='shipper-test', reporter=RingReporter(path),
+                    sampler=ConstSampler(True))
+    for name in ['span-0', 'span-1', 'span-2', 'x' * 1000, 'span-4']:
+        tracer.start_span(name).finish()
+    tracer.close()
+    ring = SpanRing(path, create=False)
+    transport = FakeTransport(fail=1, fail_after=1)
+    shipper = RingShipper(ring, transport=transport, error_reporter=mock.MagicMock(),
+                          metrics_factory=FakeMetricsFactory())
+    # room for two small spans per packet
+    shipper.max_packet_size = thrift.emit_batch_overhead(shipper._get_frame()) + \
+        max(len(data) for _, _, data in ring.read(5) if len(data) < 1000) * 2
+    # the second batch fails, the large span after its start is read again
+    assert 2 == shipper.ship()
+    assert 3 == shipper.ship()
+    assert [['span-0', 'span-1'], ['span-2', 'span-4']] == _names(transport.batches)
+    counters = shipper.metrics_factory.counters
+    assert 1 == counters['jaeger:reporter_dropped_spans.reason_too_large']
+    assert 0 == len(ring)
+    ring.close()
+
+
+def test_ship_to_collector(ring_path):
+    ring = SpanRing(ring_path, create=False)
+    sender = mock.MagicMock()
+    shipper = RingShipper(ring, sender=sender, batch_size=10)
+    assert 5 == shipper.ship()
+    batch = sender.send.call_args[0][0]
+    assert ['span-%d' % i for i in range(5)] == [span.operationName for span in batch.spans]
+    ring.close()
+
+
+def test_transport_or_sender_required(ring_path):
+    ring = SpanRing(ring_path, create=False)
+    with pytest.raises(ValueError):
+        RingShipper(ring)
+    ring.close()
+
+
+def test_main(ring_path):
+    with mock.patch.object(RingShipper, 'run', side_effect=KeyboardInterrupt) as run:
+        assert 0 == main(['--ring', ring_path, '--agent-port', '16831',
+                          '--poll-interval', '0.5'])
+    run.assert_called_once_with(0.5)
@@ -0,0 +1,135 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+import socket
+import sys
+
+import mock
+import pytest
+from opentracing import child_of, follows_from
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+from jaeger_client import ConstSampler, Tracer, thrift
+from jaeger_client.reporter import NullReporter
+from jaeger_client.sidecar import (
+    Sidecar, SubprocessReporter, make_jaeger_span_from_record, make_span_record,
+)
+from jaeger_client.thrift_gen.agent import Agent
+
+
+def _decode_batch(data):
+    prot = TCompactProtocol(TMemoryBuffer(data))
+    prot.readMessageBegin()
+    args = Agent.emitBatch_args()
+    args.read(prot)
+    return args.batch
+
+
+class FakeTransport(object):
+    def __init__(self):
+        self.batches = []
+
+    def write(self, buf):
+        self.batches.append(_decode_batch(buf))
+
+
+@pytest.mark.parametrize('lazy_tag_encoding', [False, True])
+def test_span_record(lazy_tag_encoding):
+    tracer = Tracer(service_name='sidecar-test', reporter=NullReporter(),
+                    sampler=ConstSampler(True), lazy_tag_encoding=lazy_tag_encoding,
+                    max_tag_value_length=10)
+    parent = tracer.start_span('parent')
+    other = tracer.start_span('other')
+    span = tracer.start_span('child', references=[
+        child_of(parent.context), follows_from(other.context)])
+    span.set_tag('str', 'x' * 20)
+    span.set_tag('int', 1)
+    span.set_tag('bool', True)
+    span.set_tag('object', object())
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        span.set_tag('traceback', sys.exc_info()[2])
+    span.log_kv({'event': 'x', 'value': 1.5}, timestamp=1.0)
+    span.finish()
+
+    record = pickle.loads(pickle.dumps(make_span_record(span)))
+    assert thrift.make_jaeger_span(span) == \
+        make_jaeger_span_from_record(record, max_length=10)
+
+
+def test_sidecar():
+    tracer = Tracer(service_name='sidecar-test', reporter=NullReporter(),
+                    sampler=ConstSampler(True))
+    spans = [tracer.start_span('span-%d' % i) for i in range(3)]
+    for span in spans:
+        span.finish()
+    records = [make_span_record(span) for span in spans]
+
+    transport = FakeTransport()
+    sidecar = Sidecar(transport, error_reporter=mock.MagicMock())
+    sidecar.handle(('spans', records))
+    assert not transport.batches, 'spans before the process are dropped'
+    assert sidecar.error_reporter.error.called
+    sidecar.handle(('process', 'sidecar-test', {'a': 'b'}, 100))
+    sidecar.handle(('spans', records))
+    batch, = transport.batches
+    assert 'sidecar-test' == batch.process.serviceName
+    assert ['span-0', 'span-1', 'span-2'] == [span.operationName for span in batch.spans]
+
+
+def test_subprocess_reporter():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    server.settimeout(10)
+    reporter = SubprocessReporter(agent_host='127.0.0.1', agent_port=server.getsockname()[1],
+                                  batch_size=2, flush_interval=0.01)
+    try:
+        tracer = Tracer(service_name='sidecar-test', reporter=reporter,
+                        sampler=ConstSampler(True))
+        for i in range(2):
+            tracer.start_span('span-%d' % i).finish()
+        batch = _decode_batch(server.recv(65536))
+        assert 'sidecar-test' == batch.process.serviceName
+        assert ['span-0', 'span-1'] == [span.operationName for span in batch.spans]
+
+        # the child is restarted if it exits
+        reporter._child.kill()
+        reporter._child.wait()
+        tracer.start_span('span-2').finish()
+        batch = _decode_batch(server.recv(65536))
+        assert 'sidecar-test' == batch.process.serviceName
+        assert ['span-2'] == [span.operationName for span in batch.spans]
+    finally:
+        reporter.close().result(timeout=10)
+        server.close()
+    assert reporter._child.returncode == 0
+
+
+def test_subprocess_reporter_invalid_parameters():
+    children = []
+
+    def spawn(reporter):
+        children.append(spawn_child(reporter))
+        return children[-1]
+
+    spawn_child = SubprocessReporter._spawn
+    with mock.patch.object(SubprocessReporter, '_spawn', spawn):
+        with pytest.raises(ValueError):
+            SubprocessReporter(queue_full_policy='drop_all')
+    # the child was not left running
+    assert 1 == len(children)
+    assert children[0].returncode is not None
@@ -17,6 +17,7 @@ import time
 import collections
 import json
 import mock
+import pytest
 
 from opentracing.ext import tags as ext_tags
 from jaeger_client import Span, SpanContext, ConstSampler
@@ -93,6 +94,24 @@ def test_is_rpc():
     assert span.is_rpc_client() is True
 
 
+@pytest.mark.parametrize('lazy_tag_encoding', [False, True])
+def test_is_error(lazy_tag_encoding):
+    mock_tracer = mock.MagicMock()
+    mock_tracer.max_tag_value_length = 100
+    mock_tracer.max_traceback_length = 100
+    ctx = SpanContext(trace_id=1, span_id=2, parent_id=None, flags=1)
+
+    span = Span(context=ctx, operation_name='x', tracer=mock_tracer,
+                lazy_tag_encoding=lazy_tag_encoding)
+    assert span.is_error() is False
+    span.set_tag(ext_tags.ERROR, True)
+    assert span.is_error() is True
+    span.set_tag(ext_tags.ERROR, 'false')
+    assert span.is_error() is False
+    span.set_tag(ext_tags.ERROR, 'true')
+    assert span.is_error() is True
+
+
 def test_sampling_priority(tracer):
     tracer.sampler = ConstSampler(False)
     span = tracer.start_span(operation_name='x')
@@ -267,3 +286,26 @@ def test_span_finish(tracer):
     # test double finish warning
     span.finish(finish_time + 10)
     assert span.end_time == finish_time
+
+
+def test_span_lazy_tag_encoding(tracer):
+    tracer.lazy_tag_encoding = True
+    tracer.max_tag_value_length = 42
+    span = tracer.start_span(operation_name='x')
+    span.set_tag('x', 'x' * 50)
+    span.set_tag(ext_tags.SPAN_KIND, ext_tags.SPAN_KIND_RPC_CLIENT)
+    fields = {'event': 'y'}
+    span.log_kv(fields, timestamp=1.5)
+    fields['event'] = 'z'
+    assert span.tags[-2] == ('x', 'x' * 50)
+    assert span.logs == [(1.5, {'event': 'y'})]
+
+    # mutable values are converted when they are set
+    value = ['a']
+    span.set_tag('list', value)
+    span.log_kv({'list': value}, timestamp=2.5)
+    value.append('b')
+    assert span.tags[-1] == ('list', "['a']")
+    assert span.logs[-1] == (2.5, {'list': "['a']"})
+    assert span.is_rpc() is True
+    assert span.is_rpc_client() is True
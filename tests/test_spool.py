@@ -0,0 +1,108 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import mock
+
+from jaeger_client.spool import SpanSpool, process_spool_dir
+
+
+def _spans(start, stop):
+    return [b'span-%02d' % i for i in range(start, stop)]
+
+
+def test_append_and_read(tmp_path):
+    spool = SpanSpool(str(tmp_path), max_bytes=1024)
+    assert 0 == len(spool)
+    assert 0 == spool.append(_spans(0, 3))
+    assert 3 == len(spool)
+    assert _spans(0, 2) == spool.read(2)
+    # reads see spans appended after the segment was opened for reading
+    spool.append(_spans(3, 5))
+    assert _spans(2, 5) == spool.read(10)
+    assert 0 == len(spool)
+    assert 1 == len(os.listdir(str(tmp_path))), 'read segments are kept until commit'
+    spool.commit()
+    assert 0 == spool.size
+    assert [] == os.listdir(str(tmp_path)), 'read segments are deleted'
+    assert [] == spool.read(10)
+    spool.append(_spans(5, 6))
+    assert _spans(5, 6) == spool.read(10)
+    spool.close()
+
+
+def test_read_spans_are_read_again_until_commit(tmp_path):
+    spool = SpanSpool(str(tmp_path), max_bytes=1024)
+    spool.append(_spans(0, 3))
+    assert _spans(0, 3) == spool.read(10)
+    # appended after the segment was fully read, to a new segment
+    spool.append(_spans(3, 4))
+    spool.close()
+
+    spool = SpanSpool(str(tmp_path), max_bytes=1024)
+    assert _spans(0, 4) == spool.read(10)
+    spool.commit()
+    spool.close()
+    assert 0 == len(SpanSpool(str(tmp_path), max_bytes=1024))
+
+
+def test_rotates_and_deletes_oldest_segment(tmp_path):
+    # each span takes 4 + 7 bytes, segments are rotated after 33 bytes
+    spool = SpanSpool(str(tmp_path), max_bytes=132)
+    for i in range(12):
+        assert 0 == spool.append(_spans(i, i + 1))
+    assert 4 == len(os.listdir(str(tmp_path)))
+    assert 132 == spool.size
+    assert 3 == spool.append(_spans(12, 13)), 'the oldest segment is dropped'
+    assert 10 == len(spool)
+    assert _spans(3, 13) == spool.read(100)
+    spool.close()
+
+
+def test_reopen(tmp_path):
+    spool = SpanSpool(str(tmp_path), max_bytes=1024)
+    spool.append(_spans(0, 3))
+    spool.close()
+    # the process died while writing the last record
+    path = os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0])
+    with open(path, 'ab') as f:
+        f.write(b'\x00\x00\x00\x10span')
+
+    spool = SpanSpool(str(tmp_path), max_bytes=1024)
+    assert 3 == len(spool)
+    spool.append(_spans(3, 4))
+    assert _spans(0, 4) == spool.read(10)
+    spool.close()
+
+
+def test_adopt_spools_of_exited_processes(tmp_path):
+    shared_dir = str(tmp_path)
+    for pid, start in ((1001, 0), (1002, 3)):
+        spool = SpanSpool(process_spool_dir(shared_dir, pid), max_bytes=1024)
+        spool.append(_spans(start, start + 3))
+        spool.close()
+    spool = SpanSpool(shared_dir, max_bytes=1024)
+    spool.append(_spans(6, 7))
+    spool.close()
+
+    with mock.patch('jaeger_client.spool.process_exists', side_effect=lambda pid: pid == 1002):
+        spool = SpanSpool(shared_dir, max_bytes=1024, shared_dir=shared_dir)
+    # the spool of process 1001 is moved after the segments of this one
+    assert not os.path.exists(process_spool_dir(shared_dir, 1001))
+    assert _spans(6, 7) + _spans(0, 3) == spool.read(10)
+    spool.commit()
+    spool.close()
+    # process 1002 is still running
+    assert 1 == len(os.listdir(process_spool_dir(shared_dir, 1002)))
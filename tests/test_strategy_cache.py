@@ -0,0 +1,97 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import mock
+
+from jaeger_client.sampler import RemoteControlledSampler
+from jaeger_client.strategy_cache import SamplingStrategyCache, fcntl
+
+import pytest
+
+PROBABILISTIC = json.dumps({
+    'strategyType': 'PROBABILISTIC',
+    'probabilisticSampling': {'samplingRate': 0.5},
+})
+
+
+@pytest.mark.skipif(fcntl is None, reason='requires fcntl.flock')
+def test_one_process_polls(tmp_path):
+    leader = SamplingStrategyCache(str(tmp_path), 'svc/a')
+    follower = SamplingStrategyCache(str(tmp_path), 'svc/a')
+    other_service = SamplingStrategyCache(str(tmp_path), 'svc/b')
+    assert leader.acquire()
+    assert leader.acquire()
+    assert not follower.acquire()
+    assert other_service.acquire()
+
+    leader.close()
+    assert follower.acquire()
+    follower.close()
+    other_service.close()
+
+
+def test_read_after_replace(tmp_path):
+    leader = SamplingStrategyCache(str(tmp_path), 'svc')
+    follower = SamplingStrategyCache(str(tmp_path), 'svc')
+    assert follower.read() is None
+
+    leader.write('a')
+    assert leader.read() is None, 'the writer does not read its own write'
+    assert 'a' == follower.read()
+    assert follower.read() is None, 'unchanged file is not read again'
+
+    # an unchanged strategy does not replace the file
+    leader.write('a')
+    assert follower.read() is None
+    leader.write('bc')
+    assert 'bc' == follower.read()
+    assert ['svc.json'] == [name for name in os.listdir(str(tmp_path))
+                            if not name.endswith('.lock')]
+
+
+def test_sampler_loads_cached_strategy(tmp_path):
+    SamplingStrategyCache(str(tmp_path), 'x').write(PROBABILISTIC)
+    channel = mock.MagicMock()
+    cache = SamplingStrategyCache(str(tmp_path), 'x')
+    with mock.patch.object(cache, 'acquire', return_value=False):
+        sampler = RemoteControlledSampler(
+            channel=channel, service_name='x', strategy_cache=cache)
+        # the strategy is loaded before the first poll
+        assert 'ProbabilisticSampler(0.5)' == '%s' % sampler.sampler
+
+        SamplingStrategyCache(str(tmp_path), 'x').write(PROBABILISTIC.replace('0.5', '0.25'))
+        sampler._poll_sampling_manager()
+        assert 'ProbabilisticSampler(0.25)' == '%s' % sampler.sampler
+    assert not channel.request_sampling_strategy.called
+    sampler.close()
+
+
+def test_sampler_writes_polled_strategy(tmp_path):
+    channel = mock.MagicMock()
+    cache = SamplingStrategyCache(str(tmp_path), 'x')
+    sampler = RemoteControlledSampler(
+        channel=channel, service_name='x', strategy_cache=cache)
+    sampler._poll_sampling_manager()
+    assert channel.request_sampling_strategy.called
+
+    future = mock.MagicMock()
+    future.exception.return_value = None
+    future.result.return_value.body = PROBABILISTIC.encode('utf-8')
+    sampler._sampling_request_callback(future)
+    assert 'ProbabilisticSampler(0.5)' == '%s' % sampler.sampler
+    assert PROBABILISTIC == SamplingStrategyCache(str(tmp_path), 'x').read()
+    sampler.close()
@@ -14,6 +14,8 @@
 
 from io import BytesIO
 
+import pytest
+
 import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
 import jaeger_client.thrift_gen.sampling.SamplingManager as sampling_manager
 from opentracing import child_of, follows_from
@@ -58,6 +60,27 @@ def _marshall_span(span):
     args.read(prot)
 
 
+def test_submit_batch_lazy_tag_encoding(tracer):
+    tracer.lazy_tag_encoding = True
+    tracer.max_tag_value_length = 5
+    span = tracer.start_span('test-span')
+    span.set_tag('bender', 'is great')
+    span.set_tag('peer.ipv4', 123123)
+    span.log_kv({'event': 'kiss-my-shiny-metal-...'}, timestamp=1.5)
+    span.finish()
+
+    batch = thrift.make_jaeger_batch(
+        spans=[span], process=ttypes.Process(serviceName='x', tags={}))
+    tags = {tag.key: tag for tag in batch.spans[0].tags}
+    assert tags['bender'].vStr == 'is gr'
+    assert tags['peer.ipv4'].vLong == 123123
+    log = batch.spans[0].logs[0]
+    assert log.timestamp == 1500000
+    assert log.fields[0].key == 'event'
+    assert log.fields[0].vStr == 'kiss-'
+    _marshall_span(span)
+
+
 def test_large_ids(tracer):
 
     def serialize(trace_id, span_id):
@@ -191,3 +214,45 @@ def test_parse_span_references(tracer):
     span2.finish()
     follow_span.finish()
     _marshall_span(follow_span)
+
+
+def test_make_emit_batch_message_from_spans(tracer):
+    process = thrift.make_process('svc', {'a': 'b'}, max_length=100)
+    frame = thrift.make_emit_batch_frame(process)
+    for count in (0, 1, 14, 15, 200):
+        spans = []
+        for i in range(count):
+            span = tracer.start_span('test-span-%s' % i)
+            span.set_tag('i', i)
+            span.finish()
+            spans.append(span)
+        batch = thrift.make_jaeger_batch(spans=spans, process=process)
+        serialized = [thrift.serialize_span(span) for span in batch.spans]
+        assert serialized == [thrift.encode_span(span) for span in spans]
+        for seqid in (7, 128, 2 ** 31 - 1):
+            message = thrift.make_emit_batch_message_from_spans(frame, serialized, seqid)
+            assert message == thrift.make_emit_batch_message(batch, seqid)
+            assert len(message) <= \
+                thrift.emit_batch_overhead(frame) + sum(len(s) for s in serialized)
+
+
+@pytest.mark.parametrize('lazy_tag_encoding', [False, True])
+def test_estimate_span_size(tracer, lazy_tag_encoding):
+    tracer.lazy_tag_encoding = lazy_tag_encoding
+    parent = tracer.start_span('parent')
+    parent.finish()
+    span = tracer.start_span('test-span', child_of=parent)
+    span.set_tag('sql', 'x' * 5000)
+    span.set_tag('rows', 42)
+    span.log_kv({'event': 'retry', 'attempt': 2})
+    span.finish()
+    for s in (parent, span):
+        actual = len(thrift.encode_span(s))
+        assert actual * 0.8 <= thrift.estimate_span_size(s) <= actual * 1.5
+
+
+def test_split_by_size():
+    groups, oversized = thrift.split_by_size(
+        items='abcdef', sizes=[3, 3, 5, 1, 9, 2], max_size=6)
+    assert [['a', 'b'], ['c', 'd'], ['f']] == groups
+    assert ['e'] == oversized
@@ -0,0 +1,145 @@
+# Copyright (c) 2026 The Jaeger Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+from thrift.Thrift import TMessageType
+from thrift.protocol.TBinaryProtocol import TBinaryProtocol
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+import jaeger_client.thrift_gen.jaeger.ttypes as ttypes
+from jaeger_client import thrift, thrift_compact
+from jaeger_client.collector_net import HttpCollectorSender
+from jaeger_client.thrift_gen.agent import Agent
+
+
+@pytest.fixture(params=['accelerated', 'python'])
+def encoder(request, monkeypatch):
+    if request.param == 'accelerated':
+        if not thrift_compact.ACCELERATED:
+            pytest.skip('thrift fastbinary extension is not available')
+    else:
+        monkeypatch.setattr(thrift_compact, 'ACCELERATED', False)
+    return request.param
+
+
+def _generated(obj):
+    buf = TMemoryBuffer()
+    obj.write(TCompactProtocol(buf))
+    return buf.getvalue()
+
+
+def _random_int(rnd, bits):
+    return rnd.choice([
+        0, 1, -1, (1 << (bits - 1)) - 1, -(1 << (bits - 1)),
+        rnd.randint(-(1 << (bits - 1)), (1 << (bits - 1)) - 1),
+    ])
+
+
+def _random_tag(rnd):
+    key = rnd.choice(['k', u'unicode_key_\xe9', 'x' * 300])
+    kind = rnd.randint(0, 4)
+    if kind == 0:
+        return ttypes.Tag(key=key, vType=ttypes.TagType.STRING,
+                          vStr=rnd.choice(['', 'v', u'non-ascii: \xe9']))
+    if kind == 1:
+        return ttypes.Tag(key=key, vType=ttypes.TagType.DOUBLE,
+                          vDouble=rnd.choice([0.0, -1.5, 1e300, rnd.random()]))
+    if kind == 2:
+        return ttypes.Tag(key=key, vType=ttypes.TagType.BOOL,
+                          vBool=rnd.choice([True, False]))
+    if kind == 3:
+        return ttypes.Tag(key=key, vType=ttypes.TagType.LONG,
+                          vLong=_random_int(rnd, 64))
+    return ttypes.Tag(key=key, vType=ttypes.TagType.BINARY, vBinary='binary')
+
+
+def _random_span(rnd):
+    return ttypes.Span(
+        traceIdLow=_random_int(rnd, 64),
+        traceIdHigh=rnd.choice([0, _random_int(rnd, 64)]),
+        spanId=_random_int(rnd, 64),
+        parentSpanId=rnd.choice([None, 0, _random_int(rnd, 64)]),
+        operationName=rnd.choice(['op', u'оп']),
+        references=rnd.choice([None, [], [
+            ttypes.SpanRef(refType=rnd.randint(0, 1),
+                           traceIdLow=_random_int(rnd, 64),
+                           traceIdHigh=_random_int(rnd, 64),
+                           spanId=_random_int(rnd, 64))
+            for _ in range(rnd.randint(1, 3))
+        ]]),
+        flags=_random_int(rnd, 32),
+        startTime=_random_int(rnd, 64),
+        duration=rnd.choice([None, _random_int(rnd, 64)]),
+        tags=[_random_tag(rnd) for _ in range(rnd.choice([0, 1, 14, 15, 200]))],
+        logs=rnd.choice([None, [
+            ttypes.Log(timestamp=_random_int(rnd, 64),
+                       fields=[_random_tag(rnd) for _ in range(rnd.randint(0, 20))])
+            for _ in range(rnd.randint(0, 3))
+        ]]),
+    )
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_encode_span_matches_generated_code(encoder, seed):
+    span = _random_span(random.Random(seed))
+    assert thrift_compact.encode_span(span) == _generated(span)
+
+
+def test_encode_empty_structs_match_generated_code():
+    for obj in (ttypes.Span(), ttypes.Tag(), ttypes.Log(), ttypes.SpanRef(),
+                ttypes.Process(), ttypes.Batch()):
+        buf = bytearray()
+        getattr(thrift_compact, {
+            ttypes.Span: 'write_span',
+            ttypes.Tag: 'write_tag',
+            ttypes.Log: 'write_log',
+            ttypes.SpanRef: 'write_span_ref',
+            ttypes.Process: 'write_process',
+            ttypes.Batch: 'write_batch',
+        }[type(obj)])(buf, obj)
+        assert bytes(buf) == _generated(obj)
+
+
+def test_encode_batch_matches_generated_code(encoder):
+    rnd = random.Random(0)
+    process = thrift.make_process(
+        'service', {'tag%d' % i: i for i in range(15)}, max_length=100)
+    for count in (0, 1, 15, 100):
+        batch = ttypes.Batch(process=process, spans=[_random_span(rnd) for _ in range(count)])
+        assert thrift_compact.encode_batch(batch) == _generated(batch)
+
+
+def test_emit_batch_message_matches_agent_client(encoder):
+    rnd = random.Random(1)
+    process = thrift.make_process('service', {'a': 'b'}, max_length=100)
+    batch = ttypes.Batch(process=process, spans=[_random_span(rnd) for _ in range(5)])
+
+    buf = TMemoryBuffer()
+    oprot = TCompactProtocol(buf)
+    oprot.writeMessageBegin('emitBatch', TMessageType.ONEWAY, 42)
+    Agent.emitBatch_args(batch=batch).write(oprot)
+    oprot.writeMessageEnd()
+    assert thrift.make_emit_batch_message(batch, seqid=42) == buf.getvalue()
+
+
+def test_collector_serialize_matches_generated_code(encoder):
+    rnd = random.Random(2)
+    process = thrift.make_process('service', {'a': 'b'}, max_length=100)
+    batch = ttypes.Batch(process=process, spans=[_random_span(rnd) for _ in range(5)])
+    buf = TMemoryBuffer()
+    batch.write(TBinaryProtocol(buf))
+    assert HttpCollectorSender.serialize(batch) == buf.getvalue()
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import mock
+import os
 import time
 
 from jaeger_client.throttler import RemoteThrottler
@@ -55,6 +56,24 @@ def test_throttler_init_polling():
     assert channel.io_loop.call_later.call_count == 1
 
 
+def test_throttler_after_fork():
+    channel = mock.MagicMock()
+    throttler = RemoteThrottler(channel, 'test-service')
+    throttler.set_client_id(1)
+    throttler.credits['test-operation'] = 3.0
+    # noinspection PyProtectedMember
+    throttler._after_fork_in_child()
+    assert throttler.client_id is None
+    assert throttler.credits == {}
+    # polling is restarted on the first use in the child
+    channel.io_loop = mock.MagicMock()
+    assert not channel.io_loop.add_callback.called
+    with mock.patch('os.getpid', return_value=os.getpid() + 1):
+        throttler.is_allowed('test-operation')
+        throttler.is_allowed('test-operation')
+    channel.io_loop.add_callback.assert_called_once_with(throttler._init_polling)
+
+
 def test_throttler_delayed_polling():
     channel = mock.MagicMock()
     channel.io_loop.time = time.time
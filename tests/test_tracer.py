@@ -13,15 +13,23 @@
 # limitations under the License.
 
 import mock
+import os
 import random
 import socket
+import threading
+import traceback
 
 import pytest
 import tornado.httputil
 
 from opentracing import Format, child_of, follows_from
 from opentracing.ext import tags as ext_tags
-from jaeger_client import ConstSampler, SpanContext, Tracer
+from jaeger_client import Config, ConstSampler, SpanContext, Tracer
+from jaeger_client import thrift
+from jaeger_client.reporter import Reporter, ThreadedReporter
+from jaeger_client.spool import process_spool_dir
+from jaeger_client.TUDPTransport import TUDPTransport
+from jaeger_client.span import UnsampledSpan
 from jaeger_client import constants as c
 
 
@@ -128,6 +136,37 @@ def test_child_span(tracer):
     tracer.close()
 
 
+def test_unsampled_span(tracer):
+    tracer.sampler = ConstSampler(False)
+    span = tracer.start_span('test', tags={'bender': 'is great'})
+    assert type(span) is UnsampledSpan
+    assert span.update_lock is None
+    span.set_tag('bender', 'is great')
+    span.log_kv({'event': 'kiss-my-shiny-metal-...'})
+    span.set_operation_name('test2')
+    span.set_baggage_item('x', 'y')
+    span.finish()
+    assert span.operation_name == 'test2'
+    assert span.get_baggage_item('x') == 'y'
+    assert len(span.tags) == 0 and len(span.logs) == 0
+    assert span.update_lock is None
+    tracer.reporter.report_span.assert_not_called()
+
+    child = tracer.start_span('child', child_of=span)
+    assert type(child) is UnsampledSpan
+    assert child.trace_id == span.trace_id
+    assert child.parent_id == span.span_id
+    assert child.get_baggage_item('x') == 'y'
+
+    # upgrade to sampled via sampling.priority
+    child.set_tag(ext_tags.SAMPLING_PRIORITY, 1)
+    assert child.is_sampled()
+    child.set_tag('bender', 'is great')
+    child.finish()
+    assert find_tag(child, 'bender') == 'is great'
+    tracer.reporter.report_span.assert_called_once_with(child)
+
+
 def test_follows_from(tracer):
     span = tracer.start_span('test')
     span1 = tracer.start_span('test2')
@@ -360,3 +399,178 @@ def test_tracer_128bit_trace_id():
         generate_128bit_trace_id=True,
     )
     assert tracer.max_trace_id_bits == c._max_trace_id_bits
+
+
+def test_tracer_after_fork_sets_new_client_id():
+    reporter = mock.MagicMock()
+    throttler = mock.MagicMock()
+    tracer = Tracer(service_name='x', reporter=reporter,
+                    sampler=ConstSampler(True), throttler=throttler)
+    client_id = tracer.tags[c.CLIENT_UUID_TAG_KEY]
+    tracer._after_fork_in_child()
+    assert tracer.tags[c.CLIENT_UUID_TAG_KEY] != client_id
+    throttler.set_client_id.assert_called_with(tracer.tags[c.CLIENT_UUID_TAG_KEY])
+    assert reporter.set_process.call_count == 2
+
+
+def _run_in_child(fn):
+    """Run fn in a forked child process, returns the bytes it returned."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            os.write(write_fd, fn())
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as f:
+        result = f.read()
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    return result
+
+
+def _udp_server():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    return server
+
+
+def _receive(server, *names):
+    """Receive packets until all names were seen, and a while after."""
+    received = b''
+    server.settimeout(5)
+    while not all(name in received for name in names):
+        received += server.recv(65536)
+    server.settimeout(0.2)
+    try:
+        while True:
+            received += server.recv(65536)
+    except socket.timeout:
+        pass
+    return received
+
+
+fork_required = pytest.mark.skipif(
+    not hasattr(os, 'register_at_fork'), reason='requires os.register_at_fork')
+
+
+@fork_required
+def test_tracer_after_fork():
+    server = _udp_server()
+    reporter = ThreadedReporter(
+        transport=TUDPTransport('127.0.0.1', server.getsockname()[1], blocking=True),
+        batch_size=10, flush_interval=None)
+    tracer = Tracer(service_name='x', reporter=reporter, sampler=ConstSampler(True))
+    try:
+        # stays in the queue until the reporter is closed
+        tracer.start_span('before-fork').finish()
+
+        def child():
+            random_id = tracer.random.getrandbits(64)
+            tracer.start_span('in-child').finish()
+            reporter.close().result(timeout=5)
+            return str(random_id).encode()
+
+        assert int(_run_in_child(child)) != tracer.random.getrandbits(64)
+    finally:
+        reporter.close().result(timeout=5)
+    received = _receive(server, b'before-fork', b'in-child')
+    assert received.count(b'before-fork') == 1
+    assert received.count(b'in-child') == 1
+
+
+@fork_required
+def test_reporter_restarts_on_first_use_after_fork():
+    server = _udp_server()
+    reporter = ThreadedReporter(
+        transport=TUDPTransport('127.0.0.1', server.getsockname()[1], blocking=True),
+        batch_size=10, flush_interval=None)
+    tracer = Tracer(service_name='x', reporter=reporter, sampler=ConstSampler(True))
+    try:
+        def child():
+            # the consumer thread of the parent does not exist in the child
+            started_on_fork = reporter._thread.is_alive()
+            tracer.start_span('in-child').finish()
+            started_on_report = reporter._thread.is_alive()
+            reporter.close().result(timeout=5)
+            return b'%d%d' % (started_on_fork, started_on_report)
+
+        assert _run_in_child(child) == b'01'
+    finally:
+        reporter.close().result(timeout=5)
+    assert b'in-child' in _receive(server, b'in-child')
+
+
+@fork_required
+def test_spool_of_exited_child_is_recovered(tmp_path):
+    spool_dir = str(tmp_path)
+    reporter = Reporter(channel=mock.MagicMock(), io_loop=mock.MagicMock(),
+                        spool_dir=spool_dir, batch_size=1)
+    tracer = Tracer(service_name='x', reporter=reporter, sampler=ConstSampler(True))
+
+    def child():
+        # the child opens a spool of its own on first use
+        tracer.start_span('in-child').finish()
+        reporter._spool([reporter._dequeue(1)])
+        reporter.spool.close()
+        return b'%d' % os.getpid()
+
+    pid = int(_run_in_child(child))
+    child_dir = process_spool_dir(spool_dir, pid)
+    assert 1 == len(os.listdir(child_dir))
+    reporter.spool.close()
+
+    # the next reporter takes over the spans the child left behind
+    reporter = Reporter(channel=mock.MagicMock(), io_loop=mock.MagicMock(),
+                        spool_dir=spool_dir)
+    assert not os.path.exists(child_dir)
+    assert ['in-child'] == [thrift.deserialize_span(data).operationName
+                            for data in reporter.spool.read(10)]
+    reporter.spool.close()
+
+
+def _close_tracer(tracer):
+    # the reporter Future is created and completed on its IOLoop
+    closed = threading.Event()
+    tracer.reporter.io_loop.add_callback(
+        lambda: tracer.close().add_done_callback(lambda _: closed.set()))
+    assert closed.wait(5)
+
+
+@fork_required
+def test_tracer_from_config_after_fork():
+    server = _udp_server()
+    config = Config(
+        config={
+            'sampler': {'type': 'const', 'param': True},
+            'local_agent': {
+                'reporting_host': '127.0.0.1',
+                'reporting_port': server.getsockname()[1],
+            },
+            'reporter_flush_interval': 60,
+        },
+        service_name='x',
+        validate=True,
+    )
+    tracer = config.new_tracer()
+    try:
+        tracer.start_span('before-fork').finish()
+
+        def child():
+            # the IOLoop thread of the channel was restarted in the child
+            tracer.start_span('in-child').finish()
+            _close_tracer(tracer)
+            return b'ok'
+
+        assert _run_in_child(child) == b'ok'
+    finally:
+        _close_tracer(tracer)
+    received = _receive(server, b'before-fork', b'in-child')
+    assert received.count(b'before-fork') == 1
+    assert received.count(b'in-child') == 1
@@ -15,8 +15,9 @@
 import time
 from opentracing import Tracer as NoopTracer
 from jaeger_client.tracer import Tracer
+from jaeger_client.rate_limiter import RateLimiterTable
 from jaeger_client.reporter import NullReporter
-from jaeger_client.sampler import ConstSampler
+from jaeger_client.sampler import ConstSampler, RateLimitingSampler
 
 
 def _generate_spans(tracer, iterations=1000, sleep=None):
@@ -48,6 +49,22 @@ def test_100pct_sampling(benchmark):
     benchmark(_generate_spans, tracer)
 
 
+def _make_sampling_decisions(sampler, iterations=1000):
+    for i in range(0, iterations):
+        sampler.is_sampled(i)
+
+
+def test_rate_limiting_sampling(benchmark):
+    benchmark(_make_sampling_decisions, RateLimitingSampler(100))
+
+
+def test_shared_rate_limiting_sampling(benchmark, tmp_path):
+    table = RateLimiterTable(str(tmp_path / 'limits'), 'benchmark')
+    benchmark(_make_sampling_decisions,
+              RateLimitingSampler(100, rate_limiter_table=table))
+    table.close()
+
+
 def test_100pct_sampling_250mcs(benchmark):
     tracer = Tracer.default_tracer(
         channel=None, service_name='benchmark',
@@ -15,6 +15,7 @@
 
 import mock
 import unittest
+import weakref
 
 from jaeger_client import utils
 from jaeger_client.sampler import Sampler
@@ -83,6 +84,29 @@ def test_get_local_ip_by_socket_does_not_blow_up():
     jaeger_client.utils.get_local_ip_by_socket()
 
 
+def test_after_fork_in_child():
+    class Handler(object):
+        def __init__(self, calls, fail=False):
+            self.calls = calls
+            self.fail = fail
+
+        def _after_fork_in_child(self):
+            self.calls.append(self)
+            if self.fail:
+                raise ValueError()
+
+    calls = []
+    with mock.patch.object(utils, '_fork_handlers', weakref.WeakValueDictionary()):
+        first, failing, gone, last = [Handler(calls, fail=i == 1) for i in range(4)]
+        for handler in (first, failing, gone, last):
+            utils.register_after_fork(handler)
+        del gone
+        with mock.patch.object(utils.default_logger, 'exception') as log:
+            utils._after_fork_in_child()
+        assert calls == [first, failing, last]
+        assert log.call_count == 1
+
+
 class MockSampler(Sampler):
     def __init__(self):
         pass